@@ -87,43 +87,19 @@ async def get_llm_status() -> LLMStatusResponse:
     Returns information about the configured LLM provider and whether it's connected.
     """
     from src.core.utils.config import get_settings
-    from src.core.models.lmstudio_provider import lmstudio_health_check
+    from src.core.models.providers import provider_health_check
 
     settings = get_settings()
     provider = settings.llm.provider
 
     try:
-        if provider == "lmstudio":
-            health = await lmstudio_health_check()
-            return LLMStatusResponse(
-                provider="lmstudio",
-                connected=health.get("connected", False),
-                model_name=health.get("model_id"),
-                error=health.get("error"),
-            )
-        elif provider == "openai":
-            # For OpenAI, check if API key is configured
-            if settings.openai.api_key:
-                return LLMStatusResponse(
-                    provider="openai",
-                    connected=True,
-                    model_name=settings.openai.model,
-                    error=None,
-                )
-            else:
-                return LLMStatusResponse(
-                    provider="openai",
-                    connected=False,
-                    model_name=None,
-                    error="OpenAI API key not configured",
-                )
-        else:
-            return LLMStatusResponse(
-                provider=provider or "none",
-                connected=False,
-                model_name=None,
-                error=f"Unknown provider: {provider}",
-            )
+        health = await provider_health_check(provider)
+        return LLMStatusResponse(
+            provider=provider,
+            connected=health["connected"],
+            model_name=health["model_id"],
+            error=health.get("error"),
+        )
 
     except Exception as e:
         logger.error(f"Error checking LLM status: {e}")
@@ -517,11 +493,12 @@ async def delete_conversation_session(
         # Get Redis client
         redis_client = await get_redis_client()
 
-        # Delete session data from Redis
-        # Note: The key uses ConversationMemory.REDIS_KEY_PREFIX = "conversation_memory:"
+        # Delete session data from Redis, both the simple and the ModelMessage formats
         # The RedisClient will add "MAI:" prefix, so we just use the memory key format
-        session_key = f"conversation_memory:{session_id}"
-        deleted = await redis_client.delete(session_key)
+        deleted = await redis_client.delete(
+            f"{ConversationMemory.REDIS_KEY_PREFIX}{session_id}",
+            f"{ConversationMemory.REDIS_MODEL_KEY_PREFIX}{session_id}",
+        )
 
         if deleted:
             logger.info(f"Session deleted successfully", session_id=session_id)
@@ -28,7 +28,7 @@ from src.core.tools.models import ToolMetadata
 ResultT = TypeVar("ResultT", bound=BaseModel)
 
 
-@dataclass
+@dataclass(slots=True)
 class AgentDependencies:
     """Dependencies available to agents during execution."""
     db: Optional[AsyncSession] = None
@@ -264,6 +264,11 @@ class BaseAgentFramework(Generic[ResultT]):
                 details={"input": user_input}
             ) from e
 
+        finally:
+            # Make sure this turn's queued memory writes have reached Redis
+            if conversation_memory:
+                await conversation_memory.flush()
+
     async def run_stream(
         self,
         user_input: str,
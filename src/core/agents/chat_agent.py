@@ -7,7 +7,7 @@ with intelligent fallback to echo behavior if the LLM is unavailable.
 
 import asyncio
 import base64
-from typing import Any, Type, AsyncIterator, Optional, List, Callable, Union
+from typing import Any, Type, AsyncIterator, Optional, List, Callable, Sequence, Union
 
 from pydantic import BaseModel
 from pydantic_ai import Agent, BinaryContent, ImageUrl
@@ -19,7 +19,7 @@ from src.core.agents.base import BaseAgentFramework, AgentDependencies
 from src.core.memory.short_term import ConversationMemory
 from src.core.memory.context_manager import ContextWindowManager
 from src.core.memory.history_processors import create_default_processor, limit_by_tokens, HistoryProcessor
-from src.core.models.responses import StandardResponse, ChatResponse
+from src.core.models.responses import StandardResponse, ChatResponse, chat_response
 from src.core.tools.models import ToolMetadata
 from src.core.utils.logging import get_logger_with_context
 
@@ -156,8 +156,8 @@ class ChatAgent(BaseAgentFramework):
 
         # Try LLM, fall back to echo on failure
         try:
-            # Get conversation history BEFORE adding user message
-            history: Optional[List[ModelMessage]] = None
+            # Get conversation history for this turn
+            history: Optional[Sequence[ModelMessage]] = None
             if conversation_memory:
                 # Get model name from deps or use default
                 model_name = getattr(self.model, 'name', lambda: 'default')() if hasattr(self.model, 'name') else 'default'
@@ -168,10 +168,6 @@ class ChatAgent(BaseAgentFramework):
                 # Process history through the processor if configured
                 history = self.history_processor(raw_history) if self.history_processor else raw_history
 
-            # Add user message to memory
-            if conversation_memory:
-                await conversation_memory.add_message(role="user", content=user_input)
-
             # Prepare multimodal content if images are provided
             input_content: Any = user_input
             if images:
@@ -188,17 +184,14 @@ class ChatAgent(BaseAgentFramework):
             # result.output is a string (we use str as output_type)
             content = result.output
 
-            # Add assistant response to memory
+            # Store the turn (user prompt and response) in memory
             if conversation_memory:
-                await conversation_memory.add_message(role="assistant", content=content)
-                # Store native model messages for future use
                 await conversation_memory.add_model_messages(result.new_messages())
+                await conversation_memory.flush()
 
             logger.info("LLM response generated successfully", agent=self.name)
 
-            return StandardResponse(
-                data=ChatResponse(role="assistant", content=content)
-            )
+            return chat_response(content)
 
         except Exception as e:
             logger.warning(
@@ -239,8 +232,8 @@ class ChatAgent(BaseAgentFramework):
             return
 
         try:
-            # Get conversation history BEFORE adding user message
-            history: Optional[List[ModelMessage]] = None
+            # Get conversation history for this turn
+            history: Optional[Sequence[ModelMessage]] = None
             if conversation_memory:
                 # Get model name from deps or use default
                 model_name = getattr(self.model, 'name', lambda: 'default')() if hasattr(self.model, 'name') else 'default'
@@ -251,10 +244,6 @@ class ChatAgent(BaseAgentFramework):
                 # Process history through the processor if configured
                 history = self.history_processor(raw_history) if self.history_processor else raw_history
 
-            # Add user message to memory
-            if conversation_memory:
-                await conversation_memory.add_message(role="user", content=user_input)
-
             # Prepare multimodal content if images are provided
             input_content: Any = user_input
             if images:
@@ -276,18 +265,12 @@ class ChatAgent(BaseAgentFramework):
                     delta = accumulated[len(previous_text):]
                     previous_text = accumulated
                     if delta:  # Only yield if there's new content
-                        yield StandardResponse(
-                            data=ChatResponse(role="assistant", content=delta)
-                        )
-                full_response = previous_text
+                        yield chat_response(delta)
 
-            # Add full response to memory after streaming completes
-            if conversation_memory and full_response:
-                await conversation_memory.add_message(
-                    role="assistant", content=full_response
-                )
-                # Store native model messages for future use
+            # Store the turn in memory after streaming completes
+            if conversation_memory:
                 await conversation_memory.add_model_messages(result.new_messages())
+                await conversation_memory.flush()
 
             logger.info("LLM streaming completed successfully", agent=self.name)
 
@@ -312,8 +295,9 @@ class ChatAgent(BaseAgentFramework):
         if conversation_memory:
             await conversation_memory.add_message(role="user", content=user_input)
             await conversation_memory.add_message(role="assistant", content=content)
+            await conversation_memory.flush()
 
-        return StandardResponse(data=ChatResponse(role="assistant", content=content))
+        return chat_response(content)
 
     async def _echo_stream(
         self,
@@ -331,12 +315,8 @@ class ChatAgent(BaseAgentFramework):
         if conversation_memory:
             await conversation_memory.add_message(role="user", content=user_input)
             await conversation_memory.add_message(role="assistant", content=content)
+            await conversation_memory.flush()
 
         for i, word in enumerate(words):
-            yield StandardResponse(
-                data=ChatResponse(
-                    role="assistant",
-                    content=f"{word}{' ' if i < len(words) - 1 else ''}",
-                )
-            )
+            yield chat_response(f"{word}{' ' if i < len(words) - 1 else ''}")
             await asyncio.sleep(0.03)
@@ -66,6 +66,7 @@ class SimpleAgent(BaseAgentFramework):
 
             # Add agent response to memory
             await conversation_memory.add_message(role="assistant", content=response_content)
+            await conversation_memory.flush()
 
         return StandardResponse(
             data=ChatResponse(role="assistant", content=response_content)
@@ -11,6 +11,7 @@ from .context_manager import (
     ContextWindowManager,
     TokenCounter,
     count_tokens,
+    get_context_window_manager,
     MODEL_CONTEXT_LIMITS,
 )
 from .history_processors import (
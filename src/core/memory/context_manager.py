@@ -5,8 +5,10 @@ Provides accurate token counting using tiktoken and smart message truncation
 to keep conversations within model context limits.
 """
 
-from typing import List, Dict, Optional, Literal
+from typing import List, Dict, Optional, Literal, Sequence, Tuple
 from dataclasses import dataclass
+from functools import lru_cache
+import os
 
 from pydantic_ai.messages import (
     ModelMessage,
@@ -78,6 +80,14 @@ class TokenCounter:
             self._encoder = None
             self._use_tiktoken = False
             logger.warning("tiktoken not available, using character-based token estimation")
+        except Exception as e:
+            # get_encoding downloads the BPE file on first use and fails when offline
+            self._encoder = None
+            self._use_tiktoken = False
+            logger.warning(
+                f"tiktoken encoding '{self.encoding_name}' could not be loaded ({e}), "
+                "using character-based token estimation"
+            )
 
     def count_tokens(self, text: str) -> int:
         """
@@ -95,6 +105,24 @@ class TokenCounter:
             # Fallback: 4 characters per token approximation
             return max(1, len(text) // 4)
 
+    def count_tokens_batch(self, texts: List[str]) -> List[int]:
+        """
+        Count tokens for many text strings at once.
+
+        With tiktoken this encodes the whole batch in one call, which runs on
+        tiktoken's native thread pool instead of one Python-level call per text.
+
+        Args:
+            texts: The texts to count tokens for
+
+        Returns:
+            Number of tokens in each text, in the same order
+        """
+        if self._use_tiktoken and self._encoder:
+            encoded = self._encoder.encode_batch(texts, num_threads=os.cpu_count() or 1)
+            return [len(tokens) for tokens in encoded]
+        return [max(1, len(text) // 4) for text in texts]
+
     def count_message_tokens(self, message: ModelMessage) -> int:
         """
         Count tokens in a pydantic-ai ModelMessage.
@@ -210,12 +238,12 @@ class ContextWindowManager:
             encoding_name=encoding_name,
         )
 
-    def count_tokens(self, messages: List[ModelMessage]) -> int:
+    def count_tokens(self, messages: Sequence[ModelMessage]) -> int:
         """
-        Count total tokens in a list of messages.
+        Count total tokens in a sequence of messages.
 
         Args:
-            messages: List of ModelMessage objects
+            messages: ModelMessage objects
 
         Returns:
             Total number of tokens
@@ -224,9 +252,9 @@ class ContextWindowManager:
 
     def fit_messages(
         self,
-        messages: List[ModelMessage],
+        messages: Sequence[ModelMessage],
         keep_system_prompts: bool = True,
-    ) -> List[ModelMessage]:
+    ) -> Sequence[ModelMessage]:
         """
         Truncate messages to fit within context window using sliding window approach.
 
@@ -234,14 +262,36 @@ class ContextWindowManager:
         that fit within the token budget.
 
         Args:
-            messages: List of ModelMessage objects to fit
+            messages: ModelMessage objects to fit
             keep_system_prompts: Whether to preserve system prompts at the start
 
         Returns:
-            Truncated list of messages that fit within max_history_tokens
+            Messages that fit within max_history_tokens; messages itself if all of them fit
+        """
+        fitted, _ = self.fit_messages_with_stats(messages, keep_system_prompts=keep_system_prompts)
+        return fitted
+
+    def fit_messages_with_stats(
+        self,
+        messages: Sequence[ModelMessage],
+        keep_system_prompts: bool = True,
+    ) -> Tuple[Sequence[ModelMessage], Dict[str, int]]:
+        """
+        Fit messages to the context window and report usage of the result.
+
+        Same truncation as fit_messages, but also returns the statistics that
+        get_context_stats would give for the fitted messages. The token total is
+        accumulated during the fit, so no extra counting pass is needed.
+
+        Args:
+            messages: ModelMessage objects to fit
+            keep_system_prompts: Whether to preserve system prompts at the start
+
+        Returns:
+            Tuple of (fitted messages, context statistics for the fitted messages)
         """
         if not messages:
-            return []
+            return [], self._build_stats(0, 0)
 
         total_tokens = self.count_tokens(messages)
 
@@ -250,7 +300,7 @@ class ContextWindowManager:
             logger.debug(
                 f"Messages fit within context: {total_tokens}/{self.max_history_tokens} tokens"
             )
-            return messages
+            return messages, self._build_stats(total_tokens, len(messages))
 
         logger.debug(
             f"Truncating messages: {total_tokens} tokens -> {self.max_history_tokens} tokens"
@@ -280,7 +330,9 @@ class ContextWindowManager:
                 f"System prompts use {system_tokens} tokens, "
                 f"exceeding max_history_tokens={self.max_history_tokens}"
             )
-            return system_messages if keep_system_prompts else []
+            if keep_system_prompts:
+                return system_messages, self._build_stats(system_tokens, len(system_messages))
+            return [], self._build_stats(0, 0)
 
         # Sliding window: keep most recent messages that fit
         fitted_messages = []
@@ -300,13 +352,13 @@ class ContextWindowManager:
         # Combine system prompts + fitted messages
         result = system_messages + fitted_messages if keep_system_prompts else fitted_messages
 
-        final_tokens = self.count_tokens(result)
+        final_tokens = system_tokens + current_tokens
         logger.debug(
             f"Truncation complete: kept {len(result)}/{len(messages)} messages, "
             f"{final_tokens}/{self.max_history_tokens} tokens"
         )
 
-        return result
+        return result, self._build_stats(final_tokens, len(result))
 
     def get_context_stats(self, messages: List[ModelMessage]) -> Dict[str, int]:
         """
@@ -318,8 +370,9 @@ class ContextWindowManager:
         Returns:
             Dictionary with token usage statistics
         """
-        total_tokens = self.count_tokens(messages)
+        return self._build_stats(self.count_tokens(messages), len(messages))
 
+    def _build_stats(self, total_tokens: int, num_messages: int) -> Dict[str, int]:
         return {
             "total_tokens": total_tokens,
             "max_tokens": self.max_tokens,
@@ -327,10 +380,29 @@ class ContextWindowManager:
             "reserve_tokens": self.reserve_tokens,
             "available_tokens": max(0, self.max_history_tokens - total_tokens),
             "utilization_percent": round((total_tokens / self.max_history_tokens) * 100, 2),
-            "num_messages": len(messages),
+            "num_messages": num_messages,
         }
 
 
+@lru_cache(maxsize=32)
+def get_context_window_manager(model_name: str, reserve_tokens: int = 1000) -> ContextWindowManager:
+    """
+    Get a shared ContextWindowManager for a model, creating it on first use.
+
+    Managers hold no per-conversation state, so one instance per
+    (model_name, reserve_tokens) can serve every session instead of
+    rebuilding the limits lookup and token counter on each turn.
+
+    Args:
+        model_name: Name of the model (e.g., "gpt-4", "claude-3-sonnet")
+        reserve_tokens: Tokens to reserve for completion
+
+    Returns:
+        Cached ContextWindowManager instance
+    """
+    return ContextWindowManager.for_model(model_name=model_name, reserve_tokens=reserve_tokens)
+
+
 def count_tokens(text: str, encoding_name: str = "cl100k_base") -> int:
     """
     Convenience function to count tokens in a text string.
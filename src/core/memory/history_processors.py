@@ -6,33 +6,33 @@ before sending to LLMs to stay within context windows and improve relevance.
 """
 
 from abc import ABC, abstractmethod
-from typing import List, Callable, Optional, Set
+from typing import List, Callable, Optional, Sequence, Set
 from pydantic_ai.messages import ModelMessage, ModelRequest, ModelResponse
 
-from src.core.memory.context_manager import ContextWindowManager
+from src.core.memory.context_manager import get_context_window_manager
 
 
 # Type alias for history processor functions
-HistoryProcessor = Callable[[List[ModelMessage]], List[ModelMessage]]
+HistoryProcessor = Callable[[Sequence[ModelMessage]], Sequence[ModelMessage]]
 
 
 class BaseHistoryProcessor(ABC):
     """Abstract base class for message history processors."""
 
     @abstractmethod
-    def process(self, messages: List[ModelMessage]) -> List[ModelMessage]:
+    def process(self, messages: Sequence[ModelMessage]) -> Sequence[ModelMessage]:
         """
         Process message history and return filtered/transformed version.
 
         Args:
-            messages: List of model messages to process
+            messages: Model messages to process
 
         Returns:
-            Processed list of model messages
+            Processed model messages
         """
         pass
 
-    def __call__(self, messages: List[ModelMessage]) -> List[ModelMessage]:
+    def __call__(self, messages: Sequence[ModelMessage]) -> Sequence[ModelMessage]:
         """Allow processor to be called as a function."""
         return self.process(messages)
 
@@ -50,7 +50,7 @@ class RecencyProcessor(BaseHistoryProcessor):
         """
         self.max_turns = max_turns
 
-    def process(self, messages: List[ModelMessage]) -> List[ModelMessage]:
+    def process(self, messages: Sequence[ModelMessage]) -> Sequence[ModelMessage]:
         """Keep only the most recent N turns."""
         if not messages:
             return messages
@@ -79,14 +79,14 @@ class TokenLimitProcessor(BaseHistoryProcessor):
         self.max_tokens = max_tokens
         self.model_name = model_name
 
-    def process(self, messages: List[ModelMessage]) -> List[ModelMessage]:
+    def process(self, messages: Sequence[ModelMessage]) -> Sequence[ModelMessage]:
         """Keep messages within token limit, removing oldest first."""
         if not messages:
             return messages
 
-        # Create a context manager for token counting
-        context_manager = ContextWindowManager.for_model(
-            model_name=self.model_name,
+        # Shared context manager for token counting
+        context_manager = get_context_window_manager(
+            self.model_name,
             reserve_tokens=0,  # No need to reserve for counting
         )
 
@@ -97,7 +97,7 @@ class TokenLimitProcessor(BaseHistoryProcessor):
             return messages
 
         # Remove oldest messages until we're under the limit
-        result = messages.copy()
+        result = list(messages)
         while result and context_manager.count_tokens(result) > self.max_tokens:
             # Remove from the beginning (oldest messages)
             result.pop(0)
@@ -154,7 +154,7 @@ class ImportantMessageProcessor(BaseHistoryProcessor):
         # Check for keywords
         return any(keyword in content for keyword in self.important_keywords)
 
-    def process(self, messages: List[ModelMessage]) -> List[ModelMessage]:
+    def process(self, messages: Sequence[ModelMessage]) -> Sequence[ModelMessage]:
         """
         Process messages, potentially marking important ones.
 
@@ -180,7 +180,7 @@ class ChainedProcessor(BaseHistoryProcessor):
         """
         self.processors = processors
 
-    def process(self, messages: List[ModelMessage]) -> List[ModelMessage]:
+    def process(self, messages: Sequence[ModelMessage]) -> Sequence[ModelMessage]:
         """Apply all processors in sequence."""
         result = messages
         for processor in self.processors:
@@ -205,7 +205,7 @@ class SummaryProcessor(BaseHistoryProcessor):
         """
         self.summary_threshold = summary_threshold
 
-    def process(self, messages: List[ModelMessage]) -> List[ModelMessage]:
+    def process(self, messages: Sequence[ModelMessage]) -> Sequence[ModelMessage]:
         """
         Placeholder for summarization logic.
 
@@ -1,14 +1,31 @@
+import asyncio
+import hashlib
 import httpx
 import json
 import uuid
+from collections import OrderedDict
 from datetime import datetime, timezone, timedelta
 from typing import List, Optional, Dict
 from uuid import UUID
 
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, delete
+from sqlalchemy import select, delete, update, func
 from qdrant_client import AsyncQdrantClient
-from qdrant_client.http.models import Distance, VectorParams, PointStruct, Filter
+from qdrant_client.http.models import (
+    Distance,
+    VectorParams,
+    PointStruct,
+    Filter,
+    FieldCondition,
+    MatchValue,
+    PayloadSchemaType,
+    PointIdsList,
+    QuantizationSearchParams,
+    ScalarQuantization,
+    ScalarQuantizationConfig,
+    ScalarType,
+    SearchParams,
+)
 
 from src.core.utils.logging import logger
 from src.core.utils.exceptions import EmbeddingGenerationError
@@ -17,9 +34,37 @@ from src.infrastructure.vector_store.qdrant_client import get_qdrant_client
 from src.core.memory.models import Message # Re-using Message model for long-term memory content
 
 LM_STUDIO_EMBEDDING_URL = "http://localhost:1234/v1/embeddings"
+EMBEDDING_MODEL = "nomic-ai/nomic-embed-text-v1.5-GGUF" # Placeholder model, can be configured
+EMBEDDING_CACHE_SIZE = 4096
 EMBEDDING_DIMENSION = 1536 # Assuming OpenAI compatible dimension
 QDRANT_COLLECTION_NAME = "mai_memories"
 
+# int8 scalar quantization keeps a ~4x smaller copy of the vectors in RAM for HNSW
+# traversal; the original float32 vectors stay on disk and are only read to rescore.
+QDRANT_QUANTIZATION_CONFIG = ScalarQuantization(
+    scalar=ScalarQuantizationConfig(type=ScalarType.INT8, quantile=0.99, always_ram=True)
+)
+QDRANT_SEARCH_PARAMS = SearchParams(
+    quantization=QuantizationSearchParams(rescore=True, oversampling=2.0)
+)
+
+# Payload fields used in search/delete filters; indexing them lets Qdrant filter
+# through an inverted index instead of checking every candidate's payload.
+QDRANT_PAYLOAD_INDEXES = {
+    "user_id": PayloadSchemaType.KEYWORD,
+    "agent_name": PayloadSchemaType.KEYWORD,
+    "memory_type": PayloadSchemaType.KEYWORD,
+}
+
+# Process-wide LRU of embeddings keyed by a digest of the input text, so repeated
+# content and queries skip the LM Studio round-trip. Cached lists must not be mutated.
+_embedding_cache: "OrderedDict[bytes, List[float]]" = OrderedDict()
+
+
+def _embedding_cache_key(text: str) -> bytes:
+    return hashlib.blake2b(text.encode("utf-8"), digest_size=16).digest()
+
+
 class LongTermMemory:
     def __init__(
         self,
@@ -33,14 +78,33 @@ class LongTermMemory:
         self.db_session = db_session
         self.qdrant_client = qdrant_client
         self._ensure_qdrant_collection_exists_task = None
+        # Built once so searches don't re-validate a raw filter dict on every call
+        self._user_filter = Filter(
+            must=[FieldCondition(key="user_id", match=MatchValue(value=str(user_id)))]
+        )
+
+    async def _create_qdrant_collection(self):
+        await self.qdrant_client.recreate_collection(
+            collection_name=QDRANT_COLLECTION_NAME,
+            vectors_config=VectorParams(
+                size=EMBEDDING_DIMENSION, distance=Distance.COSINE, on_disk=True
+            ),
+            quantization_config=QDRANT_QUANTIZATION_CONFIG,
+        )
+        for field_name, field_schema in QDRANT_PAYLOAD_INDEXES.items():
+            await self.qdrant_client.create_payload_index(
+                collection_name=QDRANT_COLLECTION_NAME,
+                field_name=field_name,
+                field_schema=field_schema,
+            )
 
     async def _ensure_qdrant_collection_exists(self):
         # This will be called once per instance to ensure the collection exists
         # Can be made more robust with retry mechanisms
         if not self._ensure_qdrant_collection_exists_task:
-            self._ensure_qdrant_collection_exists_task = self.qdrant_client.recreate_collection(
-                collection_name=QDRANT_COLLECTION_NAME,
-                vectors_config=VectorParams(size=EMBEDDING_DIMENSION, distance=Distance.COSINE),
+            # Wrap in a task so later callers can await the finished result again
+            self._ensure_qdrant_collection_exists_task = asyncio.ensure_future(
+                self._create_qdrant_collection()
             )
         await self._ensure_qdrant_collection_exists_task
 
@@ -49,10 +113,17 @@ class LongTermMemory:
         if not text:
             raise ValueError("Text for embedding generation cannot be empty.")
 
+        cache_key = _embedding_cache_key(text)
+        cached_embedding = _embedding_cache.get(cache_key)
+        if cached_embedding is not None:
+            _embedding_cache.move_to_end(cache_key)
+            logger.debug(f"Embedding cache hit for text snippet (first 30 chars): '{text[:30]}...'")
+            return cached_embedding
+
         headers = {"Content-Type": "application/json"}
         payload = {
             "input": text,
-            "model": "nomic-ai/nomic-embed-text-v1.5-GGUF" # Placeholder model, can be configured
+            "model": EMBEDDING_MODEL
         }
 
         try:
@@ -74,6 +145,9 @@ class LongTermMemory:
                 logger.warning(f"Embedding dimension mismatch: expected {EMBEDDING_DIMENSION}, got {len(embedding)}. This might cause issues with Qdrant.")
             
             logger.debug(f"Generated embedding for text snippet (first 30 chars): '{text[:30]}...'")
+            _embedding_cache[cache_key] = embedding
+            if len(_embedding_cache) > EMBEDDING_CACHE_SIZE:
+                _embedding_cache.popitem(last=False)
             return embedding
 
         except httpx.RequestError as exc:
@@ -105,7 +179,52 @@ class LongTermMemory:
 
         # Generate a UUID for Qdrant point_id
         qdrant_point_id = uuid.uuid4()
-        
+
+        db_memory = DBMemory(
+            user_id=self.user_id,
+            agent_name=self.agent_name,
+            content=content,
+            memory_type=memory_type,
+            importance=importance,
+            qdrant_id=qdrant_point_id,
+            metadata=json.dumps(metadata) if metadata else None,
+            last_accessed_at=datetime.now(timezone.utc) # Set initial access time
+        )
+
+        # The Qdrant upsert and the PostgreSQL insert are independent once the
+        # embedding exists, so overlap their round-trips.
+        qdrant_task = asyncio.ensure_future(
+            self._upsert_embedding(qdrant_point_id, embedding, content, memory_type, importance, metadata)
+        )
+        db_task = asyncio.ensure_future(self._insert_memory(db_memory))
+        try:
+            await asyncio.gather(qdrant_task, db_task)
+            await self.db_session.commit()
+        except Exception:
+            qdrant_task.cancel()
+            db_task.cancel()
+            # Let both settle so the rollback can't run alongside an in-flight flush
+            await asyncio.gather(qdrant_task, db_task, return_exceptions=True)
+            await self.db_session.rollback()
+            if qdrant_task.cancelled() or qdrant_task.exception() is None:
+                # The embedding may have been written; don't leave it without its row
+                await self._delete_embedding(qdrant_point_id)
+            raise
+
+        await self.db_session.refresh(db_memory)
+        logger.info(f"Memory metadata stored in PostgreSQL with ID: {db_memory.id}")
+
+        return db_memory
+
+    async def _upsert_embedding(
+        self,
+        qdrant_point_id: UUID,
+        embedding: List[float],
+        content: str,
+        memory_type: str,
+        importance: int,
+        metadata: Optional[Dict],
+    ):
         try:
             # Store embedding in Qdrant
             await self.qdrant_client.upsert(
@@ -121,7 +240,7 @@ class LongTermMemory:
                             "memory_type": memory_type,
                             "content_preview": content[:250], # Store a preview in Qdrant payload
                             "importance": importance,
-                            "metadata": json.dumps(metadata) if metadata else None
+                            "metadata": json.dumps(metadata) if metadata else None,
                         }
                     )
                 ]
@@ -131,23 +250,24 @@ class LongTermMemory:
             logger.error(f"Failed to store embedding in Qdrant for user {self.user_id}: {e}")
             raise
 
-        # Store memory metadata in PostgreSQL
-        db_memory = DBMemory(
-            user_id=self.user_id,
-            agent_name=self.agent_name,
-            content=content,
-            memory_type=memory_type,
-            importance=importance,
-            qdrant_id=qdrant_point_id,
-            metadata=json.dumps(metadata) if metadata else None,
-            last_accessed_at=datetime.now(timezone.utc) # Set initial access time
-        )
-        self.db_session.add(db_memory)
-        await self.db_session.commit()
-        await self.db_session.refresh(db_memory)
-        logger.info(f"Memory metadata stored in PostgreSQL with ID: {db_memory.id}")
+    async def _delete_embedding(self, qdrant_point_id: UUID):
+        try:
+            await self.qdrant_client.delete(
+                collection_name=QDRANT_COLLECTION_NAME,
+                points_selector=PointIdsList(points=[str(qdrant_point_id)]),
+            )
+            logger.debug(f"Deleted orphaned embedding {qdrant_point_id} from Qdrant.")
+        except Exception as e:
+            logger.error(f"Failed to delete orphaned embedding {qdrant_point_id} from Qdrant for user {self.user_id}: {e}")
 
-        return db_memory
+    async def _insert_memory(self, db_memory: DBMemory):
+        # Store memory metadata in PostgreSQL; committed once Qdrant has the embedding too
+        try:
+            self.db_session.add(db_memory)
+            await self.db_session.flush()
+        except Exception as e:
+            logger.error(f"Failed to store memory metadata in PostgreSQL for user {self.user_id}: {e}")
+            raise
 
     async def retrieve(self, query: str, limit: int = 5) -> List[DBMemory]:
         logger.info(f"Retrieving long-term memories for user {self.user_id} with query: '{query[:50]}...'")
@@ -168,16 +288,8 @@ class LongTermMemory:
             search_result = await self.qdrant_client.search(
                 collection_name=QDRANT_COLLECTION_NAME,
                 query_vector=query_embedding,
-                query_filter=Filter(
-                    must=[
-                        {
-                            "key": "user_id",
-                            "match": {
-                                "value": str(self.user_id)
-                            }
-                        }
-                    ]
-                ),
+                query_filter=self._user_filter,
+                search_params=QDRANT_SEARCH_PARAMS,
                 limit=limit
             )
             logger.debug(f"Qdrant search returned {len(search_result)} results.")
@@ -224,18 +336,23 @@ class LongTermMemory:
     async def update_access(self, memory_id: uuid.UUID):
         logger.info(f"Updating access for memory {memory_id} for user {self.user_id}")
         try:
-            stmt = select(DBMemory).where(
-                DBMemory.id == memory_id,
-                DBMemory.user_id == self.user_id
+            # Single atomic UPDATE: no read-modify-write race on accessed_count
+            stmt = (
+                update(DBMemory)
+                .where(
+                    DBMemory.id == memory_id,
+                    DBMemory.user_id == self.user_id
+                )
+                .values(
+                    last_accessed_at=datetime.now(timezone.utc),
+                    accessed_count=func.coalesce(DBMemory.accessed_count, 0) + 1,
+                )
+                .returning(DBMemory.id)
             )
             result = await self.db_session.execute(stmt)
-            memory = result.scalar_one_or_none()
 
-            if memory:
-                memory.last_accessed_at = datetime.now(timezone.utc)
-                memory.accessed_count = (memory.accessed_count or 0) + 1
+            if result.first() is not None:
                 await self.db_session.commit()
-                await self.db_session.refresh(memory)
                 logger.debug(f"Memory {memory_id} access updated.")
             else:
                 logger.warning(f"Memory {memory_id} not found or does not belong to user {self.user_id}.")
@@ -327,42 +444,43 @@ class LongTermMemory:
 
         threshold_date = datetime.now(timezone.utc) - timedelta(days=max_age_days)
 
+        # 1. Delete from PostgreSQL, returning the Qdrant ids in the same round-trip
         try:
-            # 1. Query PostgreSQL for memories to delete
-            stmt = select(DBMemory).where(
-                DBMemory.user_id == self.user_id,
-                DBMemory.created_at < threshold_date
+            stmt = (
+                delete(DBMemory)
+                .where(
+                    DBMemory.user_id == self.user_id,
+                    DBMemory.created_at < threshold_date
+                )
+                .returning(DBMemory.qdrant_id)
             )
             result = await self.db_session.execute(stmt)
-            memories_to_delete = result.scalars().all()
+            deleted_qdrant_ids = result.scalars().all()
+            qdrant_ids_to_delete = [str(qdrant_id) for qdrant_id in deleted_qdrant_ids if qdrant_id]
+        except Exception as e:
+            await self.db_session.rollback()
+            logger.error(f"Failed to delete memories from PostgreSQL for user {self.user_id}: {e}")
+            return
 
-            if not memories_to_delete:
+        # 2. Commit before touching Qdrant, so embeddings are only removed for rows that are gone
+        try:
+            await self.db_session.commit()
+            if deleted_qdrant_ids:
+                logger.info(f"Deleted {len(deleted_qdrant_ids)} old memories from PostgreSQL.")
+            else:
                 logger.info(f"No old memories found for user {self.user_id} older than {max_age_days} days.")
-                return
-
-            qdrant_ids_to_delete = [str(m.qdrant_id) for m in memories_to_delete if m.qdrant_id]
-            pg_memory_ids_to_delete = [m.id for m in memories_to_delete]
-
-            # 2. Delete from Qdrant
-            if qdrant_ids_to_delete:
-                try:
-                    await self.qdrant_client.delete_points(
-                        collection_name=QDRANT_COLLECTION_NAME,
-                        points_selector={"points": qdrant_ids_to_delete}
-                    )
-                    logger.debug(f"Deleted {len(qdrant_ids_to_delete)} embeddings from Qdrant.")
-                except Exception as e:
-                    logger.error(f"Failed to delete embeddings from Qdrant for user {self.user_id}: {e}")
-            
-            # 3. Delete from PostgreSQL
-            if pg_memory_ids_to_delete:
-                try:
-                    stmt = delete(DBMemory).where(DBMemory.id.in_(pg_memory_ids_to_delete))
-                    await self.db_session.execute(stmt)
-                    await self.db_session.commit()
-                    logger.info(f"Deleted {len(pg_memory_ids_to_delete)} old memories from PostgreSQL.")
-                except Exception as e:
-                    logger.error(f"Failed to delete memories from PostgreSQL for user {self.user_id}: {e}")
-
         except Exception as e:
-            logger.error(f"An unexpected error occurred during memory cleanup for user {self.user_id}: {e}")
+            await self.db_session.rollback()
+            logger.error(f"Failed to delete memories from PostgreSQL for user {self.user_id}: {e}")
+            return
+
+        # 3. Delete the matching embeddings from Qdrant
+        if qdrant_ids_to_delete:
+            try:
+                await self.qdrant_client.delete(
+                    collection_name=QDRANT_COLLECTION_NAME,
+                    points_selector=PointIdsList(points=qdrant_ids_to_delete),
+                )
+                logger.debug(f"Deleted {len(qdrant_ids_to_delete)} embeddings from Qdrant.")
+            except Exception as e:
+                logger.error(f"Failed to delete embeddings from Qdrant for user {self.user_id}: {e}")
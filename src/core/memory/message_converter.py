@@ -6,7 +6,7 @@ Converts between:
 - pydantic-ai's ModelMessage format (ModelRequest, ModelResponse)
 """
 
-from datetime import datetime
+from datetime import datetime, timezone
 from typing import List, Sequence
 
 from pydantic_ai.messages import (
@@ -76,6 +76,8 @@ def model_messages_to_messages(
         List of MAI Message objects for Redis storage
     """
     messages: List[Message] = []
+    # One timestamp per conversion keeps fallback times consistent across the batch
+    now = datetime.now(timezone.utc)
 
     for model_msg in model_messages:
         if isinstance(model_msg, ModelRequest):
@@ -87,7 +89,7 @@ def model_messages_to_messages(
                             content=part.content
                             if isinstance(part.content, str)
                             else str(part.content),
-                            timestamp=part.timestamp or datetime.utcnow(),
+                            timestamp=part.timestamp or now,
                         )
                     )
                 # Skip SystemPromptPart - not stored in conversation
@@ -103,7 +105,7 @@ def model_messages_to_messages(
                     Message(
                         role="assistant",
                         content="".join(content_parts),
-                        timestamp=datetime.utcnow(),
+                        timestamp=now,
                         metadata=(
                             {"model_name": model_msg.model_name}
                             if model_msg.model_name
@@ -1,9 +1,12 @@
 from pydantic import BaseModel, Field
-from datetime import datetime
-from typing import Dict, Any
+from datetime import datetime, timezone
+from typing import Dict, Any, Optional
 
 class Message(BaseModel):
     role: str
     content: str
-    timestamp: datetime = Field(default_factory=datetime.utcnow)
+    timestamp: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
     metadata: Dict[str, Any] = Field(default_factory=dict)
+    # Token count (content + role framing), computed once by ConversationMemory and
+    # persisted with the message so reloads don't re-tokenize the history
+    token_count: Optional[int] = None
@@ -1,21 +1,117 @@
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Callable, Sequence, TextIO, Tuple
 from datetime import datetime
+import asyncio
+import io
 import json
 
+import numpy as np
 from pydantic import ValidationError, TypeAdapter
 from pydantic_ai.messages import ModelMessage, ModelMessagesTypeAdapter
 
 from src.core.memory.models import Message
 from src.core.memory.message_converter import messages_to_model_messages, model_messages_to_messages
-from src.core.memory.context_manager import ContextWindowManager, count_tokens
-from src.infrastructure.cache.redis_client import RedisClient
+from src.core.memory.context_manager import TokenCounter, get_context_window_manager
+from src.infrastructure.cache.redis_client import RedisClient, RedisClientError
 from src.core.utils.logging import logger
 
-# Token counting approximation
-# A common heuristic is 4 characters per token or 1.33 words per token.
-# For simplicity, we'll use a character-based approximation for now.
-# This will need to be replaced with a proper tokenizer for accuracy.
-APPROX_CHARS_PER_TOKEN = 4
+# Built once per process: constructing a TypeAdapter compiles its validation and
+# serialization schema, which is far more expensive than using it.
+MESSAGE_LIST_ADAPTER = TypeAdapter(List[Message])
+
+# Per-message overhead for role framing, matching TokenCounter.count_message_tokens
+MESSAGE_TOKEN_OVERHEAD = 4
+
+# Shared tokenizer, created on first use so importing this module stays cheap
+_token_counter: Optional[TokenCounter] = None
+
+
+def _get_token_counter() -> TokenCounter:
+    global _token_counter
+    if _token_counter is None:
+        _token_counter = TokenCounter()
+    return _token_counter
+
+
+def _message_tokens(message: Message) -> int:
+    # Each message is encoded at most once; later counts and truncations reuse it
+    if message.token_count is None:
+        message.token_count = (
+            _get_token_counter().count_tokens(message.content) + MESSAGE_TOKEN_OVERHEAD
+        )
+    return message.token_count
+
+
+def _fill_missing_token_counts(messages: List[Message]) -> None:
+    # Messages saved before counts were persisted (or written elsewhere) lack one;
+    # count them all in a single batch rather than one encode call each
+    uncounted = [msg for msg in messages if msg.token_count is None]
+    if not uncounted:
+        return
+    counts = _get_token_counter().count_tokens_batch([msg.content for msg in uncounted])
+    for msg, count in zip(uncounted, counts):
+        msg.token_count = count + MESSAGE_TOKEN_OVERHEAD
+
+
+def _model_message_fragment(model_message: ModelMessage) -> bytes:
+    # JSON for a single message as it appears inside the serialized list
+    return ModelMessagesTypeAdapter.dump_json([model_message])[1:-1]
+
+
+def _is_wrong_type(error: Exception) -> bool:
+    # Raised for keys still holding the JSON string written before messages were stored as a list
+    return isinstance(error, RedisClientError) and "WRONGTYPE" in str(error)
+
+
+def _message_from_trusted(data: Dict[str, Any]) -> Message:
+    # Data this class wrote to Redis itself is already schema-conformant, so skip
+    # validation and only restore the one non-JSON-native field.
+    return Message.model_construct(
+        role=data["role"],
+        content=data["content"],
+        timestamp=datetime.fromisoformat(data["timestamp"]),
+        metadata=data.get("metadata") or {},
+        token_count=data.get("token_count"),
+    )
+
+
+# Single-pass XML escaping; equivalent to html.escape(..., quote=False)
+_XML_ESCAPE_TABLE = str.maketrans({"&": "&amp;", "<": "&lt;", ">": "&gt;"})
+
+
+def _write_default(buf: TextIO, msg: Message) -> None:
+    buf.write(msg.role)
+    buf.write(": ")
+    buf.write(msg.content)
+
+
+def _write_chat(buf: TextIO, msg: Message) -> None:
+    # For a chat-like format, often just role and content are needed
+    buf.write("<")
+    buf.write(msg.role)
+    buf.write(">")
+    buf.write(msg.content)
+    buf.write("</")
+    buf.write(msg.role)
+    buf.write(">")
+
+
+def _write_xml(buf: TextIO, msg: Message) -> None:
+    # Simple XML format for LLM input, with content escaped for XML safety
+    buf.write("<")
+    buf.write(msg.role)
+    buf.write(">\n  ")
+    buf.write(msg.content.translate(_XML_ESCAPE_TABLE))
+    buf.write("\n</")
+    buf.write(msg.role)
+    buf.write(">")
+
+
+_CONTEXT_FORMATTERS: Dict[str, Callable[[TextIO, Message], None]] = {
+    "default": _write_default,
+    "chat": _write_chat,
+    "xml": _write_xml,
+}
+
 
 class ConversationMemory:
     REDIS_KEY_PREFIX = "conversation_memory:"
@@ -29,9 +125,46 @@ class ConversationMemory:
 
         self.session_id = session_id
         self.redis = redis
+        # Read-only snapshots handed out by get_messages/get_model_messages, rebuilt
+        # lazily after the underlying lists change
+        self._messages_snapshot: Optional[Tuple[Message, ...]] = None
+        self._model_messages_snapshot: Optional[Tuple[ModelMessage, ...]] = None
+        # Serialized JSON of each model message (without array brackets), so saving
+        # only encodes newly added messages; None means rebuild from model_messages
+        self._model_message_fragments: Optional[List[bytes]] = None
         self.messages: List[Message] = []
         self.model_messages: List[ModelMessage] = []
-        self._message_adapter = TypeAdapter(List[Message])
+        # Messages are stored as a Redis list so each add is a single RPUSH. These track
+        # local changes the list hasn't seen yet: oldest entries dropped by truncate_to_fit,
+        # or a local state that no longer matches the list at all (e.g. a failed load).
+        self._pending_trim = 0
+        self._needs_full_save = False
+        # Writes are deferred and coalesced: add_message/add_model_messages queue their
+        # changes and schedule one flush for the next event-loop iteration, so messages
+        # added back to back (e.g. user + assistant) go out in a single write
+        self._unsaved_messages: List[Message] = []
+        self._model_messages_dirty = False
+        self._scheduled_flush: Optional[asyncio.Task] = None
+        self._write_lock = asyncio.Lock()
+
+    @property
+    def messages(self) -> List[Message]:
+        return self._messages
+
+    @messages.setter
+    def messages(self, value: List[Message]) -> None:
+        self._messages = value
+        self._messages_snapshot = None
+
+    @property
+    def model_messages(self) -> List[ModelMessage]:
+        return self._model_messages
+
+    @model_messages.setter
+    def model_messages(self, value: List[ModelMessage]) -> None:
+        self._model_messages = value
+        self._model_messages_snapshot = None
+        self._model_message_fragments = None
 
     def _get_redis_key(self) -> str:
         return f"{self.REDIS_KEY_PREFIX}{self.session_id}"
@@ -46,32 +179,51 @@ class ConversationMemory:
             raise ValueError("content must be a non-empty string.")
 
         message = Message(role=role, content=content, metadata=metadata or {})
+        _message_tokens(message)  # Count before persisting so the total is stored with it
         self.messages.append(message)
-        await self.save_to_redis()
+        self._messages_snapshot = None
+        self._unsaved_messages.append(message)
+        self._schedule_flush()
         logger.debug(f"Message added to session {self.session_id}: {message.model_dump_json()}")
 
-    def get_messages(self, last_n_messages: Optional[int] = None) -> List[Message]:
+    def get_messages(self, last_n_messages: Optional[int] = None) -> Tuple[Message, ...]:
+        # The snapshot is shared between calls until the next mutation, so repeated
+        # reads don't copy the history; callers that need a list can list() it
+        if self._messages_snapshot is None:
+            self._messages_snapshot = tuple(self.messages)
         if last_n_messages is None:
-            return self.messages[:]
-        return self.messages[-last_n_messages:] if last_n_messages > 0 else []
+            return self._messages_snapshot
+        return self._messages_snapshot[-last_n_messages:] if last_n_messages > 0 else ()
 
     async def add_model_messages(self, model_messages: List[ModelMessage]):
         """
         Add pydantic-ai ModelMessage objects from agent result.
 
-        This stores the native pydantic-ai format for reuse in agent.run().
-        Note: add_message() should be called separately to populate the simple
-        Message format for backwards compatibility. This method only handles
-        the model_messages list to avoid duplicates.
+        This is the single write for an agent turn: it stores the native
+        pydantic-ai format for reuse in agent.run() and derives the simple
+        Message entries (user prompts and text replies) from the same messages,
+        so callers should not also add_message() the turn.
 
         Args:
             model_messages: List of ModelMessage from agent result
         """
+        new_messages = model_messages_to_messages(model_messages)
+        for message in new_messages:
+            _message_tokens(message)
+        self.messages.extend(new_messages)
+        self._messages_snapshot = None
+
+        fragments = self._get_model_message_fragments()
         self.model_messages.extend(model_messages)
-        await self.save_to_redis()
+        self._model_messages_snapshot = None
+        fragments.extend(_model_message_fragment(mm) for mm in model_messages)
+
+        self._unsaved_messages.extend(new_messages)
+        self._model_messages_dirty = True
+        self._schedule_flush()
         logger.debug(f"Added {len(model_messages)} model messages to session {self.session_id}")
 
-    def get_model_messages(self, system_prompt: Optional[str] = None) -> List[ModelMessage]:
+    def get_model_messages(self, system_prompt: Optional[str] = None) -> Sequence[ModelMessage]:
         """
         Get conversation history in pydantic-ai ModelMessage format.
 
@@ -81,10 +233,12 @@ class ConversationMemory:
             system_prompt: Optional system prompt to include in first request
 
         Returns:
-            List of ModelMessage objects suitable for agent.run()
+            Read-only sequence of ModelMessage objects suitable for agent.run()
         """
         if self.model_messages:
-            return self.model_messages[:]
+            if self._model_messages_snapshot is None:
+                self._model_messages_snapshot = tuple(self.model_messages)
+            return self._model_messages_snapshot
         # Fallback: convert from simple Message format if model_messages not available
         return messages_to_model_messages(self.messages, system_prompt=system_prompt)
 
@@ -93,7 +247,7 @@ class ConversationMemory:
         model_name: str,
         system_prompt: Optional[str] = None,
         reserve_tokens: int = 1000,
-    ) -> List[ModelMessage]:
+    ) -> Sequence[ModelMessage]:
         """
         Get conversation history with automatic truncation to fit model context limits.
 
@@ -106,30 +260,20 @@ class ConversationMemory:
             reserve_tokens: Tokens to reserve for completion (default: 1000)
 
         Returns:
-            List of ModelMessage objects truncated to fit within model context limits
+            Sequence of ModelMessage objects truncated to fit within model context limits
         """
         # Get full message history
         messages = self.get_model_messages(system_prompt=system_prompt)
 
-        # Create context manager for the specific model
-        context_mgr = ContextWindowManager.for_model(
-            model_name=model_name,
-            reserve_tokens=reserve_tokens,
-        )
+        # Reuse the shared context manager for the specific model
+        context_mgr = get_context_window_manager(model_name, reserve_tokens)
 
-        # Get stats before truncation
-        stats_before = context_mgr.get_context_stats(messages)
-        logger.debug(
-            f"Context stats for session {self.session_id} before truncation: "
-            f"{stats_before['total_tokens']}/{stats_before['max_history_tokens']} tokens, "
-            f"{stats_before['num_messages']} messages"
+        # Fit messages to context window. The fit pass already counts every message
+        # (and logs the pre-truncation total), so the stats come back with the result
+        # instead of re-tokenizing the history before and after.
+        fitted_messages, stats_after = context_mgr.fit_messages_with_stats(
+            messages, keep_system_prompts=True
         )
-
-        # Fit messages to context window
-        fitted_messages = context_mgr.fit_messages(messages, keep_system_prompts=True)
-
-        # Get stats after truncation
-        stats_after = context_mgr.get_context_stats(fitted_messages)
         logger.debug(
             f"Context stats for session {self.session_id} after truncation: "
             f"{stats_after['total_tokens']}/{stats_after['max_history_tokens']} tokens, "
@@ -144,40 +288,32 @@ class ConversationMemory:
         if not messages_to_format:
             return ""
 
-        context_parts = []
-        if format == "default":
-            for msg in messages_to_format:
-                context_parts.append(f"{msg.role}: {msg.content}")
-            return "\n".join(context_parts)
-        elif format == "chat":
-            # For a chat-like format, often just role and content are needed
-            for msg in messages_to_format:
-                context_parts.append(f"<{msg.role}>{msg.content}</{msg.role}>")
-            return "\n".join(context_parts)
-        elif format == "xml":
-            # Simple XML format for LLM input
-            for msg in messages_to_format:
-                # Escape content for XML safety
-                escaped_content = msg.content.replace('&', '&amp;').replace('<', '&lt;').replace('>', '&gt;')
-                context_parts.append(
-                    f"<{msg.role}>\n  {escaped_content}\n</{msg.role}>"
-                )
-            return "\n".join(context_parts)
-        else:
+        write_message = _CONTEXT_FORMATTERS.get(format)
+        if write_message is None:
             logger.warning(f"Unsupported context string format: {format}. Using default.")
-            return self.get_context_string(format="default", last_n_messages=last_n_messages)
+            write_message = _write_default
+
+        # Write straight into one buffer instead of building a list of per-message strings
+        buf = io.StringIO()
+        for i, msg in enumerate(messages_to_format):
+            if i:
+                buf.write("\n")
+            write_message(buf, msg)
+        return buf.getvalue()
 
     def count_tokens(self) -> int:
-        total_chars = sum(len(msg.role) + len(msg.content) for msg in self.messages)
-        return total_chars // APPROX_CHARS_PER_TOKEN
+        return sum(_message_tokens(msg) for msg in self.messages)
 
     def truncate_to_fit(self, max_tokens: int):
         if max_tokens <= 0:
-            self.messages = []
+            self._drop_oldest(len(self.messages))
             logger.warning("max_tokens is non-positive, memory truncated to empty.")
             return
 
-        current_tokens = self.count_tokens()
+        counts = np.fromiter(
+            (_message_tokens(msg) for msg in self.messages), dtype=np.int64, count=len(self.messages)
+        )
+        current_tokens = int(counts.sum())
         if current_tokens <= max_tokens:
             return # No truncation needed
 
@@ -185,61 +321,157 @@ class ConversationMemory:
 
         # Simple sliding window: remove oldest messages until it fits
         # This is a basic approximation. A more sophisticated approach might summarize or prioritize.
-        truncated_messages: List[Message] = []
-        token_count = 0
-        
-        # Iterate from the newest message backwards to prioritize recent context
-        for msg in reversed(self.messages):
-            msg_token_cost = (len(msg.role) + len(msg.content)) // APPROX_CHARS_PER_TOKEN
-            if token_count + msg_token_cost <= max_tokens:
-                truncated_messages.insert(0, msg) # Add to the beginning to maintain order
-                token_count += msg_token_cost
+        # Running totals from the newest message backwards; the cut point is the number
+        # of recent messages whose cumulative cost still fits.
+        newest_first_totals = np.cumsum(counts[::-1])
+        keep_count = int(np.searchsorted(newest_first_totals, max_tokens, side="right"))
+        keep_from = len(self.messages) - keep_count
+        kept_tokens = int(newest_first_totals[keep_count - 1]) if keep_count else 0
+
+        self._drop_oldest(keep_from)
+        logger.debug(f"Memory truncated. New token count: {kept_tokens} with {len(self.messages)} messages.")
+
+    def _drop_oldest(self, count: int):
+        # Queued messages are always the newest ones. Those being dropped are simply
+        # never written; only the part of the cut that is already stored in Redis is
+        # applied server-side with LTRIM on the next write.
+        persisted = len(self.messages) - len(self._unsaved_messages)
+        if count > persisted:
+            del self._unsaved_messages[: count - persisted]
+            self._pending_trim += persisted
+        else:
+            self._pending_trim += count
+        self.messages = self.messages[count:]
+
+    def _schedule_flush(self):
+        if self._scheduled_flush is None:
+            self._scheduled_flush = asyncio.get_running_loop().create_task(self._run_scheduled_flush())
+
+    async def _run_scheduled_flush(self):
+        self._scheduled_flush = None
+        await self.flush()
+
+    async def flush(self):
+        """
+        Write changes queued by add_message/add_model_messages to Redis.
+
+        Queued changes are also written automatically on the next event-loop
+        iteration; call this at the end of a turn to make sure they have landed.
+        """
+        if self._scheduled_flush is not None:
+            # Not started yet, and everything it would write is written here
+            self._scheduled_flush.cancel()
+            self._scheduled_flush = None
+        async with self._write_lock:
+            messages, self._unsaved_messages = self._unsaved_messages, []
+            save_model_messages, self._model_messages_dirty = self._model_messages_dirty, False
+            if self._needs_full_save:
+                await self.save_to_redis()
+            elif save_model_messages:
+                # Independent keys, so both formats are written in one round-trip of latency
+                await asyncio.gather(self._append_to_redis(*messages), self._save_model_messages())
             else:
-                # If adding the message would exceed the limit, stop
-                break
-        
-        self.messages = truncated_messages
-        logger.debug(f"Memory truncated. New token count: {self.count_tokens()} with {len(self.messages)} messages.")
+                await self._append_to_redis(*messages)
 
+    async def _append_to_redis(self, *messages: Message):
+        trim, self._pending_trim = self._pending_trim, 0
+        if not messages and not trim:
+            return
+        # O(1) per message: only the new entries are serialized and sent
+        entries = [msg.model_dump(mode="json") for msg in messages]
+        try:
+            try:
+                await self.redis.append_list(self._get_redis_key(), *entries, trim_start=trim)
+            except RedisClientError as e:
+                if not _is_wrong_type(e):
+                    raise
+                await self._migrate_legacy_messages()
+                await self.redis.append_list(self._get_redis_key(), *entries, trim_start=trim)
+        except Exception as e:
+            self._needs_full_save = True
+            logger.error(f"Failed to append message to Redis for session {self.session_id}: {e}")
+
+    async def _migrate_legacy_messages(self) -> List[Any]:
+        """Convert a session stored as one JSON string into the list format, in place."""
+        entries = await self.redis.get(self._get_redis_key())
+        if not isinstance(entries, list):
+            raise ValueError(f"Unreadable legacy conversation memory for session {self.session_id}")
+        await self.redis.replace_list(self._get_redis_key(), *entries)
+        logger.info(f"Migrated conversation memory for session {self.session_id} to the list format.")
+        return entries
+
+    async def _load_message_entries(self) -> List[Any]:
+        try:
+            return await self.redis.lrange(self._get_redis_key())
+        except RedisClientError as e:
+            if not _is_wrong_type(e):
+                raise
+            return await self._migrate_legacy_messages()
+
+    def _get_model_message_fragments(self) -> List[bytes]:
+        if self._model_message_fragments is None:
+            self._model_message_fragments = [_model_message_fragment(mm) for mm in self.model_messages]
+        return self._model_message_fragments
+
+    async def _save_model_messages(self):
+        if not self.model_messages:
+            return
+        try:
+            # Join the cached per-message JSON instead of re-serializing the whole list
+            model_messages_json = b"[" + b",".join(self._get_model_message_fragments()) + b"]"
+            await self.redis.set(self._get_model_redis_key(), model_messages_json)
+        except Exception as e:
+            logger.error(f"Failed to save model messages to Redis for session {self.session_id}: {e}")
 
     async def save_to_redis(self):
+        """Write the full in-memory state to Redis, replacing whatever is stored."""
+        # Everything queued is part of the full state written below
+        self._unsaved_messages = []
+        self._model_messages_dirty = False
         try:
-            # Serialize the list of Message objects
-            messages_json = self._message_adapter.dump_json(self.messages).decode('utf-8')
-            await self.redis.set(self._get_redis_key(), messages_json)
-
-            # Serialize ModelMessage objects if present
-            if self.model_messages:
-                model_messages_json = ModelMessagesTypeAdapter.dump_json(self.model_messages).decode('utf-8')
-                await self.redis.set(self._get_model_redis_key(), model_messages_json)
+            await self.redis.replace_list(
+                self._get_redis_key(), *(msg.model_dump(mode="json") for msg in self.messages)
+            )
+            self._pending_trim = 0
+            self._needs_full_save = False
+            await self._save_model_messages()
 
             logger.debug(f"Conversation memory for session {self.session_id} saved to Redis.")
         except Exception as e:
             logger.error(f"Failed to save conversation memory to Redis for session {self.session_id}: {e}")
 
-    async def load_from_redis(self):
+    async def load_from_redis(self, trusted: bool = True):
+        """
+        Load conversation memory from Redis.
+
+        Args:
+            trusted: Skip Pydantic validation of stored messages. Only disable this
+                when the keys may have been written by something other than this class.
+        """
+        await self.flush()  # Don't drop queued writes when replacing local state
+        self._pending_trim = 0
         try:
-            # Load simple Message format
-            messages_data = await self.redis.get(self._get_redis_key())
+            # Fetch the simple Message list and the ModelMessage format concurrently
+            messages_data, model_messages_data = await asyncio.gather(
+                self._load_message_entries(),
+                self.redis.get(self._get_model_redis_key()),
+            )
+
+            # Load simple Message format; RedisClient deserializes each list entry
             if messages_data:
-                # RedisClient.get() returns deserialized Python objects if JSON is valid
-                # So messages_data could be either a string (JSON) or a list (already parsed)
-                if isinstance(messages_data, str):
-                    self.messages = self._message_adapter.validate_json(messages_data)
-                elif isinstance(messages_data, list):
-                    self.messages = self._message_adapter.validate_python(messages_data)
+                if trusted:
+                    self.messages = [_message_from_trusted(d) for d in messages_data]
                 else:
-                    logger.warning(f"Unexpected data type from Redis for session {self.session_id}: {type(messages_data)}")
-                    self.messages = []
+                    self.messages = MESSAGE_LIST_ADAPTER.validate_python(messages_data)
+                _fill_missing_token_counts(self.messages)
                 logger.debug(f"Conversation memory for session {self.session_id} loaded from Redis. {len(self.messages)} messages.")
             else:
                 self.messages = []
                 logger.debug(f"No conversation memory found in Redis for session {self.session_id}.")
 
             # Load ModelMessage format if available
-            model_messages_data = await self.redis.get(self._get_model_redis_key())
             if model_messages_data:
-                if isinstance(model_messages_data, str):
+                if isinstance(model_messages_data, (str, bytes)):
                     self.model_messages = list(ModelMessagesTypeAdapter.validate_json(model_messages_data))
                 elif isinstance(model_messages_data, list):
                     self.model_messages = list(ModelMessagesTypeAdapter.validate_python(model_messages_data))
@@ -250,14 +482,18 @@ class ConversationMemory:
             else:
                 self.model_messages = []
 
-        except (json.JSONDecodeError, ValidationError, TypeError) as e:
+            self._needs_full_save = False
+
+        except (json.JSONDecodeError, ValidationError, TypeError, KeyError, ValueError) as e:
             logger.error(f"Failed to load or parse conversation memory from Redis for session {self.session_id}: {e}")
             self.messages = []  # Clear messages on error to prevent corrupted state
             self.model_messages = []
+            self._needs_full_save = True  # Overwrite the unreadable data on the next write
         except Exception as e:
             logger.error(f"An unexpected error occurred while loading conversation memory for session {self.session_id}: {e}")
             self.messages = []  # Clear messages on error
             self.model_messages = []
+            self._needs_full_save = True
 
     async def clear(self):
         """
@@ -268,9 +504,17 @@ class ConversationMemory:
         """
         self.messages = []
         self.model_messages = []
-        try:
-            await self.redis.delete(self._get_redis_key())
-            await self.redis.delete(self._get_model_redis_key())
-            logger.debug(f"Conversation memory cleared for session {self.session_id}")
-        except Exception as e:
-            logger.error(f"Failed to clear conversation memory from Redis for session {self.session_id}: {e}")
+        self._pending_trim = 0
+        self._needs_full_save = False
+        self._unsaved_messages = []
+        self._model_messages_dirty = False
+        if self._scheduled_flush is not None:
+            self._scheduled_flush.cancel()
+            self._scheduled_flush = None
+        # Wait out any in-flight write so it can't land after the delete
+        async with self._write_lock:
+            try:
+                await self.redis.delete(self._get_redis_key(), self._get_model_redis_key())
+                logger.debug(f"Conversation memory cleared for session {self.session_id}")
+            except Exception as e:
+                logger.error(f"Failed to clear conversation memory from Redis for session {self.session_id}: {e}")
@@ -9,27 +9,39 @@ Provides LLM integration for Pydantic AI with multiple providers:
 """
 
 from src.core.models.lmstudio_provider import (
+    close_lmstudio_clients,
     create_lmstudio_model,
     create_lmstudio_model_async,
     detect_lmstudio_model,
+    get_lmstudio_client_stats,
     get_lmstudio_model,
     get_lmstudio_model_async,
     lmstudio_health_check,
     test_lmstudio_connection,
 )
 from src.core.models.providers import (
+    detect_all_models,
     get_model_provider,
     get_model_provider_async,
+    health_check_all,
+    provider_health_check,
+    warmup_providers,
 )
 
 __all__ = [
     # Provider factory (recommended)
     "get_model_provider",
     "get_model_provider_async",
+    "detect_all_models",
+    "health_check_all",
+    "provider_health_check",
+    "warmup_providers",
     # LM Studio specific
+    "close_lmstudio_clients",
     "create_lmstudio_model",
     "create_lmstudio_model_async",
     "detect_lmstudio_model",
+    "get_lmstudio_client_stats",
     "get_lmstudio_model",
     "get_lmstudio_model_async",
     "lmstudio_health_check",
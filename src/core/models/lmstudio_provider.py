@@ -9,34 +9,361 @@ This module provides integration with LM Studio's OpenAI-compatible API:
 - Configurable timeout and retry settings
 """
 
-from typing import Optional
+import asyncio
+import time
+import weakref
+from functools import lru_cache
+from typing import Any, Callable, Coroutine, Optional
 
 import httpx
+from pydantic import BaseModel
 from pydantic_ai.models.openai import OpenAIModel
 from pydantic_ai.providers.openai import OpenAIProvider
 
 from src.core.utils.config import LMStudioSettings, get_settings
-from src.core.utils.exceptions import ModelError
+from src.core.utils.exceptions import (
+    ModelError,
+    PermanentProviderError,
+    TransientProviderError,
+)
 from src.core.utils.logging import get_logger_with_context
 
 logger = get_logger_with_context()
 
+# Connection pool limits for the shared LM Studio HTTP clients
+HTTP_POOL_LIMITS = httpx.Limits(max_connections=32, max_keepalive_connections=8)
+
+# Most /models probes in flight at once across all callers, so a burst of
+# requests each kicking off a check can't swamp a small local server
+MAX_CONCURRENT_PROBES = 8
+
+# Shared clients keyed by (base_url, api_key, timeout), so repeated probes reuse
+# pooled keep-alive connections instead of opening a new one per call, and the
+# Authorization header is built once per client rather than per request. HTTP/2 is
+# negotiated over TLS (ALPN), so https endpoints multiplex concurrent probes on
+# one connection; plain http endpoints stay on HTTP/1.1.
+#
+# Clients and the probe semaphore are held per event loop: both belong to the
+# loop they were first used on, and reusing them after asyncio.run() returns
+# fails with "Event loop is closed". Entries are dropped along with their loop.
+_ClientKey = tuple[str, str, int]
+_http_clients: weakref.WeakKeyDictionary[
+    asyncio.AbstractEventLoop, dict[_ClientKey, httpx.AsyncClient]
+] = weakref.WeakKeyDictionary()
+_probe_semaphores: weakref.WeakKeyDictionary[
+    asyncio.AbstractEventLoop, asyncio.Semaphore
+] = weakref.WeakKeyDictionary()
+
+
+def _loop_clients() -> dict[_ClientKey, httpx.AsyncClient]:
+    """Get the shared clients belonging to the running event loop."""
+    return _http_clients.setdefault(asyncio.get_running_loop(), {})
+
+
+def _get_probe_semaphore() -> asyncio.Semaphore:
+    """Get the probe semaphore belonging to the running event loop."""
+    loop = asyncio.get_running_loop()
+    semaphore = _probe_semaphores.get(loop)
+    if semaphore is None:
+        semaphore = _probe_semaphores[loop] = asyncio.Semaphore(MAX_CONCURRENT_PROBES)
+    return semaphore
+
+
+class _PoolStats:
+    """Counters showing whether an endpoint's pooled connections are reused."""
+
+    __slots__ = ("requests", "connections_opened", "total_seconds")
+
+    def __init__(self) -> None:
+        self.requests = 0
+        self.connections_opened = 0
+        self.total_seconds = 0.0
+
+    def as_dict(self) -> dict[str, float]:
+        reused = self.requests - self.connections_opened
+        return {
+            "requests": self.requests,
+            "connections_opened": self.connections_opened,
+            "reuse_rate": reused / self.requests if self.requests else 0.0,
+            "avg_latency_ms": (
+                self.total_seconds * 1000 / self.requests if self.requests else 0.0
+            ),
+        }
+
+
+# base_url -> connection pool stats, across all event loops
+_pool_stats: dict[str, _PoolStats] = {}
+
+
+class _MeteredTransport(httpx.AsyncHTTPTransport):
+    """HTTP transport that records pool reuse and latency for one endpoint.
+
+    A request that opens a TCP connection (seen through httpcore's trace
+    extension) counts as a pool miss; any other request reused a connection.
+    Latency is measured up to the response headers. An upgrade that silently
+    disables keep-alive shows up as a reuse rate near zero.
+    """
+
+    def __init__(self, stats: _PoolStats, **kwargs: Any) -> None:
+        super().__init__(**kwargs)
+        self._stats = stats
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        stats = self._stats
+        outer_trace = request.extensions.get("trace")
+        opened = False
+
+        async def trace(event_name: str, info: dict[str, Any]) -> None:
+            nonlocal opened
+            if event_name == "connection.connect_tcp.started":
+                opened = True
+            if outer_trace is not None:
+                await outer_trace(event_name, info)
+
+        request.extensions["trace"] = trace
+        start = time.perf_counter()
+        response = await super().handle_async_request(request)
+        stats.total_seconds += time.perf_counter() - start
+        stats.requests += 1
+        if opened:
+            stats.connections_opened += 1
+        return response
+
+
+def get_lmstudio_client_stats() -> dict[str, dict[str, float]]:
+    """Report connection reuse for the shared LM Studio HTTP clients.
+
+    Returns:
+        base_url -> ``requests``, ``connections_opened``, ``reuse_rate``
+        (share of requests served on an already-open connection) and
+        ``avg_latency_ms``
+
+    Example:
+        ```python
+        stats = get_lmstudio_client_stats()
+        # {"http://localhost:1234/v1": {"requests": 40, "connections_opened": 1,
+        #                               "reuse_rate": 0.975, "avg_latency_ms": 3.1}}
+        ```
+    """
+    return {base_url: stats.as_dict() for base_url, stats in _pool_stats.items()}
+
+
+def _get_client(base_url: str, api_key: str, timeout: int) -> httpx.AsyncClient:
+    """Get the shared HTTP client for an LM Studio endpoint, creating it on first use.
+
+    Must be called from a coroutine, since clients are per event loop.
+    """
+    clients = _loop_clients()
+    key = (base_url, api_key, timeout)
+    client = clients.get(key)
+    # No await between lookup and insert, so concurrent callers can't race here
+    if client is None or client.is_closed:
+        stats = _pool_stats.get(base_url)
+        if stats is None:
+            stats = _pool_stats[base_url] = _PoolStats()
+        client = httpx.AsyncClient(
+            timeout=timeout,
+            transport=_MeteredTransport(stats, limits=HTTP_POOL_LIMITS, http2=True),
+            headers={"Authorization": f"Bearer {api_key}"},
+        )
+        clients[key] = client
+    return client
+
+
+# (base_url, api_key, model_name) -> model; OpenAIModel/OpenAIProvider hold no
+# per-request state, so one instance per endpoint and model can be shared
+_model_cache: dict[tuple[str, str, str], OpenAIModel] = {}
+
+# Seconds a detected model ID is reused before /models is queried again
+DETECT_CACHE_TTL = 60.0
+
+# base_url -> (monotonic time detected, model ID)
+_detected_models: dict[str, tuple[float, str]] = {}
+
+# (base_url, api_key) -> /models fetch in flight, shared by concurrent detections
+_detect_fetches: dict[tuple[str, str], asyncio.Task] = {}
+
+# Seconds a health check result is reused before LM Studio is probed again
+HEALTH_CHECK_TTL = 5.0
+
+# base_url -> (monotonic time recorded, health check result)
+_health_cache: dict[str, tuple[float, dict[str, Any]]] = {}
+
+
+# base_url -> health probe in flight, shared by concurrent callers on a cache miss
+_health_probes: dict[str, asyncio.Task] = {}
+
+
+def _join_or_start(
+    inflight: dict[Any, asyncio.Task],
+    key: Any,
+    start: Callable[[], Coroutine[Any, Any, Any]],
+) -> asyncio.Task:
+    """Return the task in flight for key, starting one if there is none.
+
+    The entry is removed when the task finishes, so the next caller after that
+    starts a fresh one.
+    """
+    task = inflight.get(key)
+    if task is None:
+        task = asyncio.create_task(start())
+        inflight[key] = task
+        task.add_done_callback(
+            lambda done: inflight.pop(key, None) if inflight.get(key) is done else None
+        )
+    return task
+
+
+def _cache_health(base_url: str, health: dict[str, Any]) -> None:
+    _health_cache[base_url] = (time.monotonic(), health)
+
+
+def _cached_health(base_url: str) -> Optional[dict[str, Any]]:
+    """Return the cached health result for base_url if it's still within the TTL."""
+    cached = _health_cache.get(base_url)
+    if cached and time.monotonic() - cached[0] < HEALTH_CHECK_TTL:
+        return cached[1]
+    return None
+
+
+def _health_result(
+    base_url: str,
+    connected: bool = False,
+    model_id: Optional[str] = None,
+    error: Optional[str] = None,
+) -> dict[str, Any]:
+    """Build a health check result dict; ``error`` is only present on failure."""
+    health = {
+        "connected": connected,
+        "model_detected": model_id is not None,
+        "model_id": model_id,
+        "base_url": base_url,
+    }
+    if error is not None:
+        health["error"] = error
+    return health
+
+
+# Consecutive transient failures before an endpoint's circuit opens
+CIRCUIT_FAILURE_THRESHOLD = 3
+
+# Seconds an open circuit fails fast before letting one probe through; doubles
+# each time that probe fails, up to CIRCUIT_MAX_COOLDOWN
+CIRCUIT_COOLDOWN = 30.0
+CIRCUIT_MAX_COOLDOWN = 300.0
+
+
+class _CircuitBreaker:
+    """Fails fast while an LM Studio endpoint is known to be down.
+
+    Closed until CIRCUIT_FAILURE_THRESHOLD consecutive transient failures, then
+    open for the cooldown, then half-open: one probe is let through, and its
+    outcome either closes the circuit or re-opens it with a longer cooldown.
+    """
+
+    __slots__ = ("failures", "opened_at", "cooldown")
+
+    def __init__(self) -> None:
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self.cooldown = CIRCUIT_COOLDOWN
+
+    def allow(self) -> bool:
+        if self.opened_at is None:
+            return True
+        now = time.monotonic()
+        if now - self.opened_at >= self.cooldown:
+            # Half-open: restart the clock so concurrent callers keep failing
+            # fast while this probe is in flight
+            self.opened_at = now
+            return True
+        return False
+
+    def retry_in(self) -> float:
+        if self.opened_at is None:
+            return 0.0
+        return max(0.0, self.opened_at + self.cooldown - time.monotonic())
+
+    def record_success(self) -> None:
+        self.failures = 0
+        self.opened_at = None
+        self.cooldown = CIRCUIT_COOLDOWN
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        if self.opened_at is not None:
+            # The half-open probe failed
+            self.cooldown = min(self.cooldown * 2, CIRCUIT_MAX_COOLDOWN)
+            self.opened_at = time.monotonic()
+        elif self.failures >= CIRCUIT_FAILURE_THRESHOLD:
+            self.opened_at = time.monotonic()
+            logger.warning(
+                "LM Studio circuit opened", failures=self.failures, cooldown=self.cooldown
+            )
+
+
+# base_url -> circuit breaker
+_breakers: dict[str, _CircuitBreaker] = {}
+
+
+class _ModelEntry(BaseModel):
+    id: Optional[str] = None
+
+
+class _ModelsList(BaseModel):
+    """Projection of the /models response onto the only field detection reads.
+
+    Parsed straight from the response bytes; the rest of each entry's metadata
+    is skipped instead of being built into dicts.
+    """
+
+    data: list[_ModelEntry] = []
+
+
+@lru_cache(maxsize=32)
+def _models_url(base_url: str) -> str:
+    """Derive the /models endpoint URL once per base URL."""
+    return base_url.rstrip("/") + "/models"
+
+
+async def close_lmstudio_clients() -> None:
+    """Close the shared LM Studio HTTP clients of the running event loop.
+
+    Call this during application shutdown.
+    """
+    clients = _http_clients.pop(asyncio.get_running_loop(), {})
+    for client in clients.values():
+        await client.aclose()
+    for base_url, stats in get_lmstudio_client_stats().items():
+        logger.debug("LM Studio connection pool stats", url=base_url, **stats)
+
 
 async def detect_lmstudio_model(
-    base_url: str, api_key: str = "not-needed", timeout: int = 10
+    base_url: str,
+    api_key: str = "not-needed",
+    timeout: int = 10,
+    force_refresh: bool = False,
 ) -> Optional[str]:
     """Detect the currently loaded model in LM Studio.
 
+    A detected model ID is reused for DETECT_CACHE_TTL seconds per base URL.
+    "No models loaded" is not cached, so a freshly loaded model is picked up
+    on the next call.
+
     Args:
         base_url: LM Studio base URL (e.g., http://localhost:1234/v1)
         api_key: API key (not needed for LM Studio, but required by SDK)
         timeout: Request timeout in seconds
+        force_refresh: If True, always query the server
 
     Returns:
         Model ID of the first available model, or None if no models found
 
     Raises:
-        ModelError: If connection to LM Studio fails
+        TransientProviderError: On connection errors, timeouts, 5xx or 429, or
+            immediately while the endpoint's circuit breaker is open
+        PermanentProviderError: On any other 4xx response
+        ModelError: If the response can't be handled
 
     Example:
         ```python
@@ -45,52 +372,82 @@ async def detect_lmstudio_model(
         # Detected model: TheBloke/Llama-2-7B-Chat-GGUF
         ```
     """
-    try:
-        async with httpx.AsyncClient(timeout=timeout) as client:
-            # Construct models endpoint URL
-            models_url = base_url.rstrip("/") + "/models"
+    if not force_refresh:
+        cached = _detected_models.get(base_url)
+        if cached and time.monotonic() - cached[0] < DETECT_CACHE_TTL:
+            return cached[1]
+
+    # Concurrent callers share one request; a fetch already in flight is as
+    # fresh as a new one, so force_refresh callers join it too
+    fetch = _join_or_start(
+        _detect_fetches,
+        (base_url, api_key),
+        lambda: _fetch_lmstudio_model(base_url, api_key, timeout),
+    )
+    # Shielded so one caller being cancelled doesn't cancel the fetch for the rest
+    return await asyncio.shield(fetch)
 
-            logger.debug("Detecting LM Studio models", url=models_url)
 
-            # Make request to /v1/models endpoint
-            response = await client.get(
-                models_url, headers={"Authorization": f"Bearer {api_key}"}
-            )
-            response.raise_for_status()
+async def _fetch_lmstudio_model(base_url: str, api_key: str, timeout: int) -> Optional[str]:
+    """Query /models once, feeding the circuit breaker and the detection cache."""
+    models_url = _models_url(base_url)
+
+    breaker = _breakers.get(base_url)
+    if breaker is None:
+        breaker = _breakers[base_url] = _CircuitBreaker()
+    if not breaker.allow():
+        raise TransientProviderError(
+            "LM Studio circuit open, skipping probe",
+            model_name="lmstudio",
+            details={"url": base_url, "retry_in": round(breaker.retry_in(), 1)},
+        )
 
-            # Parse response
-            data = response.json()
-            models = data.get("data", [])
+    # Outside the try: the shared client is looked up, not built, on every call
+    # but the first, so the failure paths below only deal with the request
+    client = _get_client(base_url, api_key, timeout)
 
-            if not models:
-                logger.warning("No models found in LM Studio")
-                return None
+    logger.debug("Detecting LM Studio models", url=models_url)
 
-            # Return first model ID
-            model_id = models[0].get("id")
-            logger.info(
-                f"Detected LM Studio model: {model_id}", model_count=len(models)
-            )
-            return model_id
+    try:
+        # Make request to /v1/models endpoint
+        async with _get_probe_semaphore():
+            response = await client.get(models_url)
+        # Only pay for raise_for_status() off the common 200 path
+        if response.status_code != 200:
+            response.raise_for_status()
 
     except httpx.HTTPStatusError as e:
-        error_msg = f"HTTP error detecting LM Studio model: {e.response.status_code}"
+        status_code = e.response.status_code
+        error_msg = f"HTTP error detecting LM Studio model: {status_code}"
         logger.error(error_msg, error=str(e))
-        raise ModelError(
+        if status_code >= 500 or status_code == 429:
+            breaker.record_failure()
+            error_class = TransientProviderError
+        else:
+            # The server answered, so it's up even though the request was rejected
+            breaker.record_success()
+            error_class = PermanentProviderError
+        raise error_class(
             error_msg,
             model_name="lmstudio",
-            details={"status_code": e.response.status_code, "url": models_url},
+            details={"status_code": status_code, "url": models_url},
         )
 
     except httpx.RequestError as e:
         error_msg = f"Connection error detecting LM Studio model: {e}"
         logger.error(error_msg, error=str(e))
-        raise ModelError(
+        breaker.record_failure()
+        raise TransientProviderError(
             error_msg,
             model_name="lmstudio",
             details={"error": str(e), "url": base_url},
         )
 
+    breaker.record_success()
+
+    # Parse response
+    try:
+        models = _ModelsList.model_validate_json(response.content).data
     except Exception as e:
         error_msg = f"Unexpected error detecting LM Studio model: {e}"
         logger.error(error_msg, error=str(e))
@@ -98,6 +455,52 @@ async def detect_lmstudio_model(
             error_msg, model_name="lmstudio", details={"error": str(e)}
         )
 
+    if not models:
+        logger.warning("No models found in LM Studio")
+        return None
+
+    # Return first model ID
+    model_id = models[0].id
+    logger.info(
+        f"Detected LM Studio model: {model_id}", model_count=len(models)
+    )
+    if model_id:
+        _detected_models[base_url] = (time.monotonic(), model_id)
+    return model_id
+
+
+# Upper bound in seconds on a reachability ping; it needs no model list, so
+# there's no reason to wait out the full request timeout
+PING_TIMEOUT = 2.0
+
+
+async def _ping_lmstudio(base_url: str, api_key: str, timeout: int) -> None:
+    """Check that LM Studio answers at all, without downloading the model list.
+
+    Sends a HEAD to /models. Any response below 500 counts as reachable, since
+    a server that rejects HEAD is still up.
+
+    Raises:
+        TransientProviderError: If the server can't be reached or returns 5xx
+    """
+    models_url = _models_url(base_url)
+    client = _get_client(base_url, api_key, timeout)
+    try:
+        async with _get_probe_semaphore():
+            response = await client.head(models_url, timeout=min(timeout, PING_TIMEOUT))
+    except httpx.RequestError as e:
+        raise TransientProviderError(
+            f"Connection error reaching LM Studio: {e}",
+            model_name="lmstudio",
+            details={"error": str(e), "url": base_url},
+        )
+    if response.status_code >= 500:
+        raise TransientProviderError(
+            f"LM Studio returned {response.status_code}",
+            model_name="lmstudio",
+            details={"status_code": response.status_code, "url": models_url},
+        )
+
 
 async def test_lmstudio_connection(
     base_url: str, api_key: str = "not-needed", timeout: int = 10
@@ -115,12 +518,8 @@ async def test_lmstudio_connection(
     Raises:
         ModelError: If connection fails
     """
-    try:
-        model_id = await detect_lmstudio_model(base_url, api_key, timeout)
-        return model_id is not None
-
-    except ModelError:
-        raise
+    model_id = await detect_lmstudio_model(base_url, api_key, timeout, force_refresh=True)
+    return model_id is not None
 
 
 def create_lmstudio_model(
@@ -175,6 +574,12 @@ def create_lmstudio_model(
     # Use provided model name or default from settings
     final_model_name = model_name or lm_settings.model_name
 
+    # Keyed on resolved values, since settings objects may be rebuilt per call
+    cache_key = (lm_settings.base_url, lm_settings.api_key, final_model_name)
+    model = _model_cache.get(cache_key)
+    if model is not None:
+        return model
+
     # Create OpenAI provider configured for LM Studio endpoint
     # pydantic-ai 1.x requires using OpenAIProvider instead of passing base_url directly
     provider = OpenAIProvider(
@@ -194,6 +599,7 @@ def create_lmstudio_model(
         base_url=lm_settings.base_url,
     )
 
+    _model_cache[cache_key] = model
     return model
 
 
@@ -241,6 +647,7 @@ async def create_lmstudio_model_async(
         ```
     """
     lm_settings = settings or get_settings().lm_studio
+    detected = False
 
     # Auto-detect model if requested
     if auto_detect and model_name is None:
@@ -256,14 +663,25 @@ async def create_lmstudio_model_async(
             )
 
         model_name = detected_model
+        detected = True
 
-    # Test connection if requested
-    if test_connection:
-        logger.info("Testing LM Studio connection")
-        await test_lmstudio_connection(
-            lm_settings.base_url, lm_settings.api_key, lm_settings.timeout
+        # Detection already reached the server, so record it as a health result too
+        _cache_health(
+            lm_settings.base_url,
+            _health_result(lm_settings.base_url, connected=True, model_id=detected_model),
         )
 
+    # Test connection if requested, unless a successful detection in this call
+    # or a fresh health check already showed the server is reachable
+    if test_connection and not detected:
+        health = _cached_health(lm_settings.base_url)
+        if health is None or not health["connected"]:
+            logger.info("Testing LM Studio connection")
+            # The model is already named, so reachability is all that's needed
+            await _ping_lmstudio(
+                lm_settings.base_url, lm_settings.api_key, lm_settings.timeout
+            )
+
     # Create and return model
     return create_lmstudio_model(
         model_name=model_name, settings=lm_settings, auto_detect=False
@@ -340,11 +758,16 @@ async def get_lmstudio_model_async(
 
 async def lmstudio_health_check(
     settings: Optional[LMStudioSettings] = None,
-) -> dict[str, any]:
+    use_cache: bool = True,
+) -> dict[str, Any]:
     """Perform health check on LM Studio server.
 
+    Results are reused for HEALTH_CHECK_TTL seconds per base URL, so frequent
+    status polling doesn't turn into a probe per call.
+
     Args:
         settings: LM Studio configuration. If None, uses global settings.
+        use_cache: If False, always probe the server.
 
     Returns:
         Dictionary with health check results:
@@ -352,6 +775,7 @@ async def lmstudio_health_check(
         - model_detected: bool
         - model_id: str or None
         - base_url: str
+        - error: str, only if the check failed
 
     Example:
         ```python
@@ -363,27 +787,38 @@ async def lmstudio_health_check(
         ```
     """
     lm_settings = settings or get_settings().lm_studio
+    base_url = lm_settings.base_url
 
-    health = {
-        "connected": False,
-        "model_detected": False,
-        "model_id": None,
-        "base_url": lm_settings.base_url,
-    }
+    if use_cache:
+        cached = _cached_health(base_url)
+        if cached is not None:
+            return dict(cached)
 
+    # Join a probe that's already running rather than issuing a duplicate request
+    probe = _join_or_start(
+        _health_probes, base_url, lambda: _probe_lmstudio_health(lm_settings)
+    )
+
+    # Shielded so one caller being cancelled doesn't cancel the probe for the rest
+    health = await asyncio.shield(probe)
+    return dict(health)
+
+
+async def _probe_lmstudio_health(lm_settings: LMStudioSettings) -> dict[str, Any]:
+    """Probe LM Studio once and record the result in the health cache."""
     try:
+        # Health checks always ask the server; their own TTL cache covers repeats
         model_id = await detect_lmstudio_model(
-            lm_settings.base_url, lm_settings.api_key, lm_settings.timeout
+            lm_settings.base_url,
+            lm_settings.api_key,
+            lm_settings.timeout,
+            force_refresh=True,
         )
-
-        health["connected"] = True
-
-        if model_id:
-            health["model_detected"] = True
-            health["model_id"] = model_id
+        health = _health_result(lm_settings.base_url, connected=True, model_id=model_id or None)
 
     except Exception as e:
         logger.error("LM Studio health check failed", error=str(e))
-        health["error"] = str(e)
+        health = _health_result(lm_settings.base_url, error=str(e))
 
+    _cache_health(lm_settings.base_url, health)
     return health
@@ -4,12 +4,20 @@ This module provides a unified factory for creating LLM model instances,
 supporting multiple providers (OpenAI, LM Studio) with automatic selection.
 """
 
-from typing import Literal, Optional
+import asyncio
+from functools import lru_cache
+from typing import Any, Awaitable, Callable, Literal, Optional, get_args
 
 from pydantic_ai.models.openai import OpenAIModel
-
-from src.core.models.lmstudio_provider import create_lmstudio_model
-from src.core.utils.config import get_settings
+from pydantic_ai.providers.openai import OpenAIProvider
+
+from src.core.models import lmstudio_provider
+from src.core.models.lmstudio_provider import (
+    create_lmstudio_model,
+    detect_lmstudio_model,
+    lmstudio_health_check,
+)
+from src.core.utils.config import Settings, get_settings
 from src.core.utils.exceptions import ConfigurationError
 from src.core.utils.logging import get_logger_with_context
 
@@ -17,9 +25,28 @@ logger = get_logger_with_context()
 
 ProviderType = Literal["openai", "lmstudio", "auto"]
 
+# Provider names a model can be built for; "auto" resolves to one of these
+_CONCRETE_PROVIDERS: frozenset[str] = frozenset(get_args(ProviderType)) - {"auto"}
+
+# Concrete provider name -> model built and checked by warmup_providers at startup
+_prewarmed: dict[str, OpenAIModel] = {}
+
+# Settings instance the prewarmed models were built from; reload_settings()
+# replaces the instance, which invalidates them
+_prewarmed_settings: Optional[Settings] = None
+
+
+def _get_prewarmed(provider: str, settings: Settings) -> Optional[OpenAIModel]:
+    """Return the prewarmed model for provider if it was built from these settings."""
+    if settings is not _prewarmed_settings:
+        _prewarmed.clear()
+        return None
+    return _prewarmed.get(provider)
+
 
 def get_model_provider(
     provider: Optional[ProviderType] = None,
+    refresh: bool = False,
 ) -> OpenAIModel:
     """Get an LLM model instance based on provider configuration.
 
@@ -28,8 +55,12 @@ def get_model_provider(
     2. LLM__PROVIDER environment variable / settings
     3. Auto-detection based on available API keys
 
+    Models are shared: repeated calls with the same configuration return the
+    same instance, along with its pooled HTTP client.
+
     Args:
         provider: Override the configured provider. Options: 'openai', 'lmstudio', 'auto'
+        refresh: If True, drop shared models and build a new one
 
     Returns:
         Configured OpenAIModel instance (works for both OpenAI and LM Studio)
@@ -52,38 +83,54 @@ def get_model_provider(
         ```
     """
     settings = get_settings()
+    selected_provider = _select_provider(provider, settings)
 
-    # Determine which provider to use
-    selected_provider = provider or settings.llm.provider
+    logger.debug(f"Using LLM provider: {selected_provider}")
+
+    if refresh:
+        reset_provider_cache()
+    model = _get_prewarmed(selected_provider, settings)
+    if model is not None:
+        return model
+
+    return _PROVIDER_FACTORIES[selected_provider](settings)
 
+
+def _select_provider(provider: Optional[str], settings: Settings) -> str:
+    """Resolve an explicit or configured provider name, including 'auto'.
+
+    Raises:
+        ConfigurationError: If the provider is not supported
+    """
+    selected_provider = provider or settings.llm.provider
     if selected_provider == "auto":
-        selected_provider = _auto_detect_provider()
+        selected_provider = _auto_detect_provider(settings)
+    return _check_provider(selected_provider)
 
-    logger.info(f"Using LLM provider: {selected_provider}")
 
-    if selected_provider == "openai":
-        return _create_openai_model()
-    elif selected_provider == "lmstudio":
-        return _create_lmstudio_model()
-    else:
+def _check_provider(provider: str) -> str:
+    """Return provider if it's a concrete provider name, else raise ConfigurationError."""
+    if provider not in _CONCRETE_PROVIDERS:
         raise ConfigurationError(
-            f"Invalid LLM provider: {selected_provider}. "
+            f"Invalid LLM provider: {provider}. "
             "Must be 'openai', 'lmstudio', or 'auto'."
         )
+    return provider
 
 
-def _auto_detect_provider() -> str:
+def _auto_detect_provider(settings: Settings) -> str:
     """Auto-detect which provider to use based on available configuration.
 
     Priority:
     1. OpenAI if API key is configured
     2. LM Studio as fallback
 
+    Args:
+        settings: Already-resolved application settings
+
     Returns:
         Provider name: 'openai' or 'lmstudio'
     """
-    settings = get_settings()
-
     if settings.openai.api_key:
         logger.debug("Auto-detected provider: OpenAI (API key found)")
         return "openai"
@@ -92,58 +139,81 @@ def _auto_detect_provider() -> str:
     return "lmstudio"
 
 
-def _create_openai_model() -> OpenAIModel:
+def _create_openai_model(settings: Settings) -> OpenAIModel:
     """Create an OpenAI model instance.
 
+    Args:
+        settings: Already-resolved application settings
+
     Returns:
         Configured OpenAIModel instance
 
     Raises:
         ConfigurationError: If OpenAI API key is not configured
     """
-    settings = get_settings()
-
     if not settings.openai.api_key:
         raise ConfigurationError(
             "OpenAI API key not configured. "
             "Set OPENAI__API_KEY environment variable or use LM Studio instead."
         )
 
-    model = OpenAIModel(
-        settings.openai.model,
-        api_key=settings.openai.api_key,
-    )
+    return _build_openai_model(settings.openai.model, settings.openai.api_key)
+
+
+@lru_cache(maxsize=16)
+def _build_openai_model(model_name: str, api_key: str) -> OpenAIModel:
+    """Build an OpenAI model once per (model_name, api_key).
+
+    The model and its provider hold no per-request state, so sharing them keeps
+    one pooled HTTP client per configuration instead of one per call.
+    """
+    # pydantic-ai 1.x takes credentials through the provider, not the model
+    provider = OpenAIProvider(api_key=api_key)
+    model = OpenAIModel(model_name, provider=provider)
 
     logger.info(
         "Created OpenAI model",
-        model=settings.openai.model,
+        model=model_name,
     )
 
     return model
 
 
-def _create_lmstudio_model() -> OpenAIModel:
+def _create_lmstudio_model(settings: Settings) -> OpenAIModel:
     """Create an LM Studio model instance.
 
+    Args:
+        settings: Already-resolved application settings
+
     Returns:
         Configured OpenAIModel instance for LM Studio
     """
-    model = create_lmstudio_model(auto_detect=False)
+    model = create_lmstudio_model(settings=settings.lm_studio, auto_detect=False)
     return model
 
 
+# Concrete provider name -> model factory; "auto" is resolved before lookup
+_PROVIDER_FACTORIES: dict[str, Callable[[Settings], OpenAIModel]] = {
+    "openai": _create_openai_model,
+    "lmstudio": _create_lmstudio_model,
+}
+
+
 async def get_model_provider_async(
     provider: Optional[ProviderType] = None,
     test_connection: bool = False,
+    refresh: bool = False,
 ) -> OpenAIModel:
     """Async version of get_model_provider with optional connection testing.
 
     For LM Studio, this can auto-detect the loaded model and test the connection.
-    For OpenAI, this behaves the same as the sync version.
+    For OpenAI, this behaves the same as the sync version. A provider warmed up
+    by warmup_providers is returned as-is, since it was detected and tested then.
 
     Args:
         provider: Override the configured provider. Options: 'openai', 'lmstudio', 'auto'
         test_connection: If True, test connection for LM Studio (ignored for OpenAI)
+        refresh: If True, drop shared models and build a new one
 
     Returns:
         Configured OpenAIModel instance
@@ -157,24 +227,198 @@ async def get_model_provider_async(
         ```
     """
     settings = get_settings()
+    selected_provider = _select_provider(provider, settings)
 
-    # Determine which provider to use
-    selected_provider = provider or settings.llm.provider
+    logger.debug(f"Using LLM provider: {selected_provider}")
 
-    if selected_provider == "auto":
-        selected_provider = _auto_detect_provider()
-
-    logger.info(f"Using LLM provider: {selected_provider}")
-
-    if selected_provider == "openai":
-        return _create_openai_model()
-    elif selected_provider == "lmstudio":
-        if test_connection:
-            from src.core.models.lmstudio_provider import create_lmstudio_model_async
-            return await create_lmstudio_model_async(auto_detect=True, test_connection=True)
-        return _create_lmstudio_model()
-    else:
-        raise ConfigurationError(
-            f"Invalid LLM provider: {selected_provider}. "
-            "Must be 'openai', 'lmstudio', or 'auto'."
+    if refresh:
+        reset_provider_cache()
+    model = _get_prewarmed(selected_provider, settings)
+    if model is not None:
+        return model
+
+    if selected_provider == "lmstudio" and test_connection:
+        from src.core.models.lmstudio_provider import create_lmstudio_model_async
+        return await create_lmstudio_model_async(
+            settings=settings.lm_studio, auto_detect=True, test_connection=True
         )
+    return _PROVIDER_FACTORIES[selected_provider](settings)
+
+
+def reset_provider_cache() -> None:
+    """Forget memoized and prewarmed models, e.g. after settings change or in tests."""
+    _build_openai_model.cache_clear()
+    lmstudio_provider._model_cache.clear()
+    _prewarmed.clear()
+
+
+async def warmup_providers(provider: Optional[ProviderType] = None) -> bool:
+    """Build, detect and test the configured provider's model once at startup.
+
+    Later get_model_provider / get_model_provider_async calls for that provider
+    return the warmed model without repeating model detection or the
+    connection test.
+
+    Args:
+        provider: Override the configured provider. Options: 'openai', 'lmstudio', 'auto'
+
+    Returns:
+        True if the model was warmed up, False if creating it failed
+    """
+    global _prewarmed_settings
+    settings = get_settings()
+    selected_provider = _select_provider(provider, settings)
+
+    try:
+        # The provider isn't prewarmed yet, so this does the full detect and test
+        model = await get_model_provider_async(selected_provider, test_connection=True)
+    except Exception as e:
+        logger.warning(f"Could not warm up LLM provider {selected_provider}: {e}")
+        return False
+
+    if settings is not _prewarmed_settings:
+        _prewarmed.clear()
+        _prewarmed_settings = settings
+    _prewarmed[selected_provider] = model
+    logger.info(f"Warmed up LLM provider: {selected_provider}")
+    return True
+
+
+def _failed_health(error: str) -> dict[str, Any]:
+    """Build the health result for a provider that isn't usable."""
+    return {
+        "connected": False,
+        "model_detected": False,
+        "model_id": None,
+        "error": error,
+    }
+
+
+async def _openai_health_check(settings: Settings) -> dict[str, Any]:
+    """Report OpenAI as connected when an API key is configured (no network call)."""
+    if not settings.openai.api_key:
+        return _failed_health("OpenAI API key not configured")
+    return {
+        "connected": True,
+        "model_detected": True,
+        "model_id": settings.openai.model,
+    }
+
+
+async def _lmstudio_health_check(settings: Settings) -> dict[str, Any]:
+    return await lmstudio_health_check(settings.lm_studio)
+
+
+# Concrete provider name -> health check
+_PROVIDER_HEALTH_CHECKS: dict[str, Callable[[Settings], Awaitable[dict[str, Any]]]] = {
+    "openai": _openai_health_check,
+    "lmstudio": _lmstudio_health_check,
+}
+
+
+async def provider_health_check(
+    provider: Optional[ProviderType] = None,
+) -> dict[str, Any]:
+    """Check the configured (or given) provider's health.
+
+    Every provider reports the same shape, so callers read the result without
+    caring which provider produced it.
+
+    Args:
+        provider: Override the configured provider. Options: 'openai', 'lmstudio', 'auto'
+
+    Returns:
+        Health check result with ``connected``, ``model_detected``, ``model_id``,
+        and ``error`` when the provider isn't usable
+
+    Raises:
+        ConfigurationError: If the provider is not supported
+    """
+    settings = get_settings()
+    selected_provider = _select_provider(provider, settings)
+    return await _PROVIDER_HEALTH_CHECKS[selected_provider](settings)
+
+
+async def health_check_all() -> dict[str, dict[str, Any]]:
+    """Check every supported provider concurrently.
+
+    Total latency is that of the slowest check rather than the sum of all of
+    them. A check that raises is reported as disconnected with its error.
+
+    Returns:
+        Provider name -> health check result (``connected``, ``model_id``,
+        and ``error`` when the check failed)
+
+    Example:
+        ```python
+        from src.core.models.providers import health_check_all
+
+        for name, health in (await health_check_all()).items():
+            print(name, health["connected"])
+        ```
+    """
+    settings = get_settings()
+    names = list(_PROVIDER_HEALTH_CHECKS)
+    results = await asyncio.gather(
+        *(_PROVIDER_HEALTH_CHECKS[name](settings) for name in names),
+        return_exceptions=True,
+    )
+
+    health: dict[str, dict[str, Any]] = {}
+    for name, result in zip(names, results):
+        if isinstance(result, Exception):
+            logger.error(f"{name} health check failed", error=str(result))
+            result = _failed_health(str(result))
+        health[name] = result
+    return health
+
+
+async def _detect_openai_model(settings: Settings) -> Optional[str]:
+    """OpenAI has no loaded model to detect; report the configured one if usable."""
+    return settings.openai.model if settings.openai.api_key else None
+
+
+async def _detect_lmstudio_model(settings: Settings) -> Optional[str]:
+    lm_settings = settings.lm_studio
+    return await detect_lmstudio_model(
+        lm_settings.base_url, lm_settings.api_key, lm_settings.timeout
+    )
+
+
+# Concrete provider name -> model detection
+_PROVIDER_MODEL_DETECTORS: dict[str, Callable[[Settings], Awaitable[Optional[str]]]] = {
+    "openai": _detect_openai_model,
+    "lmstudio": _detect_lmstudio_model,
+}
+
+
+async def detect_all_models() -> dict[str, Optional[str]]:
+    """Detect the model available from every supported provider concurrently.
+
+    A provider whose detection fails is logged and reported as None rather
+    than cancelling the other detections.
+
+    Returns:
+        Provider name -> detected model ID, or None
+
+    Example:
+        ```python
+        from src.core.models.providers import detect_all_models
+
+        models = await detect_all_models()
+        # {"openai": "gpt-4o", "lmstudio": None}
+        ```
+    """
+    settings = get_settings()
+
+    async def detect(name: str) -> Optional[str]:
+        try:
+            return await _PROVIDER_MODEL_DETECTORS[name](settings)
+        except Exception as e:
+            logger.warning(f"Model detection failed for {name}: {e}")
+            return None
+
+    async with asyncio.TaskGroup() as tg:
+        tasks = {name: tg.create_task(detect(name)) for name in _PROVIDER_MODEL_DETECTORS}
+
+    return {name: task.result() for name, task in tasks.items()}
@@ -43,3 +43,15 @@ class ChatResponse(BaseResponse):
     """
     content: str = Field(description="The textual response content")
     role: str = Field(default="assistant", description="The role of the responder")
+
+
+def chat_response(content: str, role: str = "assistant") -> StandardResponse[ChatResponse]:
+    """
+    Wrap agent-produced chat content in a StandardResponse.
+
+    Built with model_construct, skipping validation: the fields are plain
+    strings the agent produced itself, and streaming builds one per chunk.
+    """
+    return StandardResponse.model_construct(
+        data=ChatResponse.model_construct(content=content, role=role)
+    )
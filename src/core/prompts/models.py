@@ -1,11 +1,17 @@
-from pydantic import BaseModel, Field
-from typing import Dict, List, Any, Optional
+import sys
+
+from pydantic import BaseModel, ConfigDict, Field, PrivateAttr, field_validator
+from typing import Dict, FrozenSet, List, Any, Optional, Tuple
 
 class PromptTemplate(BaseModel):
     """
     Pydantic model for a prompt template.
     Defines the structure of a YAML-based prompt.
+
+    Frozen, since loaded templates are shared by every caller of the registry.
     """
+    model_config = ConfigDict(frozen=True)
+
     name: str = Field(..., description="Unique name for the prompt template")
     version: str = Field("1.0.0", description="Version of the prompt template")
     template: str = Field(..., description="The Jinja2 template string for the prompt")
@@ -14,3 +20,43 @@ class PromptTemplate(BaseModel):
     output_variables: Dict[str, Any] = Field(default_factory=dict, description="Expected output structure or variables")
     tags: List[str] = Field(default_factory=list, description="Tags for categorization")
     metadata: Dict[str, Any] = Field(default_factory=dict, description="Additional arbitrary metadata")
+    trusted: bool = Field(False, description="Render without the Jinja2 sandbox; only for templates shipped with the app")
+
+    # Derived from input_variables once, so rendering doesn't re-read each variable's spec
+    _required_variables: Tuple[str, ...] = PrivateAttr(default=())
+    _variable_defaults: Dict[str, Any] = PrivateAttr(default_factory=dict)
+    _variable_names: FrozenSet[str] = PrivateAttr(default=frozenset())
+
+    @field_validator("tags")
+    @classmethod
+    def intern_tags(cls, v: List[str]) -> List[str]:
+        # The same few tags repeat across templates; share one string per value
+        return [sys.intern(tag) for tag in v]
+
+    def model_post_init(self, __context: Any) -> None:
+        required = []
+        defaults = {}
+        for var_name, var_info in self.input_variables.items():
+            spec = var_info if isinstance(var_info, dict) else {}
+            if spec.get("required", True):
+                required.append(var_name)
+            elif "default" in spec:
+                defaults[var_name] = spec["default"]
+        self._required_variables = tuple(required)
+        self._variable_defaults = defaults
+        self._variable_names = frozenset(self.input_variables)
+
+    @property
+    def required_variables(self) -> Tuple[str, ...]:
+        """Input variables that must be passed to render, in declaration order."""
+        return self._required_variables
+
+    @property
+    def variable_defaults(self) -> Dict[str, Any]:
+        """Defaults for optional input variables that declare one."""
+        return self._variable_defaults
+
+    @property
+    def variable_names(self) -> FrozenSet[str]:
+        """Names of all declared input variables."""
+        return self._variable_names
@@ -1,10 +1,14 @@
+import asyncio
 import os
 import re
+import threading
 import yaml
-from typing import Dict, Optional, Any, Tuple
-from functools import lru_cache
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, Iterator, List, Optional, Any, Tuple
 
 from jinja2 import Environment, FileSystemLoader, Template, StrictUndefined
+from jinja2.bccache import BytecodeCache, FileSystemBytecodeCache
 from jinja2.exceptions import TemplateError
 from jinja2.sandbox import SandboxedEnvironment
 from jinja2 import Template
@@ -13,19 +17,28 @@ from src.core.prompts.models import PromptTemplate
 from src.core.utils.logging import logger
 from src.core.utils.exceptions import ConfigurationError, ValidationError, MAIException, ResourceNotFoundError
 
+try:
+    # libyaml's C parser, when PyYAML was built with it
+    from yaml import CSafeLoader as _YamlLoader
+except ImportError:  # pragma: no cover
+    from yaml import SafeLoader as _YamlLoader
+
 
 # Define a stricter sandbox for Jinja2 to prevent template injection
 class SecureSandbox(SandboxedEnvironment):
+    # Checked on every attribute access while rendering, so kept as frozensets
+    SAFE_DICT_ATTRIBUTES = frozenset(['get', 'keys', 'values', 'items', '__len__', '__str__', '__repr__'])
+    SAFE_ATTRIBUTES = frozenset(['__str__', '__repr__', '__len__', 'get', 'items', 'values', 'keys', 'split', 'join', 'strip', 'lower', 'upper', 'replace', 'find', 'count', 'startswith', 'endswith', 'isdigit', 'isalpha', 'isalnum', 'format'])
+    SAFE_CALLABLES = frozenset([range, dict, list, str, int, float, bool])
+
     def is_safe_attribute(self, obj, attr, insecure_call=None):
         # Explicitly control attribute access on dictionaries for security
         if isinstance(obj, dict):
             # Allow only a very limited set of safe methods on dicts if needed
-            if attr in ['get', 'keys', 'values', 'items', '__len__', '__str__', '__repr__']:
-                return True
-            return False # Disallow all other attribute access on dicts
+            return attr in self.SAFE_DICT_ATTRIBUTES # Disallow all other attribute access on dicts
         
         # Allow access to common safe attributes/methods for non-dict objects
-        if attr in ['__str__', '__repr__', '__len__', 'get', 'items', 'values', 'keys', 'split', 'join', 'strip', 'lower', 'upper', 'replace', 'find', 'count', 'startswith', 'endswith', 'isdigit', 'isalpha', 'isalnum', 'format']:
+        if attr in self.SAFE_ATTRIBUTES:
             return True
         
         # Allow access to built-in types methods generally considered safe
@@ -62,164 +75,339 @@ class SecureSandbox(SandboxedEnvironment):
 
     def is_safe_callable(self, obj):
         # Only allow explicitly whitelisted callables or very basic types
-        if obj in [range, dict, list, str, int, float, bool]:
-            return True
+        try:
+            if obj in self.SAFE_CALLABLES:
+                return True
+        except TypeError:
+            pass # Unhashable callable objects are never whitelisted
         # Also allow Jinja2's safe_range which wraps range
         if getattr(obj, '__name__', '') == 'safe_range':
             return True
         return False
 
 
+# Prompt file names of the form name_vX.Y.Z (without extension); \Z so a trailing newline can't match
+_VERSIONED_FILENAME_RE = re.compile(r"^(.+)_v(\d+\.\d+\.\d+)\Z")
+
+# Most rendered prompts kept by PromptManager.render_template
+_RENDER_CACHE_SIZE = 512
+
+# Threads used to read and compile prompt files in _load_prompts
+_LOAD_WORKERS = min(32, (os.cpu_count() or 1) * 4)
+
+
+def _iter_prompt_files(root: str) -> Iterator[os.DirEntry]:
+    """
+    Yields a DirEntry for every YAML file under root, breadth-first.
+    Uses os.scandir so file type checks reuse the directory listing instead of
+    a stat per file. Like os.walk, symlinked directories are not descended into.
+    """
+    pending = deque([root])
+    while pending:
+        with os.scandir(pending.popleft()) as entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    pending.append(entry.path)
+                elif entry.name.endswith((".yaml", ".yml")) and entry.is_file():
+                    yield entry
+
+
+def _read_file(path: str) -> bytes:
+    """
+    Reads a whole file with one read call in the usual case, sized from fstat, rather than
+    a buffered file object's read-until-EOF loop. Falls back to chunked reads if the file
+    grew since the fstat.
+    """
+    fd = os.open(path, os.O_RDONLY | getattr(os, "O_BINARY", 0))
+    try:
+        size = os.fstat(fd).st_size
+        # One byte past the expected end tells a complete read from a file that grew
+        data = os.read(fd, size + 1)
+        if len(data) <= size:
+            return data
+        chunks = [data]
+        while chunk := os.read(fd, 65536):
+            chunks.append(chunk)
+        return b"".join(chunks)
+    finally:
+        os.close(fd)
+
+
+def _make_bytecode_cache(cache_dir: Optional[str], pattern: str = "__mai_prompt_%s.cache") -> Optional[BytecodeCache]:
+    """
+    Creates the on-disk cache for compiled prompt templates, or returns None if no
+    usable cache directory is available (prompts are then compiled on every load).
+    """
+    try:
+        if cache_dir is not None:
+            os.makedirs(cache_dir, exist_ok=True)
+        # A prompt-specific pattern so entries never collide with other Jinja2 users of the directory
+        return FileSystemBytecodeCache(cache_dir, pattern=pattern)
+    except (OSError, RuntimeError) as e:
+        logger.warning(f"Prompt bytecode cache disabled: {e}")
+        return None
+
+
+class _RenderPlan:
+    """
+    A loaded prompt's variable specs and compiled template as plain slot attributes,
+    so rendering doesn't go through pydantic's private-attribute lookup on every call.
+    """
+    __slots__ = ("required", "defaults", "allowed", "template")
+
+    def __init__(self, prompt_template: PromptTemplate, compiled_template: Template):
+        self.required = prompt_template.required_variables
+        self.defaults = prompt_template.variable_defaults
+        self.allowed = prompt_template.variable_names
+        self.template = compiled_template
+
+
 class PromptManager:
     _instance: Optional["PromptManager"] = None
     _is_initialized: bool = False
+    # Serializes creating and initializing the singleton, e.g. aload's worker thread racing
+    # a first use. Reentrant because reload_prompts re-runs __init__ on the same instance.
+    _construction_lock = threading.RLock()
 
     def __new__(cls, *args, **kwargs):
-        if cls._instance is None:
-            cls._instance = super().__new__(cls)
-        return cls._instance
+        with cls._construction_lock:
+            if cls._instance is None:
+                cls._instance = super().__new__(cls)
+            return cls._instance
 
-    def __init__(self, prompt_dir: str = "config/prompts"):
+    def __init__(self, prompt_dir: str = "config/prompts", bytecode_cache_dir: Optional[str] = None):
         if self._is_initialized:
             return
+        with self._construction_lock:
+            if self._is_initialized:
+                return  # Initialized by another thread while this one waited
 
-        self.prompt_dir = prompt_dir
-        # Store both PromptTemplate model and compiled Jinja2 Template
-        self.templates: Dict[Tuple[str, str], Tuple[PromptTemplate, Template]] = {}  # Key: (name, version)
+            self.prompt_dir = prompt_dir
+            # Where compiled templates are cached between runs; None uses a per-user temp directory
+            self.bytecode_cache_dir = bytecode_cache_dir
+            # Store both PromptTemplate model and compiled Jinja2 Template
+            self.templates: Dict[Tuple[str, str], Tuple[PromptTemplate, Template]] = {}  # Key: (name, version)
+            # Rendered prompts, most recently used last; key: (name, version, sorted (variable, type, value))
+            self._render_cache: "OrderedDict[Tuple, str]" = OrderedDict()
+            # What render_template needs per prompt, kept in step with self.templates
+            self._render_plans: Dict[Tuple[str, str], _RenderPlan] = {}
         
-        # Initialize SecureSandbox without a FileSystemLoader, as we compile from strings
-        self.jinja_env = SecureSandbox(
-            trim_blocks=True,
-            lstrip_blocks=True,
-            autoescape=False, # We don't want autoescaping for LLM prompts, assume content is clean
-            undefined=StrictUndefined, # Use StrictUndefined to raise errors for undefined variables
-        )
-        self._load_prompts()
-        self._is_initialized = True
-        logger.info(f"PromptManager initialized. Loaded {len(self.templates)} prompt templates.")
+            # Initialize SecureSandbox without a FileSystemLoader, as we compile from strings
+            self.jinja_env = SecureSandbox(
+                trim_blocks=True,
+                lstrip_blocks=True,
+                autoescape=False, # We don't want autoescaping for LLM prompts, assume content is clean
+                undefined=StrictUndefined, # Use StrictUndefined to raise errors for undefined variables
+                bytecode_cache=_make_bytecode_cache(bytecode_cache_dir),
+            )
+            # Plain environment for prompts marked `trusted: true`, skipping the sandbox's per-attribute
+            # checks. Sandboxed and plain environments compile different code, so their caches are separate.
+            self.jinja_env_fast = Environment(
+                trim_blocks=True,
+                lstrip_blocks=True,
+                autoescape=False,
+                undefined=StrictUndefined,
+                bytecode_cache=_make_bytecode_cache(bytecode_cache_dir, pattern="__mai_prompt_trusted_%s.cache"),
+            )
+            self._load_prompts()
+            self._is_initialized = True
+            logger.info(f"PromptManager initialized. Loaded {len(self.templates)} prompt templates.")
 
     def _load_prompts(self):
         """Loads all YAML prompt templates from the configured directory."""
         self.templates.clear()
+        self._render_plans.clear()
+        self._render_cache.clear()
+        file_paths = self._list_prompt_files()
+        if not file_paths:
+            return
+
+        # Reading and parsing are independent per file, so overlap them across
+        # threads; results are merged here in scan order, as before
+        with ThreadPoolExecutor(max_workers=min(_LOAD_WORKERS, len(file_paths))) as executor:
+            self._merge_prompts(file_paths, executor.map(self._parse_prompt_file, file_paths))
+
+    async def aload_prompts(self):
+        """
+        Reloads all YAML prompt templates without blocking the event loop.
+
+        The directory scan and each file's parse run on worker threads; the loaded
+        templates replace the current ones in a single step once all are parsed.
+        """
+        file_paths = await asyncio.to_thread(self._list_prompt_files)
+        results = await asyncio.gather(
+            *(asyncio.to_thread(self._parse_prompt_file, file_path) for file_path in file_paths)
+        )
+        self.templates.clear()
+        self._render_plans.clear()
+        self._render_cache.clear()
+        self._merge_prompts(file_paths, results)
+
+    def _list_prompt_files(self) -> List[str]:
         if not os.path.exists(self.prompt_dir):
             raise ConfigurationError(f"Prompt directory not found: {self.prompt_dir}")
+        return [entry.path for entry in _iter_prompt_files(self.prompt_dir)]
+
+    def _merge_prompts(self, file_paths: List[str], results: Iterable[Optional[Tuple]]):
+        for file_path, loaded in zip(file_paths, results):
+            if loaded is None:
+                continue
+            key, template_pair = loaded
+            if key in self.templates:
+                logger.warning(f"Duplicate prompt template found: {key[0]} v{key[1]}. Overwriting with {file_path}.")
+            self.templates[key] = template_pair # Store both
+            self._render_plans[key] = _RenderPlan(*template_pair)
+            logger.debug(f"Loaded prompt template: {key[0]} v{key[1]} from {file_path}")
+
+    def _parse_prompt_file(self, file_path: str) -> Optional[Tuple[Tuple[str, str], Tuple[PromptTemplate, Template]]]:
+        """
+        Reads, validates and compiles one prompt file.
+        Returns ((name, version), (PromptTemplate, compiled Template)), or None if the file
+        can't be loaded. Runs on loader threads, so it doesn't touch self.templates.
+        """
+        try:
+            # Bytes go straight to the parser, which detects the encoding itself
+            prompt_data = yaml.load(_read_file(file_path), Loader=_YamlLoader)
+
+            if not isinstance(prompt_data, dict):
+                logger.warning(f"Skipping malformed prompt file {file_path}: not a dictionary.")
+                return None
+
+            # --- Determine name and version ---
+            explicit_name = prompt_data.get("name")
+            explicit_version = prompt_data.get("version")
+
+            # Try to infer from filename if not explicit
+            inferred_name = None
+            inferred_version = None
+
+            relative_path_base = os.path.relpath(file_path, self.prompt_dir)
+            filename_without_ext = os.path.splitext(relative_path_base)[0]
+
+            # Pattern for name_vX.Y.Z.yaml
+            match = _VERSIONED_FILENAME_RE.match(filename_without_ext)
+            if match:
+                inferred_name = match.group(1).replace(os.sep, "/")
+                inferred_version = match.group(2)
+            else:
+                # Fallback to using full path as name if no explicit name or versioned filename
+                inferred_name = filename_without_ext.replace(os.sep, "/")
+
+            name = explicit_name or inferred_name
+            version = explicit_version or inferred_version or "1.0.0" # Default if nothing found
+
+            # Update prompt_data with determined name/version
+            prompt_data["name"] = name
+            prompt_data["version"] = version
+
+            prompt_template = PromptTemplate(**prompt_data)
+
+            # Compile Jinja2 template from the template string
+            compiled_template = self._compile_template(prompt_template, file_path)
+
+            return (prompt_template.name, prompt_template.version), (prompt_template, compiled_template)
+        except yaml.YAMLError as e:
+            logger.error(f"Error parsing YAML file {file_path}: {e}")
+        except ValidationError as e:
+            logger.error(f"Validation error for prompt in {file_path}: {e}")
+        except Exception as e:
+            logger.error(f"Unexpected error loading prompt from {file_path}: {e}")
+        return None
+
+    def _env_for(self, prompt_template: PromptTemplate) -> Environment:
+        """Returns the Jinja2 environment a prompt is compiled in: plain if trusted, else sandboxed."""
+        return self.jinja_env_fast if prompt_template.trusted else self.jinja_env
+
+    def _compile_template(self, prompt_template: PromptTemplate, file_path: str) -> Template:
+        """
+        Compiles a prompt's template string, reusing the compiled code from the bytecode cache
+        when this prompt's source is unchanged since it was last compiled.
+        Mirrors what Jinja2's loaders do, which from_string skips.
+        """
+        env = self._env_for(prompt_template)
+        source = prompt_template.template
+        # Stable across checkouts and working directories, unlike the file path; also the
+        # template's name in Jinja2 errors, with the file path as its filename
+        template_name = f"{prompt_template.name}@{prompt_template.version}"
+        bytecode_cache = env.bytecode_cache
+        if bytecode_cache is None:
+            return env.template_class.from_code(
+                env, env.compile(source, template_name, file_path), env.make_globals(None), None
+            )
+
+        # The bucket only holds code if the source checksum matches
+        bucket = bytecode_cache.get_bucket(env, template_name, None, source)
+        if bucket.code is None:
+            bucket.code = env.compile(source, template_name, file_path)
+            try:
+                bytecode_cache.set_bucket(bucket)
+            except OSError as e:
+                logger.debug(f"Could not cache compiled prompt {file_path}: {e}")
+        return env.template_class.from_code(env, bucket.code, env.make_globals(None), None)
 
-        for root, _, files in os.walk(self.prompt_dir):
-            for file in files:
-                if file.endswith((".yaml", ".yml")):
-                    file_path = os.path.join(root, file)
-                    try:
-                        with open(file_path, "r", encoding="utf-8") as f:
-                            prompt_data = yaml.safe_load(f)
-                            
-                            if not isinstance(prompt_data, dict):
-                                logger.warning(f"Skipping malformed prompt file {file_path}: not a dictionary.")
-                                continue
-                            
-                            # --- Determine name and version ---
-                            explicit_name = prompt_data.get("name")
-                            explicit_version = prompt_data.get("version")
-
-                            # Try to infer from filename if not explicit
-                            inferred_name = None
-                            inferred_version = None
-                            
-                            relative_path_base = os.path.relpath(file_path, self.prompt_dir)
-                            filename_without_ext = os.path.splitext(relative_path_base)[0]
-                            
-                            # Pattern for name_vX.Y.Z.yaml
-                            match = re.match(r"^(.*)_v(\d+\.\d+\.\d+)$", filename_without_ext)
-                            if match:
-                                inferred_name = match.group(1).replace(os.sep, "/")
-                                inferred_version = match.group(2)
-                            else:
-                                # Fallback to using full path as name if no explicit name or versioned filename
-                                inferred_name = filename_without_ext.replace(os.sep, "/")
-
-                            name = explicit_name or inferred_name
-                            version = explicit_version or inferred_version or "1.0.0" # Default if nothing found
-
-                            # Update prompt_data with determined name/version
-                            prompt_data["name"] = name
-                            prompt_data["version"] = version
-                            
-                            prompt_template = PromptTemplate(**prompt_data)
-                            
-                            # Compile Jinja2 template from the template string
-                            compiled_template = self.jinja_env.from_string(prompt_template.template)
-
-                            key = (prompt_template.name, prompt_template.version)
-                            if key in self.templates:
-                                logger.warning(f"Duplicate prompt template found: {name} v{prompt_template.version}. Overwriting with {file_path}.")
-                            self.templates[key] = (prompt_template, compiled_template) # Store both
-                            logger.debug(f"Loaded prompt template: {name} v{prompt_template.version} from {file_path}")
-                    except yaml.YAMLError as e:
-                        logger.error(f"Error parsing YAML file {file_path}: {e}")
-                    except ValidationError as e:
-                        logger.error(f"Validation error for prompt in {file_path}: {e}")
-                    except Exception as e:
-                        logger.error(f"Unexpected error loading prompt from {file_path}: {e}")
-
-    @lru_cache(maxsize=128)
     def get_template(self, name: str, version: str = "1.0.0") -> PromptTemplate:
-        """Retrieves a prompt template by name and version."""
-        key = (name, version)
-        template_pair = self.templates.get(key)
-        if not template_pair:
-            # Attempt to reload prompts if not found, in case new prompts were added
-            self._load_prompts()
-            template_pair = self.templates.get(key)
-            if not template_pair:
-                raise ResourceNotFoundError(f"Prompt template '{name}' version '{version}' not found.",
-                                            resource_type="PromptTemplate", resource_id=f"{name}@{version}")
+        """
+        Retrieves a prompt template by name and version.
+        Prompts added on disk after loading are picked up by reload_prompts(), not by lookups.
+        """
+        template_pair = self.templates.get((name, version))
+        if template_pair is None:
+            raise self._not_found(name, version)
         return template_pair[0] # Return only the PromptTemplate model
 
+    @staticmethod
+    def _not_found(name: str, version: str) -> ResourceNotFoundError:
+        return ResourceNotFoundError(f"Prompt template '{name}' version '{version}' not found.",
+                                     resource_type="PromptTemplate", resource_id=f"{name}@{version}")
+
     def render_template(self, prompt_name: str, prompt_version: str = "1.0.0", **kwargs) -> str:
         """
         Renders a prompt template with the given variables.
         Performs validation of input variables.
         """
-        # Retrieve the PromptTemplate model and compiled Jinja2 Template
-        template_pair = self.templates.get((prompt_name, prompt_version))
-        if not template_pair:
-            # This case should ideally not be reached if get_template is called first
-            # but as a safeguard, try to get and compile the template
-            prompt_template_model = self.get_template(prompt_name, prompt_version)
-            compiled_template = self.jinja_env.from_string(prompt_template_model.template)
-            self.templates[(prompt_name, prompt_version)] = (prompt_template_model, compiled_template)
-            template_pair = (prompt_template_model, compiled_template)
-        
-        prompt_template_model, compiled_template = template_pair
+        # Retrieve the prompt's variable specs and compiled Jinja2 Template
+        plan = self._render_plans.get((prompt_name, prompt_version))
+        if plan is None:
+            raise self._not_found(prompt_name, prompt_version)
 
         # Validate input variables against the PromptTemplate model
-        # Create a mutable copy of kwargs to apply defaults
-        processed_kwargs = dict(kwargs)
-        missing_vars = []
-        for var_name, var_info in prompt_template_model.input_variables.items():
-            if var_name not in processed_kwargs:
-                if var_info.get("required", True):
-                    missing_vars.append(var_name)
-                elif "default" in var_info:
-                    processed_kwargs[var_name] = var_info["default"] # Apply default if missing and not required
-        
-        logger.debug(f"Prompt '{prompt_name}' v{prompt_version}: processed_kwargs={processed_kwargs}, missing_vars={missing_vars}")
-
+        missing_vars = [name for name in plan.required if name not in kwargs]
         if missing_vars:
             raise ValidationError(
                 f"Missing required input variables for prompt '{prompt_name}' v{prompt_version}: {', '.join(missing_vars)}",
                 details={"prompt_name": prompt_name, "version": prompt_version, "missing_variables": missing_vars}
             )
 
-        # Filter kwargs to only include expected input_variables
+        # Apply defaults for optional variables, then keep only expected input_variables.
         # This prevents unexpected variables from being passed to the template rendering,
         # which could expose sensitive data or cause unexpected behavior.
-        filtered_kwargs = {
-            k: v for k, v in processed_kwargs.items()
-            if k in prompt_template_model.input_variables
-        }
+        variable_names = plan.allowed
+        filtered_kwargs = dict(plan.defaults)
+        filtered_kwargs.update((k, v) for k, v in kwargs.items() if k in variable_names)
+
+        # Formatted by loguru only if debug logging is on, rather than repr-ing every variable per render
+        logger.debug("Prompt '{prompt_name}' v{prompt_version}: filtered_kwargs={filtered_kwargs}",
+                     prompt_name=prompt_name, prompt_version=prompt_version, filtered_kwargs=filtered_kwargs)
+
+        # Identical inputs render identically, so repeated prompts skip Jinja entirely
+        try:
+            # Value types are part of the key: 1, 1.0 and True are equal but render differently
+            cache_key = (prompt_name, prompt_version, tuple((k, type(v), v) for k, v in sorted(filtered_kwargs.items())))
+            hash(cache_key)
+        except TypeError:
+            cache_key = None # Unhashable variable values; render without caching
+        if cache_key is not None:
+            cached = self._render_cache.get(cache_key)
+            if cached is not None:
+                self._render_cache.move_to_end(cache_key)
+                return cached
 
         try:
-            rendered_prompt = compiled_template.render(**filtered_kwargs)
+            rendered_prompt = plan.template.render(**filtered_kwargs)
+            if cache_key is not None:
+                self._render_cache[cache_key] = rendered_prompt
+                if len(self._render_cache) > _RENDER_CACHE_SIZE:
+                    self._render_cache.popitem(last=False)
             return rendered_prompt
         except TemplateError as e:
             logger.debug(f"Caught TemplateError in render_template for '{prompt_name}': {e}")
@@ -237,13 +425,46 @@ class PromptManager:
 
     def reload_prompts(self):
         """Clears cache and reloads all prompt templates."""
-        self.templates.clear()
-        # Clear caches for lru_cache decorated methods
-        self.get_template.cache_clear()
-        # render_template no longer has lru_cache
-        self._is_initialized = False # Force re-initialization to reload
-        self.__init__(self.prompt_dir)
+        with self._construction_lock:
+            self.templates.clear()
+            self._render_plans.clear()
+            self._render_cache.clear()
+            self._is_initialized = False # Force re-initialization to reload
+            self.__init__(self.prompt_dir, self.bytecode_cache_dir)
         logger.info("PromptManager reloaded all prompt templates.")
 
-# Initialize the manager as a singleton on import
-prompt_manager = PromptManager()
+class _LazyPromptManager:
+    """
+    Stands in for the PromptManager singleton until it's first used.
+
+    Building the manager walks the prompt directory and compiles every template, so it's
+    done on first attribute access instead of at import; callers that never touch prompts
+    don't pay for it.
+    """
+
+    def __init__(self):
+        self._manager: Optional[PromptManager] = None
+        self._lock = threading.Lock()
+
+    def _ensure_loaded(self) -> PromptManager:
+        manager = self._manager
+        if manager is None:
+            # Blocks only while another thread is still loading
+            with self._lock:
+                if self._manager is None:
+                    self._manager = PromptManager()
+                manager = self._manager
+        return manager
+
+    async def aload(self) -> PromptManager:
+        """Returns the manager, waiting for it on a worker thread rather than the event loop."""
+        if self._manager is not None:
+            return self._manager
+        return await asyncio.to_thread(self._ensure_loaded)
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._ensure_loaded(), name)
+
+
+# The manager singleton; the app loads it during startup, other callers on first use
+prompt_manager = _LazyPromptManager()
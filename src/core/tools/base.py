@@ -1,6 +1,8 @@
 
-from typing import Any, Callable, Optional, TypeVar, get_origin, get_args
+from types import UnionType
+from typing import Any, Callable, Dict, Optional, Tuple, Type, TypeVar, Union, get_origin, get_args
 from functools import wraps
+import copy
 import inspect # Import inspect for signature extraction
 import asyncio
 from inspect import iscoroutinefunction as _is_coroutine_function
@@ -17,12 +19,74 @@ ToolFunc = TypeVar("ToolFunc", bound=Callable[..., Any])
 logger = get_logger_with_context(module="tool_base")
 
 from src.core.tools.models import ToolMetadata
+
+# (model name, parameter signature) -> (parameters model, its JSON schema). Building a
+# Pydantic model and its schema is the bulk of decoration cost, so a tool decorated again
+# (module reloads, test fixtures) reuses it. The name is part of the key because the model
+# class names its tool in validation errors, so tools can't share one across signatures.
+_PARAMETERS_MODEL_CACHE: Dict[tuple, Tuple[Type[BaseModel], dict]] = {}
+
+# Return types whose results skip validation when already of exactly that type
+_PRIMITIVE_RETURN_TYPES = (str, int, float, bool, bytes)
+
+# Return type -> (root model, its JSON schema)
+_RETURN_MODEL_CACHE: Dict[Any, Tuple[Type[RootModel], dict]] = {}
+
+
+def _is_optional(annotation: Any) -> bool:
+    """Whether an annotation is Optional[X], Union[..., None] or X | None."""
+    return get_origin(annotation) in (Union, UnionType) and type(None) in get_args(annotation)
+
+
+def _parameters_model(model_name: str, param_fields: Dict[str, tuple]) -> Tuple[Type[BaseModel], dict]:
+    """
+    Gets the parameters model for a tool signature, building it on first use.
+
+    Returns the model and a copy of its JSON schema, so each caller's schema stays
+    independent. Signatures with unhashable annotations or defaults are built every time.
+    """
+    try:
+        # type(default) too: defaults of 1 and True are equal but validate differently
+        key = (model_name, *((n, t, type(d), d) for n, (t, d) in param_fields.items()))
+        cached = _PARAMETERS_MODEL_CACHE.get(key)
+    except TypeError:
+        key = cached = None
+
+    if cached is None:
+        model = create_model(model_name, **param_fields)
+        cached = (model, model.model_json_schema())
+        if key is not None:
+            _PARAMETERS_MODEL_CACHE[key] = cached
+
+    return cached[0], copy.deepcopy(cached[1])
+
+
+def _return_model(root_type: Any) -> Tuple[Type[RootModel], dict]:
+    """Gets the root model validating a tool's return type and a copy of its JSON schema."""
+    try:
+        cached = _RETURN_MODEL_CACHE.get(root_type)
+        hashable = True
+    except TypeError:
+        cached, hashable = None, False
+
+    if cached is None:
+        # Define a temporary RootModel for the return type
+        class TempReturnRootModel(RootModel[root_type]): # type: ignore
+            pass
+        cached = (TempReturnRootModel, TempReturnRootModel.model_json_schema())
+        if hashable:
+            _RETURN_MODEL_CACHE[root_type] = cached
+
+    return cached[0], copy.deepcopy(cached[1])
+
+
 def tool(
     name: str,
     description: str,
     category: str = "general",
     version: str = "1.0.0",
     enabled: bool = True,
+    register: bool = True,
 ) -> Callable[[ToolFunc], ToolFunc]:
     """
     Decorator to register a function as an AI agent tool.
@@ -37,6 +101,8 @@ def tool(
         category: The category the tool belongs to.
         version: The version of the tool.
         enabled: Whether the tool is currently enabled.
+        register: Whether to register the tool right away. Modules defining many tools
+                  can pass False and hand them to tool_registry.register_many() together.
 
     Returns:
         A decorator that registers the function as a tool.
@@ -57,6 +123,9 @@ def tool(
         
         # --- Parameter (Input) Validation ---
         param_fields = {}
+        # Optional[X] parameters without a default; the model defaults them to None,
+        # so they're passed as None when omitted even though func itself has no default
+        implicit_none = []
         for param_name, param in sig.parameters.items():
             if param_name == "self" or param_name == "cls": # Skip self/cls in methods
                 continue
@@ -64,32 +133,24 @@ def tool(
             param_type = Any if param.annotation is inspect.Parameter.empty else param.annotation
             
             # Handle Optional types correctly for default values
-            if get_origin(param_type) is Optional:
-                actual_type = get_args(param_type)[0]
-                # If Optional[X] and default is None, set default to None
-                default_value = None if param.default is inspect.Parameter.empty else param.default
-                param_fields[param_name] = (Optional[actual_type], default_value)
+            if param.default is not inspect.Parameter.empty:
+                param_fields[param_name] = (param_type, param.default)
+            elif _is_optional(param_type):
+                # If Optional[X] and no default, set default to None
+                param_fields[param_name] = (param_type, None)
+                implicit_none.append(param_name)
             else:
-                default_value = ... if param.default is inspect.Parameter.empty else param.default
-                param_fields[param_name] = (param_type, default_value)
+                param_fields[param_name] = (param_type, ...)
+        implicit_none = tuple(implicit_none)
         
-        ParametersModel = create_model(f"{name.capitalize()}Parameters", **param_fields)
-        parameters_schema = ParametersModel.model_json_schema()
+        ParametersModel, parameters_schema = _parameters_model(f"{name.capitalize()}Parameters", param_fields)
 
         # --- Return (Output) Validation ---
         return_annotation = sig.return_annotation
+        # Optional[X] already includes None, so it validates as-is
+        root_type = Any if return_annotation is inspect.Signature.empty else return_annotation
         
-        if return_annotation is inspect.Signature.empty:
-            root_type = Any
-        elif get_origin(return_annotation) is Optional:
-             root_type = get_args(return_annotation)[0] | None
-        else:
-            root_type = return_annotation
-        
-        # Define a temporary RootModel for the return type
-        class TempReturnRootModel(RootModel[root_type]): # type: ignore
-            pass
-        returns_schema = TempReturnRootModel.model_json_schema()
+        TempReturnRootModel, returns_schema = _return_model(root_type)
         
         metadata = ToolMetadata(
             name=name,
@@ -101,69 +162,83 @@ def tool(
             enabled=enabled,
         )
 
-        @wraps(func)
-        async def async_wrapper(*args, **kwargs) -> Any:
-            logger.info(f"Executing tool '{name}'", tool_name=name, args=args, kwargs=kwargs)
-            try:
-                # Input validation
-                validated_params = ParametersModel.model_validate(
-                    {**dict(zip(sig.parameters.keys(), args)), **kwargs}
-                )
-                
-                # Execute the tool function with validated arguments
-                func_args_kwargs = validated_params.model_dump(exclude_unset=True)
-
-                # Call the original (possibly further decorated) function
-                result = await func(**func_args_kwargs) if _is_coroutine_function(func) else func(**func_args_kwargs)
-                
-                # Output validation
-                validated_result = TempReturnRootModel.model_validate(result)
-                logger.info(f"Tool '{name}' executed successfully.", tool_name=name)
-                return validated_result.root
-            except ValidationError as e:
+        # Both wrappers below share these; they differ only in how func is called
+        param_names = tuple(sig.parameters)
+
+        def validate_input(args: tuple, kwargs: dict) -> dict:
+            # LLM tool calls pass keywords only, so validate kwargs as-is; positional
+            # args are mapped onto parameter names in one dict, with kwargs taking precedence
+            if args:
+                payload = dict(zip(param_names, args))
+                payload.update(kwargs)
+            else:
+                payload = kwargs
+            validated_params = ParametersModel.model_validate(payload)
+            # Validated values straight from the instance, without model_dump's serializer walk;
+            # only the ones passed in, so func's own defaults still apply (exclude_unset semantics)
+            fields_set = validated_params.model_fields_set
+            func_kwargs = {k: v for k, v in validated_params.__dict__.items() if k in fields_set}
+            for param_name in implicit_none:
+                func_kwargs.setdefault(param_name, None)
+            return func_kwargs
+
+        if not param_fields:
+            # Nothing to validate: the model would accept any input and drop all of it
+            def validate_input(args: tuple, kwargs: dict) -> dict:
+                return {}
+
+        # Pick the output check once from the return type: Any can't fail validation, and a
+        # result that is exactly the declared primitive type would come back unchanged
+        if root_type is Any:
+            def validate_output(result: Any) -> Any:
+                return result
+        elif root_type in _PRIMITIVE_RETURN_TYPES:
+            def validate_output(result: Any) -> Any:
+                # Exact type, not isinstance: True for an int return still goes through coercion
+                if type(result) is root_type:
+                    return result
+                return TempReturnRootModel.model_validate(result).root
+        else:
+            def validate_output(result: Any) -> Any:
+                return TempReturnRootModel.model_validate(result).root
+
+        def tool_error(e: Exception) -> ToolExecutionError:
+            if isinstance(e, ValidationError):
                 logger.error("Validation error for tool '{tool_name}': {error}", tool_name=name, error=str(e))
-                raise ToolExecutionError(f"Validation error for tool '{name}': {e}") from e
-            except Exception as e:
-                logger.error("Error executing tool '{tool_name}': {error}", tool_name=name, error=str(e))
-                raise ToolExecutionError(f"Error executing tool '{name}': {e}") from e
+                return ToolExecutionError(f"Validation error for tool '{name}': {e}")
+            logger.error("Error executing tool '{tool_name}': {error}", tool_name=name, error=str(e))
+            return ToolExecutionError(f"Error executing tool '{name}': {e}")
 
-        # Determine if the original function is async
         if _is_coroutine_function(func):
-            wrapper = async_wrapper
+            @wraps(func)
+            async def wrapper(*args, **kwargs) -> Any:
+                # Debug level with deferred formatting: skipped cheaply when debug is off
+                logger.debug("Executing tool '{tool_name}'", tool_name=name, args=args, kwargs=kwargs)
+                try:
+                    # Call the original (possibly further decorated) function with validated arguments
+                    result = validate_output(await func(**validate_input(args, kwargs)))
+                except Exception as e:
+                    raise tool_error(e) from e
+                logger.debug("Tool '{tool_name}' executed successfully.", tool_name=name)
+                return result
         else:
-            # If the tool is sync, we can just call it directly after validation
-            # and before output validation. No need for a separate sync_wrapper.
+            # Sync tools stay sync, so callers don't have to await them
             @wraps(func)
-            def sync_wrapper_with_validation(*args, **kwargs) -> Any:
-                logger.info(f"Executing tool '{name}' (sync)", tool_name=name, args=args, kwargs=kwargs)
+            def wrapper(*args, **kwargs) -> Any:
+                logger.debug("Executing tool '{tool_name}' (sync)", tool_name=name, args=args, kwargs=kwargs)
                 try:
-                    # Input validation
-                    validated_params = ParametersModel.model_validate(
-                        {**dict(zip(sig.parameters.keys(), args)), **kwargs}
-                    )
-                    
-                    func_args_kwargs = validated_params.model_dump(exclude_unset=True)
-                    
-                    # Call the original (possibly further decorated) function
-                    result = func(**func_args_kwargs) # Direct sync call
-                    
-                    # Output validation
-                    validated_result = TempReturnRootModel.model_validate(result)
-                    logger.info(f"Tool '{name}' executed successfully (sync).", tool_name=name)
-                    return validated_result.root
-                except ValidationError as e:
-                    logger.error("Validation error for tool '{tool_name}': {error}", tool_name=name, error=str(e))
-                    raise ToolExecutionError(f"Validation error for tool '{name}': {e}") from e
+                    result = validate_output(func(**validate_input(args, kwargs)))
                 except Exception as e:
-                    logger.error("Error executing tool '{tool_name}': {error}", tool_name=name, error=str(e))
-                    raise ToolExecutionError(f"Error executing tool '{name}': {e}") from e
-            wrapper = sync_wrapper_with_validation
+                    raise tool_error(e) from e
+                logger.debug("Tool '{tool_name}' executed successfully (sync).", tool_name=name)
+                return result
 
         # Attach metadata to the wrapper
         wrapper.__tool_metadata__ = metadata # type: ignore
 
         # Register the tool using the global registry
-        tool_registry.register(wrapper, metadata)
+        if register:
+            tool_registry.register(wrapper, metadata)
 
         return wrapper # type: ignore
 
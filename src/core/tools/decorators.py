@@ -5,15 +5,17 @@ Provides common cross-cutting concerns like retry logic, caching,
 rate limiting, and timeouts for tool executions.
 """
 
-from typing import Any, Callable, TypeVar
+from typing import Any, Awaitable, Callable, Optional, TypeVar
 from functools import wraps
+import hashlib
 import time
-import asyncio # Keep asyncio for wait_for
+import asyncio
 from inspect import iscoroutinefunction as _is_coroutine_function
 
+import pydantic_core
 from tenacity import retry, wait_exponential, stop_after_attempt, retry_if_exception_type
 
-from src.infrastructure.cache.redis_client import RedisClient
+from src.infrastructure.cache.redis_client import RedisClient, get_redis_client
 from src.core.utils.exceptions import ToolExecutionError, RateLimitExceededError, ToolTimeoutError
 from src.core.utils.logging import get_logger_with_context
 
@@ -21,6 +23,39 @@ ToolFunc = TypeVar("ToolFunc", bound=Callable[..., Any])
 logger = get_logger_with_context(module="tool_decorators")
 
 
+def _redis_accessor(
+    redis_client_getter: Optional[Callable[[], RedisClient]],
+) -> Callable[[], Awaitable[RedisClient]]:
+    """
+    Returns an async accessor for a decorator's Redis client, so the client (and its
+    connection pool) is resolved once and reused rather than built on every tool call.
+    Without a getter, the app-wide connected client from get_redis_client() is used.
+    """
+    if redis_client_getter is None:
+        return get_redis_client
+
+    client: Optional[RedisClient] = None
+
+    async def get_client() -> RedisClient:
+        nonlocal client
+        if client is None:
+            client = redis_client_getter()
+        return client
+
+    return get_client
+
+
+def _arguments_digest(args: tuple, kwargs: dict) -> str:
+    """
+    Fixed-length digest of a call's arguments for cache keys. Arguments are JSON-encoded,
+    with str() for types JSON can't represent, and keyword order doesn't matter.
+    """
+    if len(kwargs) > 1:
+        kwargs = dict(sorted(kwargs.items()))
+    encoded = pydantic_core.to_json((args, kwargs), fallback=str)
+    return hashlib.blake2b(encoded, digest_size=16).hexdigest()
+
+
 def with_retry(
     max_attempts: int = 3,
     initial_delay: float = 0.5,
@@ -43,33 +78,30 @@ def with_retry(
     """
 
     def decorator(func: ToolFunc) -> ToolFunc:
-        @wraps(func)
-        @retry(
+        # One retry policy per tool, applied only to the wrapper matching func
+        retrying = retry(
             wait=wait_exponential(multiplier=initial_delay, min=initial_delay, max=max_delay, exp_base=exp_base),
             stop=stop_after_attempt(max_attempts),
             retry=retry_if_exception_type(catch_exceptions),
             reraise=True,
         )
-        async def async_wrapper(*args, **kwargs) -> Any:
-            logger.debug(f"Attempting to run tool {func.__name__}")
-            return await func(*args, **kwargs)
+
+        if _is_coroutine_function(func):
+            @wraps(func)
+            @retrying
+            async def async_wrapper(*args, **kwargs) -> Any:
+                logger.debug(f"Attempting to run tool {func.__name__}")
+                return await func(*args, **kwargs)
+
+            return async_wrapper  # type: ignore
 
         @wraps(func)
-        @retry(
-            wait=wait_exponential(multiplier=initial_delay, min=initial_delay, max=max_delay, exp_base=exp_base),
-            stop=stop_after_attempt(max_attempts),
-            retry=retry_if_exception_type(catch_exceptions),
-            reraise=True,
-        )
+        @retrying
         def sync_wrapper(*args, **kwargs) -> Any:
             logger.debug(f"Attempting to run tool {func.__name__}")
             return func(*args, **kwargs)
 
-        # Return the appropriate wrapper based on whether the function is a coroutine
-        if _is_coroutine_function(func):
-            return async_wrapper  # type: ignore
-        else:
-            return sync_wrapper  # type: ignore
+        return sync_wrapper  # type: ignore
 
     return decorator
 
@@ -88,9 +120,14 @@ def with_timeout(timeout_seconds: int) -> Callable[[ToolFunc], ToolFunc]:
     def decorator(func: ToolFunc) -> ToolFunc:
         @wraps(func)
         async def async_wrapper(*args, **kwargs) -> Any:
+            # A cancel scope on the current task, rather than wait_for's extra Task per call
+            timeout_scope = asyncio.timeout(timeout_seconds)
             try:
-                return await asyncio.wait_for(func(*args, **kwargs), timeout=timeout_seconds)
+                async with timeout_scope:
+                    return await func(*args, **kwargs)
             except asyncio.TimeoutError:
+                if not timeout_scope.expired():
+                    raise # Raised by the tool itself, not our deadline
                 logger.warning(f"Tool {func.__name__} timed out after {timeout_seconds} seconds.")
                 raise ToolTimeoutError(f"Tool {func.__name__} timed out.")
 
@@ -123,7 +160,7 @@ def with_timeout(timeout_seconds: int) -> Callable[[ToolFunc], ToolFunc]:
 def with_cache(
     ttl: int = 3600,
     key_prefix: str = "tool_cache",
-    redis_client_getter: Callable[[], RedisClient] = lambda: RedisClient(),
+    redis_client_getter: Optional[Callable[[], RedisClient]] = None,
 ) -> Callable[[ToolFunc], ToolFunc]:
     """
     Decorator to cache tool function results in Redis.
@@ -133,36 +170,41 @@ def with_cache(
         key_prefix: Prefix for Redis cache keys.
         redis_client_getter: A callable that returns an instance of RedisClient.
                              Allows for dependency injection of Redis client.
+                             Called once, on first use; defaults to the shared client.
 
     Returns:
         A decorator that adds caching logic to the tool function.
     """
 
     def decorator(func: ToolFunc) -> ToolFunc:
+        get_redis = _redis_accessor(redis_client_getter)
+        cache_key_prefix = f"{key_prefix}:{func.__name__}:"
+
         @wraps(func)
         async def async_wrapper(*args, **kwargs) -> Any:
-            redis = redis_client_getter()
-            # Generate a cache key based on function name, args, and kwargs
-            cache_key_parts = [key_prefix, func.__name__]
-            cache_key_parts.extend(str(arg) for arg in args)
-            cache_key_parts.extend(f"{k}={v}" for k, v in sorted(kwargs.items()))
-            cache_key = ":".join(cache_key_parts)
+            cache_key = cache_key_prefix + _arguments_digest(args, kwargs)
 
             try:
-                if await redis.exists(cache_key):
-                    cached_result = await redis.get(cache_key)
-                    logger.debug(f"Cache hit for tool {func.__name__}: {cache_key}")
-                    return cached_result
-                
-                logger.debug(f"Cache miss for tool {func.__name__}: {cache_key}")
-                result = await func(*args, **kwargs)
-                await redis.set(cache_key, result, ttl=ttl)
-                return result
+                redis = await get_redis()
+                # One GET; results are stored wrapped, so a cached None is still a hit
+                cached = await redis.get(cache_key)
             except Exception as e:
                 logger.error(f"Error during caching for tool {func.__name__}: {e}")
                 # Don't prevent execution if caching fails, just log and proceed
                 return await func(*args, **kwargs)
 
+            if isinstance(cached, dict) and "result" in cached:
+                logger.debug(f"Cache hit for tool {func.__name__}: {cache_key}")
+                return cached["result"]
+
+            logger.debug(f"Cache miss for tool {func.__name__}: {cache_key}")
+            result = await func(*args, **kwargs)
+            try:
+                await redis.set(cache_key, {"result": result}, ttl=ttl)
+            except Exception as e:
+                logger.error(f"Error during caching for tool {func.__name__}: {e}")
+            return result
+
         @wraps(func)
         def sync_wrapper(*args, **kwargs) -> Any:
             logger.warning(f"Cache decorator applied to sync tool {func.__name__}. "
@@ -189,7 +231,7 @@ def with_rate_limit(
     calls: int,
     period: int,
     key_prefix: str = "tool_ratelimit",
-    redis_client_getter: Callable[[], RedisClient] = lambda: RedisClient(),
+    redis_client_getter: Optional[Callable[[], RedisClient]] = None,
 ) -> Callable[[ToolFunc], ToolFunc]:
     """
     Decorator to add rate limiting to a tool function using a sliding window counter in Redis.
@@ -199,45 +241,31 @@ def with_rate_limit(
         period: Time window in seconds for the rate limit.
         key_prefix: Prefix for Redis rate limit keys.
         redis_client_getter: A callable that returns an instance of RedisClient.
+                             Called once, on first use; defaults to the shared client.
 
     Returns:
         A decorator that adds rate limiting logic to the tool function.
     """
 
     def decorator(func: ToolFunc) -> ToolFunc:
+        get_redis = _redis_accessor(redis_client_getter)
+        rate_limit_key = f"{key_prefix}:{func.__name__}"
+
         @wraps(func)
         async def async_wrapper(*args, **kwargs) -> Any:
-            redis = redis_client_getter()
-            rate_limit_key = f"{key_prefix}:{func.__name__}"
-            
-            current_time = int(time.time())
-            window_start = current_time - period
-
             try:
-                # Remove timestamps older than the current window
-                await redis.ltrim(rate_limit_key, -calls, -1) # Keep only the last 'calls' elements
-
-                # Count calls within the current window
-                timestamps = await redis.lrange(rate_limit_key, 0, -1)
-                
-                # Filter out expired timestamps
-                active_calls = [ts for ts in timestamps if ts > window_start]
-
-                if len(active_calls) >= calls:
-                    logger.warning(f"Rate limit exceeded for tool {func.__name__}.")
-                    raise RateLimitExceededError(f"Rate limit for tool {func.__name__} exceeded ({calls}/{period}s).")
-                
-                # Add current call timestamp
-                await redis.rpush(rate_limit_key, current_time)
-                await redis.expire(rate_limit_key, period) # Ensure the list expires
-
-                return await func(*args, **kwargs)
-            except RateLimitExceededError:
-                raise # Re-raise if it's our own specific exception
+                redis = await get_redis()
+                # Expire, count and record in one atomic round-trip
+                allowed, _ = await redis.acquire_rate_limit(rate_limit_key, calls, period)
             except Exception as e:
                 logger.error(f"Error during rate limiting for tool {func.__name__}: {e}")
                 # Don't prevent execution if rate limiting mechanism fails, just log and proceed
-                return await func(*args, **kwargs)
+                allowed = True
+
+            if not allowed:
+                logger.warning(f"Rate limit exceeded for tool {func.__name__}.")
+                raise RateLimitExceededError(f"Rate limit for tool {func.__name__} exceeded ({calls}/{period}s).")
+            return await func(*args, **kwargs)
 
         @wraps(func)
         def sync_wrapper(*args, **kwargs) -> Any:
@@ -5,32 +5,45 @@ This module provides example tool implementations to demonstrate
 how to create and register tools that agents can use.
 """
 
-from datetime import datetime
 from typing import Optional
 import random
+import time
 
 from src.core.tools.base import tool
+from src.core.tools.registry import tool_registry
+
+# (unix second, its ISO 8601 string) last returned by get_current_time
+_current_time: tuple = (-1, "")
 
 
 @tool(
     name="get_current_time",
     description="Get the current date and time in ISO format",
-    category="utility"
+    category="utility",
+    register=False,
 )
 def get_current_time() -> str:
     """
-    Returns the current date and time in ISO 8601 format.
+    Returns the current UTC date and time in ISO 8601 format, to the second.
 
     Returns:
         Current datetime as ISO formatted string
     """
-    return datetime.utcnow().isoformat() + "Z"
+    global _current_time
+    now = int(time.time())
+    # Formatted once per second; agents call this far more often than that
+    cached_second, formatted = _current_time
+    if now != cached_second:
+        formatted = time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(now))
+        _current_time = (now, formatted)
+    return formatted
 
 
 @tool(
     name="calculate",
     description="Perform basic arithmetic calculations (add, subtract, multiply, divide)",
-    category="math"
+    category="math",
+    register=False,
 )
 def calculate(operation: str, a: float, b: float) -> float:
     """
@@ -66,7 +79,8 @@ def calculate(operation: str, a: float, b: float) -> float:
 @tool(
     name="generate_random_number",
     description="Generate a random number within a specified range",
-    category="utility"
+    category="utility",
+    register=False,
 )
 def generate_random_number(min_value: int = 1, max_value: int = 100) -> int:
     """
@@ -91,7 +105,8 @@ def generate_random_number(min_value: int = 1, max_value: int = 100) -> int:
 @tool(
     name="string_length",
     description="Get the length of a string",
-    category="utility"
+    category="utility",
+    register=False,
 )
 def string_length(text: str) -> int:
     """
@@ -109,7 +124,8 @@ def string_length(text: str) -> int:
 @tool(
     name="reverse_string",
     description="Reverse a string",
-    category="utility"
+    category="utility",
+    register=False,
 )
 def reverse_string(text: str) -> str:
     """
@@ -127,7 +143,8 @@ def reverse_string(text: str) -> str:
 @tool(
     name="count_words",
     description="Count the number of words in a text",
-    category="utility"
+    category="utility",
+    register=False,
 )
 def count_words(text: str) -> int:
     """
@@ -146,7 +163,8 @@ def count_words(text: str) -> int:
 @tool(
     name="fahrenheit_to_celsius",
     description="Convert temperature from Fahrenheit to Celsius",
-    category="conversion"
+    category="conversion",
+    register=False,
 )
 def fahrenheit_to_celsius(fahrenheit: float) -> float:
     """
@@ -164,7 +182,8 @@ def fahrenheit_to_celsius(fahrenheit: float) -> float:
 @tool(
     name="celsius_to_fahrenheit",
     description="Convert temperature from Celsius to Fahrenheit",
-    category="conversion"
+    category="conversion",
+    register=False,
 )
 def celsius_to_fahrenheit(celsius: float) -> float:
     """
@@ -179,5 +198,14 @@ def celsius_to_fahrenheit(celsius: float) -> float:
     return (celsius * 9 / 5) + 32
 
 
-# Auto-register all tools when this module is imported
-# The @tool decorator automatically registers tools with the global registry
+# Auto-register all tools when this module is imported, in one batch
+tool_registry.register_many((
+    get_current_time,
+    calculate,
+    generate_random_number,
+    string_length,
+    reverse_string,
+    count_words,
+    fahrenheit_to_celsius,
+    celsius_to_fahrenheit,
+))
@@ -2,10 +2,12 @@
 Tool Registry for MAI Framework.
 
 This module provides a thread-safe, global registry for managing AI agent tools.
+Writers serialize on a lock and publish read-only snapshots; readers never lock.
 """
 
 import threading
-from typing import Callable, Any, Optional
+from types import MappingProxyType
+from typing import Callable, Any, Iterable, Optional
 
 from src.core.tools.models import ToolMetadata
 
@@ -29,6 +31,7 @@ class ToolRegistry:
                     cls._instance = super().__new__(cls)
                     cls._instance._tools: dict[str, tuple[Callable[..., Any], ToolMetadata]] = {}
                     cls._instance._categories: dict[str, list[str]] = {}
+                    cls._instance._publish()
         return cls._instance
 
     def register(self, func: Callable[..., Any], metadata: ToolMetadata) -> None:
@@ -50,6 +53,44 @@ class ToolRegistry:
             if metadata.category not in self._categories:
                 self._categories[metadata.category] = []
             self._categories[metadata.category].append(metadata.name)
+            self._publish()
+
+    def register_many(self, tools: Iterable[Callable[..., Any]]) -> None:
+        """
+        Registers several tools built with ``@tool(..., register=False)`` at once,
+        publishing the lookup views a single time instead of once per tool.
+
+        Args:
+            tools: Tool functions carrying their ``__tool_metadata__``.
+
+        Raises:
+            ValueError: If any tool's name is already registered or repeated in the batch;
+                        none of the tools are registered then.
+        """
+        entries = [(func, func.__tool_metadata__) for func in tools]
+        with self._lock:
+            names = [metadata.name for _, metadata in entries]
+            for name in names:
+                if name in self._tools or names.count(name) > 1:
+                    raise ValueError(f"Tool with name '{name}' already registered.")
+
+            for func, metadata in entries:
+                self._tools[metadata.name] = (func, metadata)
+                self._categories.setdefault(metadata.category, []).append(metadata.name)
+            self._publish()
+
+    def _publish(self) -> None:
+        """
+        Rebuilds the read-only views the lookup methods read without the lock.
+        Called by writers while holding the lock; rebinding each attribute is atomic,
+        so a reader sees either the previous view or the new one.
+        """
+        self._tools_view = MappingProxyType(dict(self._tools))
+        self._all_tools = tuple(self._tools.values())
+        self._category_view = MappingProxyType({
+            category: tuple(self._tools[name] for name in names if name in self._tools)
+            for category, names in self._categories.items()
+        })
 
     def get_tool(self, name: str) -> Optional[tuple[Callable[..., Any], ToolMetadata]]:
         """
@@ -61,8 +102,7 @@ class ToolRegistry:
         Returns:
             A tuple containing the callable function and its metadata, or None if not found.
         """
-        with self._lock:
-            return self._tools.get(name)
+        return self._tools_view.get(name)
 
     def list_tools_by_category(self, category: str) -> list[tuple[Callable[..., Any], ToolMetadata]]:
         """
@@ -76,9 +116,7 @@ class ToolRegistry:
             for all tools in the specified category. Returns an empty list if the
             category does not exist or has no tools.
         """
-        with self._lock:
-            tool_names = self._categories.get(category, [])
-            return [self._tools[name] for name in tool_names if name in self._tools]
+        return list(self._category_view.get(category, ()))
 
     def list_all_tools(self) -> list[tuple[Callable[..., Any], ToolMetadata]]:
         """
@@ -87,8 +125,7 @@ class ToolRegistry:
         Returns:
             A list of tuples, each containing a callable function and its metadata.
         """
-        with self._lock:
-            return list(self._tools.values())
+        return list(self._all_tools)
 
     def unregister_tool(self, name: str) -> None:
         """
@@ -104,12 +141,14 @@ class ToolRegistry:
                     self._categories[metadata.category].remove(name)
                     if not self._categories[metadata.category]:
                         del self._categories[metadata.category]
+                self._publish()
             
     def clear(self) -> None:
         """Clears all registered tools. Useful for testing."""
         with self._lock:
             self._tools.clear()
             self._categories.clear()
+            self._publish()
 
 # Global instance of the ToolRegistry
 tool_registry = ToolRegistry()
@@ -354,6 +354,54 @@ class ModelError(MAIException):
         )
 
 
+class TransientProviderError(ModelError):
+    """Provider failure worth retrying (connection error, timeout, 5xx, 429)."""
+
+    def __init__(
+        self,
+        message: str,
+        model_name: Optional[str] = None,
+        details: Optional[dict[str, Any]] = None,
+    ) -> None:
+        """Initialize TransientProviderError.
+
+        Args:
+            message: Error message.
+            model_name: Name of the model.
+            details: Additional error details.
+        """
+        super().__init__(
+            message=message,
+            model_name=model_name,
+            details=details,
+            retryable=True,
+        )
+
+
+class PermanentProviderError(ModelError):
+    """Provider failure that retrying won't fix (4xx other than 429)."""
+
+    def __init__(
+        self,
+        message: str,
+        model_name: Optional[str] = None,
+        details: Optional[dict[str, Any]] = None,
+    ) -> None:
+        """Initialize PermanentProviderError.
+
+        Args:
+            message: Error message.
+            model_name: Name of the model.
+            details: Additional error details.
+        """
+        super().__init__(
+            message=message,
+            model_name=model_name,
+            details=details,
+            retryable=False,
+        )
+
+
 # Pipeline Errors
 
 
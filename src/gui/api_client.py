@@ -9,6 +9,14 @@ import httpx
 from src.gui.config import gui_settings
 
 
+def _health_url(base_url: str) -> str:
+    """Build the root-level /health URL from an API base URL ending in /api/v1."""
+    root = base_url.rstrip("/")
+    if root.endswith("/api/v1"):
+        root = root[: -len("/api/v1")]
+    return root + "/health"
+
+
 class MAIClient:
     """Client for the MAI agent API."""
 
@@ -19,6 +27,9 @@ class MAIClient:
             base_url: Base URL for the API. Defaults to gui_settings.api_base_url.
         """
         self.base_url = base_url or gui_settings.api_base_url
+        # Health endpoint is at root level, not under /api/v1; it's polled, so
+        # derive its URL once
+        self._health_url = _health_url(self.base_url)
 
     async def stream_chat(
         self,
@@ -146,10 +157,8 @@ class MAIClient:
             Health status dict or error info
         """
         try:
-            # Health endpoint is at root level, not under /api/v1
-            health_url = self.base_url.replace("/api/v1", "") + "/health"
             async with httpx.AsyncClient(timeout=5.0) as client:
-                response = await client.get(health_url)
+                response = await client.get(self._health_url)
                 return response.json()
         except Exception as e:
             return {"status": "unhealthy", "error": str(e)}
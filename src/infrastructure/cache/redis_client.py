@@ -12,11 +12,13 @@ This module provides a production-ready Redis client with:
 
 import asyncio
 import json
+import uuid
 from typing import Any, Optional, Union
 
+import pydantic_core
 import redis.asyncio as aioredis
 from redis.asyncio import Redis, ConnectionPool
-from redis.exceptions import RedisError, ConnectionError, TimeoutError
+from redis.exceptions import RedisError, ConnectionError, ResponseError, TimeoutError
 
 from src.core.utils.config import RedisSettings, get_settings
 from src.core.utils.exceptions import MAIException
@@ -24,6 +26,24 @@ from src.core.utils.logging import get_logger_with_context
 
 logger = get_logger_with_context()
 
+# Sliding-window rate limit check-and-record, run atomically server-side.
+# KEYS[1]: sorted set of call timestamps; ARGV: window (ms), limit, member.
+# Timestamps are the server's clock in integer ms, so workers' clocks needn't agree.
+# Returns {allowed (1/0), calls in window including this one if allowed}.
+_SLIDING_WINDOW_SCRIPT = """
+local time = redis.call('TIME')
+local now = tonumber(time[1]) * 1000 + math.floor(tonumber(time[2]) / 1000)
+local window = tonumber(ARGV[1])
+redis.call('ZREMRANGEBYSCORE', KEYS[1], '-inf', now - window)
+local count = redis.call('ZCARD', KEYS[1])
+if count < tonumber(ARGV[2]) then
+    redis.call('ZADD', KEYS[1], now, ARGV[3])
+    redis.call('PEXPIRE', KEYS[1], window)
+    return {1, count + 1}
+end
+return {0, count}
+"""
+
 
 class RedisClientError(MAIException):
     """Redis client operation error."""
@@ -87,6 +107,8 @@ class RedisClient:
         self.pool: Optional[ConnectionPool] = None
         self.client: Optional[Redis] = None
         self._connected = False
+        # Registered on connect; runs via EVALSHA, reloading the script if the server lost it
+        self._sliding_window = None
 
         logger.info(
             "Redis client initialized",
@@ -119,6 +141,7 @@ class RedisClient:
 
             # Create Redis client
             self.client = Redis(connection_pool=self.pool)
+            self._sliding_window = self.client.register_script(_SLIDING_WINDOW_SCRIPT)
 
             # Test connection
             await self.ping()
@@ -177,7 +200,7 @@ class RedisClient:
             Result from the operation
 
         Raises:
-            RedisClientError: If all retries fail
+            RedisClientError: If all retries fail, or the server rejects the command
         """
         last_error = None
 
@@ -185,6 +208,12 @@ class RedisClient:
             try:
                 return await operation_func(*args, **kwargs)
 
+            except ResponseError as e:
+                # The server answered with an error (e.g. WRONGTYPE); retrying can't change it
+                error_msg = f"Redis operation '{operation_name}' failed: {e}"
+                logger.error(error_msg, error=str(e))
+                raise RedisClientError(error_msg, operation=operation_name, error=str(e)) from e
+
             except (RedisError, ConnectionError, TimeoutError) as e:
                 last_error = e
                 delay = self.retry_delay * (2**attempt)  # Exponential backoff
@@ -208,15 +237,17 @@ class RedisClient:
             error_msg, operation=operation_name, attempts=self.max_retries, error=str(last_error)
         )
 
-    def _serialize(self, value: Any) -> str:
+    def _serialize(self, value: Any) -> Union[str, bytes]:
         """Serialize Python object to JSON string.
 
         Args:
             value: Value to serialize
 
         Returns:
-            JSON string
+            JSON string, or the value unchanged if it is already encoded bytes
         """
+        if isinstance(value, bytes):
+            return value
         if isinstance(value, (str, int, float, bool)):
             return str(value)
         return json.dumps(value)
@@ -234,8 +265,9 @@ class RedisClient:
             return None
 
         try:
-            return json.loads(value)
-        except (json.JSONDecodeError, ValueError):
+            # pydantic-core's Rust parser; same results as json.loads, several times faster
+            return pydantic_core.from_json(value)
+        except ValueError:
             # If not valid JSON, return as string
             return value
 
@@ -277,19 +309,19 @@ class RedisClient:
 
         return await self._retry_operation("set", _set)
 
-    async def delete(self, key: str) -> int:
-        """Delete key.
+    async def delete(self, *keys: str) -> int:
+        """Delete one or more keys in a single round-trip.
 
         Args:
-            key: Key name
+            *keys: Key names
 
         Returns:
-            Number of keys deleted (0 or 1)
+            Number of keys deleted
         """
-        prefixed_key = self._make_key(key)
+        prefixed_keys = [self._make_key(key) for key in keys]
 
         async def _delete():
-            return await self.client.delete(prefixed_key)
+            return await self.client.delete(*prefixed_keys)
 
         return await self._retry_operation("delete", _delete)
 
@@ -345,6 +377,33 @@ class RedisClient:
 
         return await self._retry_operation("decrement", _decr)
 
+    async def acquire_rate_limit(self, key: str, limit: int, period: float) -> tuple[bool, int]:
+        """Record a call against a sliding-window rate limit, if it's within the limit.
+
+        Expiring old calls, counting and recording the new one run as a single
+        Lua script, so concurrent callers can't all pass the same check.
+
+        Args:
+            key: Rate limit key name
+            limit: Maximum number of calls within the window
+            period: Window length in seconds
+
+        Returns:
+            (allowed, calls in the window, including this one if allowed)
+        """
+        prefixed_key = self._make_key(key)
+        window_ms = int(period * 1000)
+        # Fixed across retries, so a call recorded before a lost reply isn't recorded twice
+        member = uuid.uuid4().hex
+
+        async def _acquire():
+            allowed, count = await self._sliding_window(
+                keys=[prefixed_key], args=[window_ms, limit, member]
+            )
+            return bool(allowed), int(count)
+
+        return await self._retry_operation("acquire_rate_limit", _acquire)
+
     # ===== Hash Operations =====
 
     async def hget(self, key: str, field: str) -> Any:
@@ -475,6 +534,65 @@ class RedisClient:
 
         return await self._retry_operation("lrange", _lrange)
 
+    async def replace_list(self, key: str, *values: Any) -> int:
+        """Atomically replace the contents of a list (DEL + RPUSH in one MULTI/EXEC).
+
+        Args:
+            key: List key name
+            *values: New list values, in order
+
+        Returns:
+            Length of list after operation
+        """
+        prefixed_key = self._make_key(key)
+        serialized_values = [self._serialize(v) for v in values]
+
+        async def _replace_list():
+            async with self.client.pipeline(transaction=True) as pipe:
+                pipe.delete(prefixed_key)
+                if serialized_values:
+                    pipe.rpush(prefixed_key, *serialized_values)
+                results = await pipe.execute()
+            return results[1] if serialized_values else 0
+
+        return await self._retry_operation("replace_list", _replace_list)
+
+    async def append_list(self, key: str, *values: Any, trim_start: int = 0) -> int:
+        """Drop elements from the head of a list and append values, in one MULTI/EXEC.
+
+        Unlike the other operations this is attempted once: LTRIM by offset is not
+        idempotent, so replaying it after a lost reply would drop elements twice.
+        Callers that need the write to land should fall back to replace_list.
+
+        Args:
+            key: List key name
+            *values: Values to append
+            trim_start: Number of elements to drop from the head first (default: 0)
+
+        Returns:
+            Length of list after operation
+
+        Raises:
+            RedisClientError: If the transaction fails
+        """
+        prefixed_key = self._make_key(key)
+        serialized_values = [self._serialize(v) for v in values]
+
+        try:
+            async with self.client.pipeline(transaction=True) as pipe:
+                if trim_start:
+                    pipe.ltrim(prefixed_key, trim_start, -1)
+                if serialized_values:
+                    pipe.rpush(prefixed_key, *serialized_values)
+                else:
+                    pipe.llen(prefixed_key)
+                results = await pipe.execute()
+            return results[-1]
+        except (RedisError, ConnectionError, TimeoutError) as e:
+            error_msg = f"Redis operation 'append_list' failed: {e}"
+            logger.error(error_msg, error=str(e))
+            raise RedisClientError(error_msg, operation="append_list", error=str(e)) from e
+
     async def llen(self, key: str) -> int:
         """Get length of list.
 
@@ -6,13 +6,26 @@ from typing import Any
 from src.core.utils.config import get_settings
 
 
+def _root_url(base_url: str) -> str:
+    """Strip a trailing /v1 path segment (only as a suffix) from an API base URL."""
+    root = base_url.rstrip("/")
+    if root.endswith("/v1"):
+        root = root[: -len("/v1")]
+    return root
+
+
 class LMStudioClient:
     """Client for LM Studio model management APIs."""
 
     def __init__(self, base_url: str | None = None):
         settings = get_settings()
-        self.base_url = base_url or settings.lm_studio.base_url.rstrip("/v1")
         # LM Studio management endpoints are at root, not /v1
+        self.base_url = base_url or _root_url(settings.lm_studio.base_url)
+
+        # Endpoint URLs are fixed per client, so build them once
+        self._models_url = f"{self.base_url}/v1/models"
+        self._load_url = f"{self.base_url}/api/v0/models/load"
+        self._unload_url = f"{self.base_url}/api/v0/models/unload"
 
     async def list_models(self) -> list[dict[str, Any]]:
         """List all available models in LM Studio.
@@ -23,7 +36,7 @@ class LMStudioClient:
         async with httpx.AsyncClient(timeout=10.0) as client:
             try:
                 # OpenAI-compatible /v1/models endpoint
-                response = await client.get(f"{self.base_url}/v1/models")
+                response = await client.get(self._models_url)
                 response.raise_for_status()
                 data = response.json()
                 return data.get("data", [])
@@ -50,7 +63,7 @@ class LMStudioClient:
             try:
                 # LM Studio REST API for loading models
                 response = await client.post(
-                    f"{self.base_url}/api/v0/models/load",
+                    self._load_url,
                     json={"model": model_id},
                 )
                 response.raise_for_status()
@@ -70,7 +83,7 @@ class LMStudioClient:
         async with httpx.AsyncClient(timeout=30.0) as client:
             try:
                 response = await client.post(
-                    f"{self.base_url}/api/v0/models/unload",
+                    self._unload_url,
                     json={"model": model_id},
                 )
                 response.raise_for_status()
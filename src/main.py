@@ -1,3 +1,4 @@
+import asyncio
 from contextlib import asynccontextmanager
 from fastapi import FastAPI
 
@@ -7,6 +8,7 @@ from src.core.agents.simple_agent import SimpleAgent
 from src.core.agents.chat_agent import ChatAgent
 from src.core.tools import examples as tool_examples  # Import to register tools
 from src.core.tools.registry import tool_registry
+from src.core.prompts.registry import prompt_manager
 
 # Service connection status tracking
 _service_status = {
@@ -75,6 +77,21 @@ async def _init_qdrant() -> bool:
         return False
 
 
+async def _init_llm() -> bool:
+    """Warm up the configured LLM provider. Returns True if successful."""
+    try:
+        from src.core.models.providers import warmup_providers
+
+        if await warmup_providers():
+            print("Startup: LLM provider warmed up")
+            return True
+        print("Startup: LLM provider unavailable (optional)")
+        return False
+    except Exception as e:
+        print(f"Startup: LLM provider unavailable (optional): {e}")
+        return False
+
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     global _service_status
@@ -88,10 +105,26 @@ async def lifespan(app: FastAPI):
     tool_count = len(tool_registry.list_all_tools())
     print(f"Startup: Tools registered ({tool_count} tools)")
 
-    # Initialize optional services (failures are logged but don't crash the app)
-    _service_status["redis"] = await _init_redis()
-    _service_status["postgresql"] = await _init_postgresql()
-    _service_status["qdrant"] = await _init_qdrant()
+    # Load prompts on a worker thread so the event loop stays free
+    try:
+        prompts = await prompt_manager.aload()
+        print(f"Startup: Prompts loaded ({len(prompts.templates)} templates)")
+    except Exception as e:
+        print(f"Startup: Prompts unavailable: {e}")
+
+    # Warm up the LLM provider in the background; until it finishes, requests
+    # build their model the normal (unwarmed) way, so startup needn't wait on
+    # model detection against a slow or stopped server
+    llm_warmup = asyncio.create_task(_init_llm())
+
+    # Initialize optional services (failures are logged but don't crash the app).
+    # The probes are independent, so run them together and wait only as long as
+    # the slowest one rather than the sum of their timeouts.
+    (
+        _service_status["redis"],
+        _service_status["postgresql"],
+        _service_status["qdrant"],
+    ) = await asyncio.gather(_init_redis(), _init_postgresql(), _init_qdrant())
 
     # Log service summary
     connected = [svc for svc, status in _service_status.items() if status]
@@ -103,6 +136,8 @@ async def lifespan(app: FastAPI):
     yield
 
     # Clean up on shutdown
+    llm_warmup.cancel()
+
     try:
         from src.infrastructure.database.session import close_db
         await close_db()
@@ -121,6 +156,12 @@ async def lifespan(app: FastAPI):
     except Exception:
         pass
 
+    try:
+        from src.core.models.lmstudio_provider import close_lmstudio_clients
+        await close_lmstudio_clients()
+    except Exception:
+        pass
+
     print("Shutdown: Application shutting down.")
 
 app = FastAPI(
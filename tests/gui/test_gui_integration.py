@@ -2,7 +2,7 @@
 
 import pytest
 
-from src.gui.api_client import MAIClient
+from src.gui.api_client import MAIClient, _health_url
 from src.gui.session import format_history_for_gradio, generate_session_id
 
 
@@ -60,6 +60,21 @@ class TestSessionManagement:
         assert result[3]["content"] == "Response 2"
 
 
+class TestHealthURL:
+    """Tests for deriving the root-level health URL."""
+
+    def test_strips_only_trailing_api_prefix(self):
+        """Only a trailing /api/v1 should be removed from the base URL."""
+        assert _health_url("http://localhost:8000/api/v1") == "http://localhost:8000/health"
+        assert _health_url("http://localhost:8000/api/v1/") == "http://localhost:8000/health"
+        assert _health_url("http://proxy/api/v1/mai/api/v1") == "http://proxy/api/v1/mai/health"
+
+    def test_built_once_per_client(self):
+        """The client should precompute its health URL."""
+        client = MAIClient(base_url="http://host:8000/api/v1")
+        assert client._health_url == "http://host:8000/health"
+
+
 @pytest.mark.asyncio
 class TestAPIClient:
     """Integration tests for the API client (requires running API)."""
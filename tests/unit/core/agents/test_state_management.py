@@ -39,16 +39,21 @@ class MockPydanticAIAgent:
 def mock_redis_client():
     """Fixture for a mock RedisClient."""
     mock = MagicMock(spec=RedisClient)
-    # Mock set to simply store the value
-    mock.set = AsyncMock()
-    # Mock get to return a stored value, simulating Redis
+    # Mock list and string operations against an in-memory store, simulating Redis
     mock_store = {}
+    async def mock_append_list(key, *values, trim_start=0):
+        mock_store[key] = mock_store.get(key, [])[trim_start:] + list(values)
+        return len(mock_store[key])
+    async def mock_lrange(key, start=0, end=-1):
+        return list(mock_store.get(key, []))
     async def mock_get(key):
         return mock_store.get(key)
-    async def mock_set(key, value, ex=None):
+    async def mock_set(key, value, ttl=None):
         mock_store[key] = value
-    mock.get.side_effect = mock_get
-    mock.set.side_effect = mock_set
+    mock.append_list = AsyncMock(side_effect=mock_append_list)
+    mock.lrange = AsyncMock(side_effect=mock_lrange)
+    mock.get = AsyncMock(side_effect=mock_get)
+    mock.set = AsyncMock(side_effect=mock_set)
     return mock
 
 @pytest.fixture
@@ -86,12 +91,14 @@ async def test_agent_state_management_with_session_id(base_agent_framework, mock
     response_1 = await base_agent_framework.run_async(user_input_1, deps)
 
     assert response_1.message == "Agent processed: Hello, agent! (History length: 1)"
-    assert mock_redis_client.set.call_count == 2 # 1 for user, 1 for assistant
+    assert mock_redis_client.append_list.call_count == 1 # User and assistant written together at turn end
 
     # Check if history was saved in redis
-    # The get_conversation_context calls ConversationMemory.load_from_redis which calls redis.get
+    # The get_conversation_context calls ConversationMemory.load_from_redis which reads both keys
     history_key = f"conversation_memory:{session_id}"
-    mock_redis_client.get.assert_called_with(history_key)
+    model_history_key = f"conversation_memory:model:{session_id}"
+    mock_redis_client.lrange.assert_called_with(history_key)
+    mock_redis_client.get.assert_called_with(model_history_key)
 
     # Simulate second turn
     user_input_2 = "How are you?"
@@ -100,7 +107,7 @@ async def test_agent_state_management_with_session_id(base_agent_framework, mock
     # The mock agent's response message will now reflect the history length
     assert "History length: 3" in response_2.message
     assert response_2.message == "Agent processed: How are you? (History length: 3)"
-    assert mock_redis_client.set.call_count == 4 # 2 for user, 2 for assistant
+    assert mock_redis_client.append_list.call_count == 2 # One write per turn
 
     # Verify get_conversation_context works
     retrieved_history = await base_agent_framework.get_conversation_context(deps)
@@ -122,8 +129,8 @@ async def test_agent_state_management_no_session_id(base_agent_framework, mock_r
     response = await base_agent_framework.run_async(user_input, deps)
 
     assert response.message == "Agent processed: Stateless query"
-    mock_redis_client.set.assert_not_called()
-    mock_redis_client.get.assert_not_called()
+    mock_redis_client.append_list.assert_not_called()
+    mock_redis_client.lrange.assert_not_called()
 
     # Verify get_conversation_context returns empty if no session_id
     retrieved_history = await base_agent_framework.get_conversation_context(deps)
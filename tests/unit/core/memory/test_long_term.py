@@ -1,6 +1,8 @@
+import asyncio
 import pytest
 from unittest.mock import AsyncMock, MagicMock, patch
 from datetime import datetime, timedelta, timezone
+from typing import Optional
 import uuid
 import json
 import httpx
@@ -8,15 +10,23 @@ import httpx
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 from qdrant_client import AsyncQdrantClient
-from qdrant_client.http.models import PointStruct, Filter, ScoredPoint, Batch
+from qdrant_client.http.models import PointStruct, Filter, ScoredPoint, Batch, ScalarType, PayloadSchemaType
 from qdrant_client.models import PointIdsList
 
-from src.core.memory.long_term import LongTermMemory, LM_STUDIO_EMBEDDING_URL, QDRANT_COLLECTION_NAME, EMBEDDING_DIMENSION
+from src.core.memory import long_term
+from src.core.memory.long_term import LongTermMemory, LM_STUDIO_EMBEDDING_URL, QDRANT_COLLECTION_NAME, QDRANT_PAYLOAD_INDEXES, EMBEDDING_DIMENSION
 from src.core.utils.exceptions import EmbeddingGenerationError
 from src.infrastructure.database.models import Memory as DBMemory
 
 # --- Fixtures ---
 
+@pytest.fixture(autouse=True)
+def clear_embedding_cache():
+    """Keeps the process-wide embedding cache from leaking between tests."""
+    long_term._embedding_cache.clear()
+    yield
+    long_term._embedding_cache.clear()
+
 @pytest.fixture
 def mock_db_session():
     """Mocks an SQLAlchemy AsyncSession."""
@@ -32,7 +42,7 @@ def mock_qdrant_client():
     client = AsyncMock()
     client.recreate_collection.return_value = None
     client.upsert.return_value = None
-    client.delete_points.return_value = None
+    client.delete.return_value = None
     return client
 
 @pytest.fixture
@@ -107,6 +117,39 @@ async def test_generate_embedding_success(long_term_memory, mock_httpx_async_cli
         timeout=60
     )
 
+@pytest.mark.asyncio
+async def test_generate_embedding_cache_hit(long_term_memory, mock_httpx_async_client):
+    mock_response = MagicMock()
+    mock_response.json.return_value = {
+        "data": [{"embedding": [0.1] * EMBEDDING_DIMENSION}]
+    }
+    mock_response.raise_for_status.return_value = None
+    mock_httpx_async_client.return_value.__aenter__.return_value.post.return_value = mock_response
+
+    first = await long_term_memory._generate_embedding("repeated text")
+    second = await long_term_memory._generate_embedding("repeated text")
+
+    assert first == second
+    mock_httpx_async_client.return_value.__aenter__.return_value.post.assert_called_once()
+
+@pytest.mark.asyncio
+async def test_generate_embedding_cache_evicts_oldest(long_term_memory, mock_httpx_async_client, monkeypatch):
+    monkeypatch.setattr(long_term, "EMBEDDING_CACHE_SIZE", 2)
+    mock_response = MagicMock()
+    mock_response.json.return_value = {
+        "data": [{"embedding": [0.1] * EMBEDDING_DIMENSION}]
+    }
+    mock_response.raise_for_status.return_value = None
+    post = mock_httpx_async_client.return_value.__aenter__.return_value.post
+    post.return_value = mock_response
+
+    for text in ("a", "b", "c", "a"):
+        await long_term_memory._generate_embedding(text)
+
+    # "a" was evicted by "c", so it is fetched a second time
+    assert post.call_count == 4
+    assert len(long_term._embedding_cache) == 2
+
 @pytest.mark.asyncio
 async def test_generate_embedding_empty_text(long_term_memory):
     with pytest.raises(ValueError, match="Text for embedding generation cannot be empty."):
@@ -162,6 +205,16 @@ async def test_store_success(long_term_memory, mock_db_session, mock_qdrant_clie
 
     # Assertions for Qdrant upsert
     mock_qdrant_client.recreate_collection.assert_awaited_once() # Called during _ensure_qdrant_collection_exists
+    collection_args = mock_qdrant_client.recreate_collection.call_args[1]
+    assert collection_args["vectors_config"].on_disk is True
+    assert collection_args["quantization_config"].scalar.type == ScalarType.INT8
+    indexed_fields = {
+        c[1]["field_name"]: c[1]["field_schema"]
+        for c in mock_qdrant_client.create_payload_index.call_args_list
+    }
+    assert indexed_fields["user_id"] == PayloadSchemaType.KEYWORD
+    assert indexed_fields["agent_name"] == PayloadSchemaType.KEYWORD
+    assert "created_at" not in indexed_fields # No filter reads it
     mock_qdrant_client.upsert.assert_awaited_once()
     upsert_args = mock_qdrant_client.upsert.call_args[1]
     assert upsert_args["collection_name"] == QDRANT_COLLECTION_NAME
@@ -186,7 +239,9 @@ async def test_store_success(long_term_memory, mock_db_session, mock_qdrant_clie
     assert added_db_memory.metadata == json.dumps(metadata)
     assert isinstance(added_db_memory.last_accessed_at, datetime)
     assert added_db_memory.last_accessed_at.tzinfo == timezone.utc
+    assert "created_at" not in point.payload # Cleanup works from PostgreSQL's created_at
 
+    mock_db_session.flush.assert_awaited_once()
     mock_db_session.commit.assert_awaited_once()
     mock_db_session.refresh.assert_awaited_once_with(added_db_memory)
 
@@ -194,6 +249,14 @@ async def test_store_success(long_term_memory, mock_db_session, mock_qdrant_clie
     assert stored_memory.id is not None
     assert stored_memory.qdrant_id is not None
 
+@pytest.mark.asyncio
+async def test_ensure_qdrant_collection_exists_runs_once(long_term_memory, mock_qdrant_client):
+    await long_term_memory._ensure_qdrant_collection_exists()
+    await long_term_memory._ensure_qdrant_collection_exists()
+
+    mock_qdrant_client.recreate_collection.assert_awaited_once()
+    assert mock_qdrant_client.create_payload_index.await_count == len(QDRANT_PAYLOAD_INDEXES)
+
 @pytest.mark.asyncio
 async def test_store_embedding_generation_failure(long_term_memory, mock_httpx_async_client):
     mock_httpx_async_client.return_value.__aenter__.return_value.post.side_effect = EmbeddingGenerationError("Test failure")
@@ -202,7 +265,7 @@ async def test_store_embedding_generation_failure(long_term_memory, mock_httpx_a
         await long_term_memory.store("content", "type")
 
 @pytest.mark.asyncio
-async def test_store_qdrant_upsert_failure(long_term_memory, mock_qdrant_client, mock_httpx_async_client):
+async def test_store_qdrant_upsert_failure(long_term_memory, mock_db_session, mock_qdrant_client, mock_httpx_async_client):
     mock_embedding = [0.3] * EMBEDDING_DIMENSION
     embedding_response = MagicMock()
     embedding_response.status_code = 200
@@ -215,6 +278,68 @@ async def test_store_qdrant_upsert_failure(long_term_memory, mock_qdrant_client,
     with pytest.raises(Exception, match="Qdrant error"):
         await long_term_memory.store("content", "type")
 
+    # The concurrent PostgreSQL insert is rolled back rather than committed
+    mock_db_session.rollback.assert_awaited_once()
+    mock_db_session.commit.assert_not_awaited()
+    mock_qdrant_client.delete.assert_not_awaited() # Nothing was written to Qdrant
+
+@pytest.mark.asyncio
+async def test_store_db_insert_failure(long_term_memory, mock_db_session, mock_qdrant_client, mock_httpx_async_client):
+    mock_embedding = [0.3] * EMBEDDING_DIMENSION
+    embedding_response = MagicMock()
+    embedding_response.status_code = 200
+    embedding_response.json.return_value = {"data": [{"embedding": mock_embedding}]}
+    embedding_response.raise_for_status.return_value = None
+    mock_httpx_async_client.return_value.__aenter__.return_value.post.return_value = embedding_response
+
+    mock_db_session.flush.side_effect = Exception("DB error")
+
+    with pytest.raises(Exception, match="DB error"):
+        await long_term_memory.store("content", "type")
+
+    mock_qdrant_client.upsert.assert_awaited_once()
+    mock_db_session.rollback.assert_awaited_once()
+    mock_db_session.commit.assert_not_awaited()
+
+    # The embedding written to Qdrant is removed again, not left orphaned
+    point_id = mock_qdrant_client.upsert.call_args.kwargs["points"][0].id
+    mock_qdrant_client.delete.assert_awaited_once_with(
+        collection_name=QDRANT_COLLECTION_NAME,
+        points_selector=PointIdsList(points=[point_id]),
+    )
+
+@pytest.mark.asyncio
+async def test_store_db_failure_waits_for_pending_upsert(long_term_memory, mock_db_session, mock_qdrant_client, mock_httpx_async_client):
+    mock_embedding = [0.3] * EMBEDDING_DIMENSION
+    embedding_response = MagicMock()
+    embedding_response.status_code = 200
+    embedding_response.json.return_value = {"data": [{"embedding": mock_embedding}]}
+    embedding_response.raise_for_status.return_value = None
+    mock_httpx_async_client.return_value.__aenter__.return_value.post.return_value = embedding_response
+
+    events = []
+
+    async def slow_upsert(**kwargs):
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            events.append("upsert cancelled")
+            raise
+
+    async def record_rollback():
+        events.append("rollback")
+
+    mock_qdrant_client.upsert.side_effect = slow_upsert
+    mock_db_session.rollback.side_effect = record_rollback
+    mock_db_session.flush.side_effect = Exception("DB error")
+
+    with pytest.raises(Exception, match="DB error"):
+        await long_term_memory.store("content", "type")
+
+    # The cancelled upsert has settled before the session is rolled back
+    assert events == ["upsert cancelled", "rollback"]
+    mock_qdrant_client.delete.assert_awaited_once()
+
 
 @pytest.mark.asyncio
 async def test_retrieve_success(long_term_memory, mock_db_session, mock_qdrant_client, mock_httpx_async_client):
@@ -263,6 +388,7 @@ async def test_retrieve_success(long_term_memory, mock_db_session, mock_qdrant_c
     assert search_args["query_filter"].must[0].key == "user_id"
     assert search_args["query_filter"].must[0].match.value == str(long_term_memory.user_id)
     assert search_args["limit"] == 1
+    assert search_args["search_params"].quantization.rescore is True
 
     # Assertions for DB retrieval
     mock_db_session.execute.assert_awaited_once()
@@ -388,64 +514,47 @@ async def test_get_recent_db_failure(long_term_memory, mock_db_session):
 
 @pytest.mark.asyncio
 async def test_update_access_success(long_term_memory, mock_db_session):
-    user_id = long_term_memory.user_id
     memory_id = uuid.uuid4()
-    original_accessed_count = 5
-    original_last_accessed = datetime.now(timezone.utc) - timedelta(days=7)
-    
-    # Mock DB session to return a memory
-    mock_memory = create_mock_db_memory(
-        user_id=user_id,
-        agent_name="Agent1",
-        content="Test content",
-        id=memory_id,
-        accessed_count=original_accessed_count,
-        last_accessed_at=original_last_accessed
-    )
-    mock_db_session.execute.return_value.scalar_one_or_none.return_value = mock_memory
-    
+    mock_db_session.execute.return_value.first.return_value = (memory_id,)
+
     await long_term_memory.update_access(memory_id)
-    
+
+    # A single atomic UPDATE ... RETURNING, no preceding SELECT
     mock_db_session.execute.assert_awaited_once()
-    # Check if the memory object was updated
-    assert mock_memory.accessed_count == original_accessed_count + 1
-    assert mock_memory.last_accessed_at > original_last_accessed # Ensure timestamp was updated
-    assert mock_memory.last_accessed_at.tzinfo == timezone.utc # Check timezone awareness
+    stmt = mock_db_session.execute.call_args[0][0]
+    compiled = str(stmt)
+    assert compiled.startswith("UPDATE memories SET")
+    assert "accessed_count=(coalesce(memories.accessed_count" in compiled
+    assert "RETURNING memories.id" in compiled
+    params = stmt.compile().params
+    assert params["id_1"] == memory_id
+    assert params["user_id_1"] == long_term_memory.user_id
+    assert params["last_accessed_at"].tzinfo == timezone.utc
     mock_db_session.commit.assert_awaited_once()
-    mock_db_session.refresh.assert_awaited_once_with(mock_memory)
+    mock_db_session.refresh.assert_not_awaited()
 
 
 @pytest.mark.asyncio
 async def test_update_access_memory_not_found(long_term_memory, mock_db_session):
     memory_id = uuid.uuid4()
-    mock_db_session.execute.return_value.scalar_one_or_none.return_value = None # Memory not found
-    
+    mock_db_session.execute.return_value.first.return_value = None # Memory not found
+
     await long_term_memory.update_access(memory_id)
-    
+
     mock_db_session.execute.assert_awaited_once()
     mock_db_session.commit.assert_not_awaited()
-    mock_db_session.refresh.assert_not_awaited()
 
 
 @pytest.mark.asyncio
 async def test_update_access_db_failure(long_term_memory, mock_db_session):
-    user_id = long_term_memory.user_id
     memory_id = uuid.uuid4()
-    
-    mock_memory = create_mock_db_memory(
-        user_id=user_id,
-        agent_name="Agent1",
-        content="Test content",
-        id=memory_id
-    )
-    mock_db_session.execute.return_value.scalar_one_or_none.return_value = mock_memory
+    mock_db_session.execute.return_value.first.return_value = (memory_id,)
     mock_db_session.commit.side_effect = Exception("DB update error")
-    
+
     await long_term_memory.update_access(memory_id)
-    
+
     mock_db_session.execute.assert_awaited_once()
     mock_db_session.commit.assert_awaited_once()
-    mock_db_session.refresh.assert_not_awaited() # Refresh won't be called if commit fails
 
 
 @pytest.mark.asyncio
@@ -566,132 +675,95 @@ async def test_calculate_importance_llm_returns_non_int(long_term_memory, mock_d
 
 @pytest.mark.asyncio
 async def test_cleanup_old_memories_success(long_term_memory, mock_db_session, mock_qdrant_client):
-    user_id = long_term_memory.user_id
-    
-    # Create old and new memories
-    now = datetime.now(timezone.utc)
     old_memory_qdrant_id = uuid.uuid4()
-    old_memory = create_mock_db_memory(
-        user_id=user_id,
-        agent_name="Agent1",
-        content="Old content",
-        qdrant_id=old_memory_qdrant_id,
-        created_at=now - timedelta(days=10)
-    )
-    new_memory = create_mock_db_memory(
-        user_id=user_id,
-        agent_name="Agent1",
-        content="New content",
-        created_at=now - timedelta(days=1)
-    )
-    
-    # Mock DB session to return old memory
-    mock_db_session.execute.return_value.scalars.return_value.all.return_value = [old_memory]
-    
-    # Mock Qdrant delete_points success
-    mock_qdrant_client.delete_points.return_value = {"status": "ok"}
-    
+    mock_db_session.execute.return_value.scalars.return_value.all.return_value = [old_memory_qdrant_id]
+
     await long_term_memory.cleanup_old_memories(max_age_days=5)
-    
-    # Assert DB query for old memories (select statement)
-    first_execute_call_args = mock_db_session.execute.call_args_list[0][0][0]
-    assert "FROM memories" in str(first_execute_call_args)
-    assert "WHERE memories.user_id" in str(first_execute_call_args)
-    assert "memories.created_at <" in str(first_execute_call_args)
-
-    # Assert Qdrant delete_points call
-    mock_qdrant_client.delete_points.assert_awaited_once_with(
+
+    # Assert a single DB delete statement returning the Qdrant ids, no preceding select
+    mock_db_session.execute.assert_awaited_once()
+    delete_stmt = mock_db_session.execute.call_args[0][0]
+    compiled = str(delete_stmt)
+    assert "DELETE FROM memories" in compiled
+    assert "memories.user_id" in compiled
+    assert "memories.created_at <" in compiled
+    assert "RETURNING memories.qdrant_id" in compiled
+    threshold = delete_stmt.compile().params["created_at_1"]
+    assert threshold == pytest.approx(datetime.now(timezone.utc) - timedelta(days=5), abs=timedelta(seconds=5))
+
+    # Assert Qdrant delete uses the returned ids
+    mock_qdrant_client.delete.assert_awaited_once_with(
         collection_name=QDRANT_COLLECTION_NAME,
-        points_selector={"points": [str(old_memory_qdrant_id)]}
+        points_selector=PointIdsList(points=[str(old_memory_qdrant_id)])
     )
 
-    # Assert DB delete call (second execute call)
-    second_execute_call_args = mock_db_session.execute.call_args_list[1][0][0]
-    assert "DELETE FROM memories" in str(second_execute_call_args)
-    assert "WHERE memories.id IN" in str(second_execute_call_args)
-    assert mock_db_session.execute.call_count == 2 # Ensure both select and delete were called
-
     mock_db_session.commit.assert_awaited_once()
 
 
 @pytest.mark.asyncio
 async def test_cleanup_old_memories_no_old_memories(long_term_memory, mock_db_session, mock_qdrant_client):
     mock_db_session.execute.return_value.scalars.return_value.all.return_value = [] # No old memories found
-    
+
     await long_term_memory.cleanup_old_memories(max_age_days=5)
-    
+
     mock_db_session.execute.assert_awaited_once()
-    mock_qdrant_client.delete_points.assert_not_awaited()
-    mock_db_session.commit.assert_not_awaited()
+    mock_qdrant_client.delete.assert_not_awaited()
+    mock_db_session.commit.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_cleanup_old_memories_invalid_age(long_term_memory, mock_db_session, mock_qdrant_client):
+    await long_term_memory.cleanup_old_memories(max_age_days=0)
+
+    mock_qdrant_client.delete.assert_not_awaited()
+    mock_db_session.execute.assert_not_awaited()
 
 
 @pytest.mark.asyncio
 async def test_cleanup_old_memories_qdrant_failure(long_term_memory, mock_db_session, mock_qdrant_client):
-    user_id = long_term_memory.user_id
     old_memory_qdrant_id = uuid.uuid4()
-    old_memory = create_mock_db_memory(
-        user_id=user_id,
-        agent_name="Agent1",
-        content="Old content",
-        qdrant_id=old_memory_qdrant_id,
-        created_at=datetime.now(timezone.utc) - timedelta(days=10)
-    )
-    mock_db_session.execute.return_value.scalars.return_value.all.return_value = [old_memory]
-    
-    mock_qdrant_client.delete_points.side_effect = Exception("Qdrant delete error")
-    
+    mock_db_session.execute.return_value.scalars.return_value.all.return_value = [old_memory_qdrant_id]
+    mock_qdrant_client.delete.side_effect = Exception("Qdrant delete error")
+
     await long_term_memory.cleanup_old_memories(max_age_days=5)
-    
-    # Assert DB query for old memories (select statement)
-    first_execute_call_args = mock_db_session.execute.call_args_list[0][0][0]
-    assert "FROM memories" in str(first_execute_call_args)
-    assert "WHERE memories.user_id" in str(first_execute_call_args)
-    assert "memories.created_at <" in str(first_execute_call_args)
-
-    # Assert Qdrant delete_points call
-    mock_qdrant_client.delete_points.assert_awaited_once_with(
-        collection_name=QDRANT_COLLECTION_NAME,
-        points_selector={"points": [str(old_memory_qdrant_id)]}
-    )
 
-    # Assert DB delete call (second execute call)
-    second_execute_call_args = mock_db_session.execute.call_args_list[1][0][0]
-    assert "DELETE FROM memories" in str(second_execute_call_args)
-    assert "WHERE memories.id IN" in str(second_execute_call_args)
-    assert mock_db_session.execute.call_count == 2 # Ensure both select and delete were called
+    mock_qdrant_client.delete.assert_awaited_once()
 
-    # Even if Qdrant delete fails, DB delete should still be attempted for consistency
-    mock_db_session.commit.assert_awaited_once() # Commit will be attempted after DB delete 
+    # Even if Qdrant delete fails, the DB delete is still committed for consistency
+    mock_db_session.execute.assert_awaited_once()
+    mock_db_session.commit.assert_awaited_once()
 
 
 @pytest.mark.asyncio
 async def test_cleanup_old_memories_db_delete_failure(long_term_memory, mock_db_session, mock_qdrant_client):
-    user_id = long_term_memory.user_id
-    old_memory_qdrant_id = uuid.uuid4()
-    old_memory = create_mock_db_memory(
-        user_id=user_id,
-        agent_name="Agent1",
-        content="Old content",
-        qdrant_id=old_memory_qdrant_id,
-        created_at=datetime.now(timezone.utc) - timedelta(days=10)
-    )
-    # Mock DB session to return old memory for the initial select
-    mock_db_session.execute.return_value.scalars.return_value.all.return_value = [old_memory]
-    
-    mock_qdrant_client.delete_points.return_value = {"status": "ok"}
-
-    # Configure side_effect for the second call to execute (the delete statement)
-    # The first call (select statement) will successfully return.
-    # The second call (for the delete statement) should raise the exception.
-    mock_db_session.execute.side_effect = [
-        MagicMock(scalars=MagicMock(return_value=MagicMock(all=MagicMock(return_value=[old_memory])))), # First call (select)
-        Exception("DB delete error") # Second call (delete)
-    ]
-    
+    mock_db_session.execute.side_effect = Exception("DB delete error")
+
     await long_term_memory.cleanup_old_memories(max_age_days=5)
-    
-    assert mock_db_session.execute.call_count == 2 # One for select, one for delete
-    mock_qdrant_client.delete_points.assert_awaited_once()
+
+    mock_db_session.execute.assert_awaited_once()
+    mock_qdrant_client.delete.assert_not_awaited() # Nothing known to delete if the DB delete fails
     mock_db_session.commit.assert_not_awaited() # Commit should not happen if DB delete fails
+    mock_db_session.rollback.assert_awaited_once()
 
 
+@pytest.mark.asyncio
+async def test_cleanup_old_memories_commits_before_deleting_embeddings(long_term_memory, mock_db_session, mock_qdrant_client):
+    mock_db_session.execute.return_value.scalars.return_value.all.return_value = [uuid.uuid4()]
+    events = []
+    mock_db_session.commit.side_effect = lambda: events.append("commit")
+    mock_qdrant_client.delete.side_effect = lambda **kwargs: events.append("qdrant delete")
+
+    await long_term_memory.cleanup_old_memories(max_age_days=5)
+
+    assert events == ["commit", "qdrant delete"]
+
+
+@pytest.mark.asyncio
+async def test_cleanup_old_memories_db_commit_failure(long_term_memory, mock_db_session, mock_qdrant_client):
+    mock_db_session.execute.return_value.scalars.return_value.all.return_value = [uuid.uuid4()]
+    mock_db_session.commit.side_effect = Exception("DB commit error")
+
+    await long_term_memory.cleanup_old_memories(max_age_days=5)
+
+    mock_db_session.rollback.assert_awaited_once()
+    mock_qdrant_client.delete.assert_not_awaited() # The rows are still there, so their embeddings stay too
@@ -1,17 +1,23 @@
+import asyncio
 import pytest
 from unittest.mock import AsyncMock, MagicMock
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
 import json
 
-from src.core.memory import Message, ConversationMemory
-from src.infrastructure.cache.redis_client import RedisClient
+from src.core.memory import Message, ConversationMemory, TokenCounter
+from src.core.memory import short_term
+from src.core.memory.short_term import MESSAGE_TOKEN_OVERHEAD
+from src.infrastructure.cache.redis_client import RedisClient, RedisClientError
+from pydantic_ai.messages import ModelMessagesTypeAdapter, ModelRequest, ModelResponse, TextPart, UserPromptPart
 
 # Helper to create a mock RedisClient
 @pytest.fixture
 def mock_redis_client():
     mock = AsyncMock(spec=RedisClient)
+    mock.lrange.return_value = []
     mock.get.return_value = None
-    mock.set.return_value = None
+    mock.append_list.return_value = 1
+    mock.replace_list.return_value = 0
     return mock
 
 @pytest.fixture
@@ -48,14 +54,17 @@ async def test_add_message(conversation_memory, mock_redis_client):
     assert conversation_memory.messages[0].role == "user"
     assert conversation_memory.messages[0].content == "Test content"
     assert isinstance(conversation_memory.messages[0].timestamp, datetime)
-    mock_redis_client.set.assert_called_once() # Should call save_to_redis
+    await conversation_memory.flush()
+    mock_redis_client.append_list.assert_called_once() # Only the new message is appended
+    mock_redis_client.replace_list.assert_not_called()
 
 @pytest.mark.asyncio
 async def test_add_message_with_metadata(conversation_memory, mock_redis_client):
     metadata = {"source": "test_source"}
     await conversation_memory.add_message("user", "Content with meta", metadata=metadata)
     assert conversation_memory.messages[0].metadata == metadata
-    mock_redis_client.set.assert_called_once()
+    await conversation_memory.flush()
+    mock_redis_client.append_list.assert_called_once()
 
 @pytest.mark.asyncio
 async def test_add_message_validation(conversation_memory):
@@ -88,6 +97,22 @@ async def test_get_messages(populated_memory):
     last_more_than_exist = memory.get_messages(last_n_messages=5)
     assert len(last_more_than_exist) == 3
 
+@pytest.mark.asyncio
+async def test_get_messages_returns_shared_snapshot_until_mutation(populated_memory):
+    memory = await populated_memory()
+    first = memory.get_messages()
+    assert isinstance(first, tuple)
+    assert memory.get_messages() is first # No copy on repeated reads
+
+    await memory.add_message("assistant", "Fine, thanks")
+    second = memory.get_messages()
+    assert second is not first
+    assert len(first) == 3 # Earlier snapshot is unaffected
+    assert second[-1].content == "Fine, thanks"
+
+    memory.truncate_to_fit(0)
+    assert memory.get_messages() == ()
+
 @pytest.mark.asyncio
 async def test_get_context_string_default(populated_memory):
     memory = await populated_memory()
@@ -116,6 +141,12 @@ async def test_get_context_string_xml(populated_memory):
     assert "<system>\n  Special chars: &lt; &gt; &amp;\n</system>" in context
 
 
+@pytest.mark.asyncio
+async def test_get_context_string_unsupported_format_uses_default(populated_memory):
+    memory = await populated_memory()
+    assert memory.get_context_string(format="yaml") == memory.get_context_string()
+
+
 @pytest.mark.asyncio
 async def test_get_context_string_last_n_messages(populated_memory):
     memory = await populated_memory()
@@ -126,12 +157,30 @@ async def test_get_context_string_last_n_messages(populated_memory):
 @pytest.mark.asyncio
 async def test_count_tokens(populated_memory):
     memory = await populated_memory()
-    # "Hello" (5) + "Hi there!" (9) + "How are you?" (12) + "user" (4)*2 + "assistant" (9) = 39 chars
-    # APPROX_CHARS_PER_TOKEN = 4
-    # 39 // 4 = 9 (approx)
-    expected_tokens = (len("user") + len("Hello") + len("assistant") + len("Hi there!") + len("user") + len("How are you?")) // 4
+    counter = TokenCounter()
+    # Each message costs its content tokens plus a fixed role-framing overhead
+    expected_tokens = sum(
+        counter.count_tokens(content) + MESSAGE_TOKEN_OVERHEAD
+        for content in ("Hello", "Hi there!", "How are you?")
+    )
     assert memory.count_tokens() == expected_tokens
 
+@pytest.mark.asyncio
+async def test_count_tokens_encodes_each_message_once(populated_memory, monkeypatch):
+    counter = short_term._get_token_counter()
+    calls = []
+    original_count_tokens = counter.count_tokens
+    monkeypatch.setattr(counter, "count_tokens", lambda text: calls.append(text) or original_count_tokens(text))
+    memory = await populated_memory()
+    assert len(calls) == 3 # Counted once, when each message was added
+
+    first = memory.count_tokens()
+    second = memory.count_tokens()
+    memory.truncate_to_fit(first)
+
+    assert first == second
+    assert len(calls) == 3
+
 @pytest.mark.asyncio
 async def test_truncate_to_fit(conversation_memory):
     # Add messages that will exceed a small token limit
@@ -143,11 +192,12 @@ async def test_truncate_to_fit(conversation_memory):
     initial_tokens = conversation_memory.count_tokens()
     assert len(conversation_memory.messages) == 20
     
-    # Define a max_tokens that forces truncation
-    # Each message content + role is roughly (8+4)/4 = 3 tokens. 20 messages * 3 tokens = 60 tokens
-    # Let's aim for 3 messages (user, assistant, user) = 9 tokens approx
-    max_tokens = ((len("user") + len("message 8")) + (len("assistant") + len("response 8")) + (len("user") + len("message 9"))) // 4 
-    max_tokens += 2 # Give a small buffer
+    # Define a max_tokens that fits exactly the last three messages (user, assistant, user)
+    counter = TokenCounter()
+    max_tokens = sum(
+        counter.count_tokens(content) + MESSAGE_TOKEN_OVERHEAD
+        for content in ("response 8", "message 9", "response 9")
+    )
 
     conversation_memory.truncate_to_fit(max_tokens)
     
@@ -170,27 +220,41 @@ async def test_truncate_to_fit(conversation_memory):
     assert conversation_memory.count_tokens() == initial_tokens
     assert len(conversation_memory.messages) == 1
 
+@pytest.mark.asyncio
+async def test_truncate_to_fit_stops_at_first_message_that_does_not_fit(conversation_memory):
+    await conversation_memory.add_message("user", "old")
+    await conversation_memory.add_message("assistant", "a much longer reply " * 20)
+    await conversation_memory.add_message("user", "new")
+    messages = conversation_memory.messages
+    budget = messages[0].token_count + messages[2].token_count
+
+    conversation_memory.truncate_to_fit(budget)
+
+    # The oversized middle message ends the window even though the oldest would fit
+    assert [m.content for m in conversation_memory.messages] == ["new"]
+
+    conversation_memory.truncate_to_fit(conversation_memory.messages[0].token_count - 1)
+    assert conversation_memory.messages == []
+
 @pytest.mark.asyncio
 async def test_save_and_load_from_redis(mock_redis_client):
     memory = ConversationMemory(session_id="test_redis_session", redis=mock_redis_client)
     await memory.add_message("user", "First message")
     await memory.add_message("assistant", "Second message")
+    await memory.flush()
 
-    # Simulate saving to Redis
-    assert mock_redis_client.set.called
-
-    # Get the value that was supposedly set
-    # The set call happens inside add_message, so we need to inspect the call arguments
-    set_args, _ = mock_redis_client.set.call_args
-    redis_key = set_args[0]
-    stored_json = set_args[1]
+    # Messages added back to back are appended to the Redis list in one write
+    mock_redis_client.append_list.assert_called_once()
+    call_key, *stored_entries = mock_redis_client.append_list.call_args.args
+    assert call_key == f"{memory.REDIS_KEY_PREFIX}test_redis_session"
+    assert [entry["content"] for entry in stored_entries] == ["First message", "Second message"]
 
     # Clear current messages in memory to simulate loading into a fresh object
     memory.messages = []
     assert len(memory.messages) == 0
 
-    # Mock RedisClient.get to return the stored JSON
-    mock_redis_client.get.return_value = stored_json
+    # Mock RedisClient.lrange to return the stored entries
+    mock_redis_client.lrange.return_value = stored_entries
 
     # Load from Redis
     await memory.load_from_redis()
@@ -201,18 +265,245 @@ async def test_save_and_load_from_redis(mock_redis_client):
     assert memory.messages[1].role == "assistant"
     assert memory.messages[1].content == "Second message"
 
+@pytest.mark.asyncio
+async def test_add_message_writes_are_coalesced_without_explicit_flush(mock_redis_client):
+    memory = ConversationMemory(session_id="coalesce_session", redis=mock_redis_client)
+    await memory.add_message("user", "Question")
+    await memory.add_message("assistant", "Answer")
+    mock_redis_client.append_list.assert_not_called() # Deferred to the next loop iteration
+
+    await asyncio.sleep(0)
+    await asyncio.sleep(0)
+
+    mock_redis_client.append_list.assert_called_once()
+    _, *values = mock_redis_client.append_list.call_args.args
+    assert [v["content"] for v in values] == ["Question", "Answer"]
+
+    await memory.flush() # Nothing left to write
+    mock_redis_client.append_list.assert_called_once()
+
+@pytest.mark.asyncio
+async def test_truncate_is_applied_with_ltrim_on_next_add(mock_redis_client):
+    memory = ConversationMemory(session_id="trim_session", redis=mock_redis_client)
+    await memory.add_message("user", "Message one")
+    await memory.add_message("assistant", "Message two")
+    await memory.add_message("user", "Message three")
+    await memory.flush()
+
+    memory.truncate_to_fit(short_term._message_tokens(memory.messages[-1]))
+    assert len(memory.messages) == 1
+    assert mock_redis_client.append_list.call_count == 1
+
+    await memory.add_message("assistant", "Message four")
+    await memory.flush()
+
+    key = f"{memory.REDIS_KEY_PREFIX}trim_session"
+    call = mock_redis_client.append_list.call_args
+    assert call.args[0] == key
+    assert [v["content"] for v in call.args[1:]] == ["Message four"]
+    assert call.kwargs == {"trim_start": 2}
+
+    # The trim is only applied once
+    await memory.add_message("user", "Message five")
+    await memory.flush()
+    assert mock_redis_client.append_list.call_args.kwargs == {"trim_start": 0}
+
+@pytest.mark.asyncio
+async def test_truncate_drops_queued_messages_instead_of_trimming_them(mock_redis_client):
+    stored = []
+
+    async def append_list(key, *values, trim_start=0):
+        del stored[:trim_start]
+        stored.extend(values)
+        return len(stored)
+
+    mock_redis_client.append_list.side_effect = append_list
+
+    memory = ConversationMemory(session_id="queued_trim_session", redis=mock_redis_client)
+    await memory.add_message("user", "a")
+    await memory.add_message("assistant", "b")
+    await memory.flush()
+
+    await memory.add_message("user", "c" * 50)
+    await memory.add_message("assistant", "d" * 50)
+    await memory.add_message("user", "e")
+    memory.truncate_to_fit(10)
+    await memory.flush()
+
+    assert [m.content for m in memory.messages] == ["e"]
+    assert [v["content"] for v in stored] == ["e"]
+
+@pytest.mark.asyncio
+async def test_failed_append_falls_back_to_full_save(mock_redis_client):
+    mock_redis_client.append_list.side_effect = [RedisClientError("connection reset", operation="append_list"), 2]
+    memory = ConversationMemory(session_id="retry_session", redis=mock_redis_client)
+    await memory.add_message("user", "First")
+    await memory.flush()
+    mock_redis_client.replace_list.assert_not_called()
+
+    await memory.add_message("assistant", "Second")
+    await memory.flush()
+
+    # The append isn't replayed; the whole list is rewritten instead
+    assert mock_redis_client.append_list.call_count == 1
+    _, *values = mock_redis_client.replace_list.call_args.args
+    assert [v["content"] for v in values] == ["First", "Second"]
+
+
+@pytest.mark.asyncio
+async def test_failed_load_triggers_full_save(mock_redis_client):
+    mock_redis_client.lrange.side_effect = Exception("Connection reset by peer")
+    memory = ConversationMemory(session_id="broken_session", redis=mock_redis_client)
+    await memory.load_from_redis()
+    assert memory.messages == []
+
+    await memory.add_message("user", "Fresh start")
+    await memory.flush()
+
+    mock_redis_client.append_list.assert_not_called()
+    _, *values = mock_redis_client.replace_list.call_args.args
+    assert [v["content"] for v in values] == ["Fresh start"]
+
+    # Subsequent messages go back to appending
+    await memory.add_message("assistant", "Welcome back")
+    await memory.flush()
+    mock_redis_client.append_list.assert_called_once()
+
+@pytest.mark.asyncio
+async def test_load_migrates_legacy_json_string(mock_redis_client):
+    legacy_entries = [
+        {"role": "user", "content": "Hello", "timestamp": "2024-01-02T03:04:05+00:00", "metadata": {}},
+        {"role": "assistant", "content": "Hi there!", "timestamp": "2024-01-02T03:04:06+00:00", "metadata": {}},
+    ]
+    mock_redis_client.lrange.side_effect = RedisClientError(
+        "Redis operation 'lrange' failed: WRONGTYPE Operation against a key holding the wrong kind of value",
+        operation="lrange",
+    )
+    memory = ConversationMemory(session_id="legacy_session", redis=mock_redis_client)
+    key = f"{memory.REDIS_KEY_PREFIX}legacy_session"
+    mock_redis_client.get.side_effect = lambda k: legacy_entries if k == key else None
+    await memory.load_from_redis()
+
+    assert [m.content for m in memory.messages] == ["Hello", "Hi there!"]
+    mock_redis_client.replace_list.assert_called_once_with(key, *legacy_entries)
+
+    # History is kept: new messages are appended to the converted list
+    await memory.add_message("user", "Still here")
+    await memory.flush()
+    mock_redis_client.replace_list.assert_called_once()
+    mock_redis_client.append_list.assert_called_once()
+
+@pytest.mark.asyncio
+async def test_append_migrates_legacy_json_string(mock_redis_client):
+    legacy_entries = [{"role": "user", "content": "Hello", "timestamp": "2024-01-02T03:04:05+00:00", "metadata": {}}]
+    mock_redis_client.append_list.side_effect = [
+        RedisClientError("Redis operation 'append_list' failed: WRONGTYPE", operation="append_list"),
+        2,
+    ]
+    mock_redis_client.get.return_value = legacy_entries
+    memory = ConversationMemory(session_id="legacy_session", redis=mock_redis_client)
+    await memory.add_message("assistant", "Hi there!")
+    await memory.flush()
+
+    key = f"{memory.REDIS_KEY_PREFIX}legacy_session"
+    mock_redis_client.replace_list.assert_called_once_with(key, *legacy_entries)
+    assert mock_redis_client.append_list.call_count == 2
+    assert not memory._needs_full_save
+
+@pytest.mark.asyncio
+async def test_load_from_redis_trusted_restores_fields(mock_redis_client):
+    timestamp = datetime(2024, 1, 2, 3, 4, 5, tzinfo=timezone.utc)
+    mock_redis_client.lrange.return_value = [
+        {"role": "user", "content": "Stored", "timestamp": "2024-01-02T03:04:05Z", "metadata": {"k": "v"}},
+    ]
+    memory = ConversationMemory(session_id="trusted_session", redis=mock_redis_client)
+
+    await memory.load_from_redis()
+
+    assert len(memory.messages) == 1
+    assert isinstance(memory.messages[0], Message)
+    assert memory.messages[0].content == "Stored"
+    assert memory.messages[0].timestamp == timestamp
+    assert memory.messages[0].metadata == {"k": "v"}
+
+@pytest.mark.asyncio
+async def test_token_count_is_persisted_and_reused(mock_redis_client, monkeypatch):
+    memory = ConversationMemory(session_id="token_session", redis=mock_redis_client)
+    await memory.add_message("user", "Count me once")
+    await memory.flush()
+    stored_entry = mock_redis_client.append_list.call_args.args[1]
+    assert stored_entry["token_count"] == memory.messages[0].token_count
+
+    counter = short_term._get_token_counter()
+    monkeypatch.setattr(counter, "count_tokens", lambda text: pytest.fail("history was re-tokenized"))
+    mock_redis_client.lrange.return_value = [stored_entry]
+    reloaded = ConversationMemory(session_id="token_session", redis=mock_redis_client)
+    await reloaded.load_from_redis()
+
+    assert reloaded.count_tokens() == stored_entry["token_count"]
+
+@pytest.mark.asyncio
+async def test_load_from_redis_counts_legacy_messages_in_one_batch(mock_redis_client, monkeypatch):
+    counter = short_term._get_token_counter()
+    batches = []
+    original_batch = counter.count_tokens_batch
+    monkeypatch.setattr(counter, "count_tokens_batch", lambda texts: batches.append(texts) or original_batch(texts))
+    monkeypatch.setattr(counter, "count_tokens", lambda text: pytest.fail("counted one message at a time"))
+    mock_redis_client.lrange.return_value = [
+        {"role": "user", "content": "Old one", "timestamp": "2024-01-02T03:04:05Z"},
+        {"role": "assistant", "content": "Old two", "timestamp": "2024-01-02T03:04:06Z", "token_count": 7},
+        {"role": "user", "content": "Old three", "timestamp": "2024-01-02T03:04:07Z"},
+    ]
+    memory = ConversationMemory(session_id="legacy_counts", redis=mock_redis_client)
+
+    await memory.load_from_redis()
+
+    assert batches == [["Old one", "Old three"]]
+    assert memory.messages[1].token_count == 7
+    assert memory.messages[0].token_count == original_batch(["Old one"])[0] + MESSAGE_TOKEN_OVERHEAD
+
+@pytest.mark.asyncio
+async def test_load_from_redis_untrusted_validates(mock_redis_client):
+    mock_redis_client.lrange.return_value = [
+        {"role": "user", "content": 123, "timestamp": "2024-01-02T03:04:05Z"},
+    ]
+    memory = ConversationMemory(session_id="untrusted_session", redis=mock_redis_client)
+
+    await memory.load_from_redis(trusted=False)
+
+    assert memory.messages == [] # Invalid content type is rejected and memory cleared
+
+@pytest.mark.asyncio
+async def test_add_model_messages_serializes_only_new_messages(mock_redis_client, monkeypatch):
+    memory = ConversationMemory(session_id="model_session", redis=mock_redis_client)
+    first = [ModelRequest(parts=[UserPromptPart(content="Hi")]), ModelResponse(parts=[TextPart(content="Hello")])]
+    second = [ModelRequest(parts=[UserPromptPart(content="Again")])]
+
+    dumped = []
+    original_fragment = short_term._model_message_fragment
+    monkeypatch.setattr(short_term, "_model_message_fragment", lambda mm: dumped.append(mm) or original_fragment(mm))
+    await memory.add_model_messages(first)
+    await memory.add_model_messages(second)
+    await memory.flush()
+
+    assert dumped == first + second # Each message serialized exactly once
+    key, stored = mock_redis_client.set.call_args.args
+    assert key == f"{memory.REDIS_MODEL_KEY_PREFIX}model_session"
+    assert list(ModelMessagesTypeAdapter.validate_json(stored)) == first + second
+
 @pytest.mark.asyncio
 async def test_load_from_redis_no_data(mock_redis_client):
     memory = ConversationMemory(session_id="new_session", redis=mock_redis_client)
-    mock_redis_client.get.return_value = None # Simulate no data in Redis
+    mock_redis_client.lrange.return_value = [] # Simulate no data in Redis
     await memory.load_from_redis()
     assert len(memory.messages) == 0
-    mock_redis_client.get.assert_called_once_with(f"{memory.REDIS_KEY_PREFIX}new_session")
+    mock_redis_client.lrange.assert_called_once_with(f"{memory.REDIS_KEY_PREFIX}new_session")
+    mock_redis_client.get.assert_called_once_with(f"{memory.REDIS_MODEL_KEY_PREFIX}new_session")
 
 @pytest.mark.asyncio
 async def test_load_from_redis_invalid_data(mock_redis_client):
     memory = ConversationMemory(session_id="invalid_session", redis=mock_redis_client)
-    mock_redis_client.get.return_value = b"invalid json data"
+    mock_redis_client.lrange.return_value = ["invalid json data"]
     await memory.load_from_redis()
     assert len(memory.messages) == 0 # Should clear messages on error
     # Check if a warning or error was logged (can't assert directly without capturing logs)
@@ -0,0 +1,521 @@
+import asyncio
+import gzip
+import json
+
+import httpx
+import pytest
+
+from src.core.models import lmstudio_provider
+from src.core.models.lmstudio_provider import (
+    close_lmstudio_clients,
+    create_lmstudio_model,
+    create_lmstudio_model_async,
+    detect_lmstudio_model,
+    get_lmstudio_client_stats,
+    lmstudio_health_check,
+)
+from src.core.utils.config import LMStudioSettings
+from src.core.utils.exceptions import (
+    ModelError,
+    PermanentProviderError,
+    TransientProviderError,
+)
+
+BASE_URL = "http://lmstudio.test/v1"
+
+
+@pytest.fixture(autouse=True)
+async def reset_clients():
+    await close_lmstudio_clients()
+    lmstudio_provider._health_cache.clear()
+    lmstudio_provider._model_cache.clear()
+    lmstudio_provider._breakers.clear()
+    lmstudio_provider._detected_models.clear()
+    yield
+    await close_lmstudio_clients()
+    lmstudio_provider._health_cache.clear()
+    lmstudio_provider._model_cache.clear()
+    lmstudio_provider._breakers.clear()
+
+
+@pytest.fixture
+async def requests_seen():
+    """Install a shared client whose transport records requests and serves /models."""
+    seen = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        seen.append(request.url.path)
+        return httpx.Response(200, json={"data": [{"id": "local-model"}]})
+
+    lmstudio_provider._loop_clients()[(BASE_URL, "not-needed", 10)] = httpx.AsyncClient(
+        transport=httpx.MockTransport(handler)
+    )
+    return seen
+
+
+@pytest.mark.asyncio
+async def test_get_client_is_shared_per_endpoint():
+    client = lmstudio_provider._get_client(BASE_URL, "key", 10)
+
+    assert lmstudio_provider._get_client(BASE_URL, "key", 10) is client
+    assert lmstudio_provider._get_client(BASE_URL, "key", 30) is not client
+    assert lmstudio_provider._get_client(BASE_URL, "other-key", 10) is not client
+    assert lmstudio_provider._get_client("http://other.test/v1", "key", 10) is not client
+
+
+@pytest.mark.asyncio
+async def test_get_client_sends_api_key():
+    client = lmstudio_provider._get_client(BASE_URL, "key", 10)
+
+    assert client.headers["Authorization"] == "Bearer key"
+
+
+@pytest.mark.asyncio
+async def test_get_client_enables_http2():
+    client = lmstudio_provider._get_client(BASE_URL, "key", 10)
+
+    assert client._transport._pool._http2 is True
+
+
+@pytest.mark.asyncio
+async def test_shared_client_reuses_pooled_connection():
+    body = b'{"data": [{"id": "local-model"}]}'
+    connections = 0
+
+    async def serve(reader, writer):
+        nonlocal connections
+        connections += 1
+        try:
+            while True:
+                await reader.readuntil(b"\r\n\r\n")
+                writer.write(
+                    b"HTTP/1.1 200 OK\r\nContent-Type: application/json\r\n"
+                    b"Content-Length: %d\r\n\r\n%s" % (len(body), body)
+                )
+                await writer.drain()
+        except asyncio.IncompleteReadError:
+            writer.close()
+
+    server = await asyncio.start_server(serve, "127.0.0.1", 0)
+    base_url = f"http://127.0.0.1:{server.sockets[0].getsockname()[1]}/v1"
+    lmstudio_provider._pool_stats.pop(base_url, None)
+    try:
+        for _ in range(3):
+            assert await detect_lmstudio_model(base_url, force_refresh=True) == "local-model"
+    finally:
+        await close_lmstudio_clients()
+        server.close()
+        await server.wait_closed()
+
+    stats = get_lmstudio_client_stats()[base_url]
+    assert connections == 1
+    assert stats["requests"] == 3
+    assert stats["connections_opened"] == 1
+    assert stats["reuse_rate"] == pytest.approx(2 / 3)
+    assert stats["avg_latency_ms"] > 0
+
+
+@pytest.mark.asyncio
+async def test_get_client_replaces_closed_client():
+    client = lmstudio_provider._get_client(BASE_URL, "key", 10)
+    await client.aclose()
+
+    assert lmstudio_provider._get_client(BASE_URL, "key", 10) is not client
+
+
+def test_clients_are_not_shared_across_event_loops():
+    async def get_client():
+        return lmstudio_provider._get_client(BASE_URL, "key", 10)
+
+    first = asyncio.run(get_client())
+    second = asyncio.run(get_client())
+
+    assert second is not first
+
+
+def test_models_url_handles_trailing_slash():
+    assert lmstudio_provider._models_url(BASE_URL) == f"{BASE_URL}/models"
+    assert lmstudio_provider._models_url(BASE_URL + "/") == f"{BASE_URL}/models"
+
+
+@pytest.mark.asyncio
+async def test_detect_model_reuses_shared_client(requests_seen):
+    assert await detect_lmstudio_model(BASE_URL, force_refresh=True) == "local-model"
+    assert await detect_lmstudio_model(BASE_URL, force_refresh=True) == "local-model"
+
+    assert requests_seen == ["/v1/models", "/v1/models"]
+    assert len(lmstudio_provider._loop_clients()) == 1
+
+
+@pytest.mark.asyncio
+async def test_close_lmstudio_clients_closes_and_forgets_clients():
+    client = lmstudio_provider._get_client(BASE_URL, "key", 10)
+
+    await close_lmstudio_clients()
+
+    assert client.is_closed
+    assert lmstudio_provider._loop_clients() == {}
+
+
+@pytest.mark.asyncio
+async def test_health_check_is_cached_within_ttl(requests_seen):
+    settings = LMStudioSettings(base_url=BASE_URL, timeout=10)
+
+    first = await lmstudio_health_check(settings)
+    first["connected"] = False
+    second = await lmstudio_health_check(settings)
+
+    assert second["connected"] is True
+    assert second["model_id"] == "local-model"
+    assert requests_seen == ["/v1/models"]
+
+
+@pytest.mark.asyncio
+async def test_health_check_probes_again_after_ttl(requests_seen, monkeypatch):
+    settings = LMStudioSettings(base_url=BASE_URL, timeout=10)
+    await lmstudio_health_check(settings)
+
+    monkeypatch.setattr(lmstudio_provider, "HEALTH_CHECK_TTL", 0.0)
+    await lmstudio_health_check(settings)
+    await lmstudio_health_check(settings, use_cache=False)
+
+    assert requests_seen == ["/v1/models"] * 3
+
+
+@pytest.mark.asyncio
+async def test_create_model_async_detects_once_and_seeds_health_cache(requests_seen):
+    settings = LMStudioSettings(base_url=BASE_URL, timeout=10)
+
+    await create_lmstudio_model_async(settings=settings, test_connection=True)
+    health = await lmstudio_health_check(settings)
+
+    assert health["model_id"] == "local-model"
+    assert requests_seen == ["/v1/models"]
+
+
+@pytest.mark.asyncio
+async def test_concurrent_health_checks_share_one_probe(requests_seen):
+    settings = LMStudioSettings(base_url=BASE_URL, timeout=10)
+
+    results = await asyncio.gather(
+        *(lmstudio_health_check(settings, use_cache=False) for _ in range(5))
+    )
+
+    assert all(r["model_id"] == "local-model" for r in results)
+    assert requests_seen == ["/v1/models"]
+    assert lmstudio_provider._health_probes == {}
+
+
+@pytest.mark.asyncio
+async def test_create_model_async_reuses_fresh_health_for_connection_test(requests_seen):
+    settings = LMStudioSettings(base_url=BASE_URL, timeout=10)
+    await lmstudio_health_check(settings)
+
+    model = await create_lmstudio_model_async(
+        "explicit-model", settings=settings, auto_detect=False, test_connection=True
+    )
+
+    assert model.model_name == "explicit-model"
+    assert requests_seen == ["/v1/models"]
+
+
+def test_create_model_is_memoized_by_resolved_settings():
+    model = create_lmstudio_model(
+        "local-model", settings=LMStudioSettings(base_url=BASE_URL), auto_detect=False
+    )
+
+    # A freshly built but equal settings object hits the same cache entry
+    same = create_lmstudio_model(
+        "local-model", settings=LMStudioSettings(base_url=BASE_URL), auto_detect=False
+    )
+    other = create_lmstudio_model(
+        "other-model", settings=LMStudioSettings(base_url=BASE_URL), auto_detect=False
+    )
+
+    assert same is model
+    assert other is not model
+    assert other.model_name == "other-model"
+
+
+def _install_client(handler, base_url=BASE_URL):
+    lmstudio_provider._loop_clients()[(base_url, "not-needed", 10)] = httpx.AsyncClient(
+        transport=httpx.MockTransport(handler)
+    )
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    "status_code, error_class",
+    [
+        (500, TransientProviderError),
+        (503, TransientProviderError),
+        (429, TransientProviderError),
+        (401, PermanentProviderError),
+        (404, PermanentProviderError),
+    ],
+)
+async def test_detect_model_classifies_http_errors(status_code, error_class):
+    _install_client(lambda request: httpx.Response(status_code))
+
+    with pytest.raises(error_class) as exc_info:
+        await detect_lmstudio_model(BASE_URL)
+
+    assert exc_info.value.retryable is (error_class is TransientProviderError)
+    assert exc_info.value.details["status_code"] == status_code
+
+
+@pytest.mark.asyncio
+async def test_detect_model_connection_error_is_transient():
+    def handler(request):
+        raise httpx.ConnectError("refused", request=request)
+
+    _install_client(handler)
+
+    with pytest.raises(TransientProviderError):
+        await detect_lmstudio_model(BASE_URL)
+
+
+@pytest.mark.asyncio
+async def test_circuit_opens_after_repeated_failures_and_fails_fast():
+    seen = []
+
+    def handler(request):
+        seen.append(request.url.path)
+        return httpx.Response(503)
+
+    _install_client(handler)
+
+    for _ in range(lmstudio_provider.CIRCUIT_FAILURE_THRESHOLD):
+        with pytest.raises(TransientProviderError):
+            await detect_lmstudio_model(BASE_URL)
+
+    with pytest.raises(TransientProviderError, match="circuit open"):
+        await detect_lmstudio_model(BASE_URL)
+
+    assert len(seen) == lmstudio_provider.CIRCUIT_FAILURE_THRESHOLD
+
+
+@pytest.mark.asyncio
+async def test_half_open_probe_closes_circuit_on_success():
+    responses = iter([503] * lmstudio_provider.CIRCUIT_FAILURE_THRESHOLD + [200])
+
+    def handler(request):
+        return httpx.Response(next(responses), json={"data": [{"id": "local-model"}]})
+
+    _install_client(handler)
+
+    for _ in range(lmstudio_provider.CIRCUIT_FAILURE_THRESHOLD):
+        with pytest.raises(TransientProviderError):
+            await detect_lmstudio_model(BASE_URL)
+
+    breaker = lmstudio_provider._breakers[BASE_URL]
+    breaker.opened_at -= breaker.cooldown
+
+    assert await detect_lmstudio_model(BASE_URL) == "local-model"
+    assert breaker.opened_at is None
+    assert breaker.failures == 0
+
+
+@pytest.mark.asyncio
+async def test_failed_half_open_probe_backs_off():
+    _install_client(lambda request: httpx.Response(503))
+
+    for _ in range(lmstudio_provider.CIRCUIT_FAILURE_THRESHOLD):
+        with pytest.raises(TransientProviderError):
+            await detect_lmstudio_model(BASE_URL)
+
+    breaker = lmstudio_provider._breakers[BASE_URL]
+    breaker.opened_at -= breaker.cooldown
+
+    with pytest.raises(TransientProviderError, match="503"):
+        await detect_lmstudio_model(BASE_URL)
+
+    assert breaker.cooldown == lmstudio_provider.CIRCUIT_COOLDOWN * 2
+    assert not breaker.allow()
+
+
+@pytest.mark.asyncio
+async def test_client_errors_do_not_open_circuit():
+    _install_client(lambda request: httpx.Response(404))
+
+    for _ in range(lmstudio_provider.CIRCUIT_FAILURE_THRESHOLD + 1):
+        with pytest.raises(PermanentProviderError):
+            await detect_lmstudio_model(BASE_URL)
+
+    assert lmstudio_provider._breakers[BASE_URL].opened_at is None
+
+
+@pytest.mark.asyncio
+async def test_detect_model_malformed_response_is_model_error():
+    _install_client(lambda request: httpx.Response(200, content=b"not json"))
+
+    with pytest.raises(ModelError) as exc_info:
+        await detect_lmstudio_model(BASE_URL)
+
+    assert not isinstance(exc_info.value, TransientProviderError)
+    assert lmstudio_provider._breakers[BASE_URL].failures == 0
+
+
+@pytest.mark.asyncio
+async def test_detect_model_ignores_model_metadata():
+    payload = {
+        "object": "list",
+        "data": [
+            {"id": "first", "object": "model", "owned_by": "me", "meta": {"ctx": 4096}},
+            {"id": "second", "object": "model"},
+        ],
+    }
+    _install_client(lambda request: httpx.Response(200, json=payload))
+
+    assert await detect_lmstudio_model(BASE_URL) == "first"
+
+
+@pytest.mark.asyncio
+async def test_detect_model_returns_none_without_models():
+    _install_client(lambda request: httpx.Response(200, json={"object": "list"}))
+
+    assert await detect_lmstudio_model(BASE_URL) is None
+
+
+@pytest.mark.asyncio
+async def test_concurrent_probes_are_capped():
+    in_flight = 0
+    peak = 0
+
+    async def handler(request):
+        nonlocal in_flight, peak
+        in_flight += 1
+        peak = max(peak, in_flight)
+        await asyncio.sleep(0.01)
+        in_flight -= 1
+        return httpx.Response(200, json={"data": [{"id": "local-model"}]})
+
+    # Distinct endpoints, so the requests aren't coalesced into one
+    callers = lmstudio_provider.MAX_CONCURRENT_PROBES * 3
+    base_urls = [f"http://lmstudio{i}.test/v1" for i in range(callers)]
+    for base_url in base_urls:
+        _install_client(handler, base_url)
+
+    results = await asyncio.gather(*(detect_lmstudio_model(url) for url in base_urls))
+
+    assert results == ["local-model"] * len(base_urls)
+    assert peak == lmstudio_provider.MAX_CONCURRENT_PROBES
+
+
+@pytest.mark.asyncio
+async def test_detected_model_is_cached_until_ttl(requests_seen, monkeypatch):
+    assert await detect_lmstudio_model(BASE_URL) == "local-model"
+    assert await detect_lmstudio_model(BASE_URL) == "local-model"
+    assert requests_seen == ["/v1/models"]
+
+    monkeypatch.setattr(lmstudio_provider, "DETECT_CACHE_TTL", 0.0)
+    await detect_lmstudio_model(BASE_URL)
+
+    assert requests_seen == ["/v1/models"] * 2
+
+
+@pytest.mark.asyncio
+async def test_empty_model_list_is_not_cached():
+    seen = []
+
+    def handler(request):
+        seen.append(request.url.path)
+        return httpx.Response(200, json={"data": []})
+
+    _install_client(handler)
+
+    assert await detect_lmstudio_model(BASE_URL) is None
+    assert await detect_lmstudio_model(BASE_URL) is None
+    assert len(seen) == 2
+
+
+@pytest.mark.asyncio
+async def test_health_check_bypasses_detect_cache(requests_seen):
+    settings = LMStudioSettings(base_url=BASE_URL, timeout=10)
+    await detect_lmstudio_model(BASE_URL)
+
+    await lmstudio_health_check(settings)
+
+    assert requests_seen == ["/v1/models"] * 2
+
+
+@pytest.mark.asyncio
+async def test_concurrent_detections_share_one_request():
+    seen = []
+
+    async def handler(request):
+        seen.append(request.url.path)
+        await asyncio.sleep(0.01)
+        return httpx.Response(200, json={"data": [{"id": "local-model"}]})
+
+    _install_client(handler)
+
+    results = await asyncio.gather(
+        *(detect_lmstudio_model(BASE_URL, force_refresh=True) for _ in range(5))
+    )
+
+    assert results == ["local-model"] * 5
+    assert seen == ["/v1/models"]
+    assert lmstudio_provider._detect_fetches == {}
+
+
+@pytest.mark.asyncio
+async def test_concurrent_detections_all_see_the_failure():
+    _install_client(lambda request: httpx.Response(503))
+
+    results = await asyncio.gather(
+        *(detect_lmstudio_model(BASE_URL) for _ in range(3)), return_exceptions=True
+    )
+
+    assert all(isinstance(r, TransientProviderError) for r in results)
+    assert lmstudio_provider._breakers[BASE_URL].failures == 1
+
+
+@pytest.mark.asyncio
+async def test_connection_test_for_named_model_only_pings():
+    seen = []
+
+    def handler(request):
+        seen.append(request.method)
+        return httpx.Response(405)
+
+    _install_client(handler)
+    settings = LMStudioSettings(base_url=BASE_URL, timeout=10)
+
+    model = await create_lmstudio_model_async(
+        "explicit-model", settings=settings, auto_detect=False, test_connection=True
+    )
+
+    assert model.model_name == "explicit-model"
+    assert seen == ["HEAD"]
+
+
+@pytest.mark.asyncio
+async def test_connection_test_fails_when_server_unreachable():
+    def handler(request):
+        raise httpx.ConnectError("refused", request=request)
+
+    _install_client(handler)
+    settings = LMStudioSettings(base_url=BASE_URL, timeout=10)
+
+    with pytest.raises(TransientProviderError):
+        await create_lmstudio_model_async(
+            "explicit-model", settings=settings, auto_detect=False, test_connection=True
+        )
+
+
+@pytest.mark.asyncio
+async def test_detect_model_accepts_gzip_responses():
+    seen_encodings = []
+
+    def handler(request):
+        seen_encodings.append(request.headers.get("accept-encoding", ""))
+        body = gzip.compress(json.dumps({"data": [{"id": "local-model"}]}).encode())
+        return httpx.Response(200, content=body, headers={"content-encoding": "gzip"})
+
+    # Built like the real pooled client, so its default headers are in play
+    client = lmstudio_provider._get_client(BASE_URL, "not-needed", 10)
+    client._transport = httpx.MockTransport(handler)
+
+    assert await detect_lmstudio_model(BASE_URL) == "local-model"
+    assert "gzip" in seen_encodings[0]
@@ -0,0 +1,214 @@
+import asyncio
+
+import pytest
+
+from src.core.models import providers
+from src.core.models.providers import (
+    _create_openai_model,
+    detect_all_models,
+    get_model_provider,
+    get_model_provider_async,
+    health_check_all,
+    provider_health_check,
+    reset_provider_cache,
+    warmup_providers,
+)
+from src.core.utils.config import Settings
+from src.core.utils.exceptions import ConfigurationError
+
+
+@pytest.fixture(autouse=True)
+def reset_prewarmed():
+    reset_provider_cache()
+    yield
+    reset_provider_cache()
+
+
+@pytest.mark.asyncio
+async def test_health_check_all_runs_checks_concurrently(monkeypatch):
+    running = 0
+    peak = 0
+
+    async def check(settings):
+        nonlocal running, peak
+        running += 1
+        peak = max(peak, running)
+        await asyncio.sleep(0.01)
+        running -= 1
+        return {"connected": True, "model_id": "m"}
+
+    monkeypatch.setattr(providers, "_PROVIDER_HEALTH_CHECKS", {"a": check, "b": check})
+
+    results = await health_check_all()
+
+    assert peak == 2
+    assert results == {
+        "a": {"connected": True, "model_id": "m"},
+        "b": {"connected": True, "model_id": "m"},
+    }
+
+
+@pytest.mark.asyncio
+async def test_health_check_all_reports_failed_check_as_disconnected(monkeypatch):
+    async def ok(settings):
+        return {"connected": True}
+
+    async def broken(settings):
+        raise RuntimeError("boom")
+
+    monkeypatch.setattr(providers, "_PROVIDER_HEALTH_CHECKS", {"ok": ok, "broken": broken})
+
+    results = await health_check_all()
+
+    assert results["ok"] == {"connected": True}
+    assert results["broken"]["connected"] is False
+    assert results["broken"]["error"] == "boom"
+
+
+@pytest.mark.asyncio
+async def test_provider_health_check_uses_the_named_providers_check(monkeypatch):
+    async def up(settings):
+        return {"connected": True, "model_detected": True, "model_id": "m"}
+
+    monkeypatch.setattr(providers, "_PROVIDER_HEALTH_CHECKS", {"lmstudio": up})
+
+    health = await provider_health_check("lmstudio")
+
+    assert health["connected"] is True
+    assert health["model_id"] == "m"
+
+
+@pytest.mark.asyncio
+async def test_provider_health_check_rejects_unknown_provider():
+    with pytest.raises(ConfigurationError):
+        await provider_health_check("nope")
+
+
+def test_concrete_providers_exclude_auto():
+    assert providers._CONCRETE_PROVIDERS == {"openai", "lmstudio"}
+
+
+@pytest.mark.asyncio
+async def test_invalid_provider_is_rejected_before_building(monkeypatch):
+    def factory(settings):
+        raise AssertionError("factory should not be called")
+
+    monkeypatch.setattr(providers, "_PROVIDER_FACTORIES", {"nope": factory})
+
+    with pytest.raises(ConfigurationError):
+        get_model_provider("nope")
+    with pytest.raises(ConfigurationError):
+        await get_model_provider_async("nope")
+
+
+@pytest.mark.asyncio
+async def test_openai_health_check_without_key_has_common_failure_shape():
+    settings = Settings()
+    settings.openai.api_key = None
+
+    health = await providers._openai_health_check(settings)
+
+    assert health == {
+        "connected": False,
+        "model_detected": False,
+        "model_id": None,
+        "error": "OpenAI API key not configured",
+    }
+
+
+@pytest.mark.asyncio
+async def test_warmed_up_provider_is_reused(monkeypatch):
+    calls = []
+
+    def factory(settings):
+        calls.append(1)
+        return object()
+
+    monkeypatch.setattr(providers, "_PROVIDER_FACTORIES", {"openai": factory})
+
+    assert await warmup_providers("openai") is True
+    model = await get_model_provider_async("openai")
+
+    assert model is providers._prewarmed["openai"]
+    assert await get_model_provider_async("openai", test_connection=True) is model
+    assert calls == [1]
+
+
+@pytest.mark.asyncio
+async def test_prewarmed_model_is_dropped_after_settings_reload(monkeypatch):
+    monkeypatch.setattr(providers, "_PROVIDER_FACTORIES", {"openai": lambda settings: object()})
+
+    assert await warmup_providers("openai") is True
+    warmed = providers._prewarmed["openai"]
+
+    monkeypatch.setattr(providers, "get_settings", lambda: Settings())
+
+    assert await get_model_provider_async("openai") is not warmed
+    assert providers._prewarmed == {}
+
+
+@pytest.mark.asyncio
+async def test_refresh_drops_prewarmed_model(monkeypatch):
+    monkeypatch.setattr(providers, "_PROVIDER_FACTORIES", {"openai": lambda settings: object()})
+
+    assert await warmup_providers("openai") is True
+    warmed = providers._prewarmed["openai"]
+
+    assert get_model_provider("openai") is warmed
+    assert get_model_provider("openai", refresh=True) is not warmed
+
+
+@pytest.mark.asyncio
+async def test_failed_warmup_leaves_nothing_cached(monkeypatch):
+    def factory(settings):
+        raise RuntimeError("no key")
+
+    monkeypatch.setattr(providers, "_PROVIDER_FACTORIES", {"openai": factory})
+
+    assert await warmup_providers("openai") is False
+    assert providers._prewarmed == {}
+
+
+@pytest.mark.asyncio
+async def test_async_auto_selection_uses_configuration_without_probing(monkeypatch):
+    async def probe(settings):
+        raise AssertionError("auto selection shouldn't run health checks")
+
+    settings = Settings()
+    settings.llm.provider = "auto"
+    settings.openai.api_key = "sk-test"
+    built = object()
+    monkeypatch.setattr(providers, "get_settings", lambda: settings)
+    monkeypatch.setattr(providers, "_PROVIDER_HEALTH_CHECKS", {"openai": probe, "lmstudio": probe})
+    monkeypatch.setattr(providers, "_PROVIDER_FACTORIES", {"openai": lambda settings: built})
+
+    assert await get_model_provider_async() is built
+
+
+@pytest.mark.asyncio
+async def test_detect_all_models_keeps_results_when_one_provider_fails(monkeypatch):
+    async def slow(settings):
+        await asyncio.sleep(0.01)
+        return "slow-model"
+
+    async def broken(settings):
+        raise RuntimeError("down")
+
+    monkeypatch.setattr(
+        providers, "_PROVIDER_MODEL_DETECTORS", {"slow": slow, "broken": broken}
+    )
+
+    assert await detect_all_models() == {"slow": "slow-model", "broken": None}
+
+
+def test_openai_model_is_shared_per_configuration():
+    settings = Settings()
+    settings.openai.api_key = "sk-test"
+
+    model = _create_openai_model(settings)
+
+    assert _create_openai_model(settings) is model
+    assert model.model_name == settings.openai.model
+
+    settings.openai.model = "gpt-4o"
+    assert _create_openai_model(settings) is not model
@@ -1,6 +1,6 @@
 import pytest
 from pydantic import BaseModel
-from src.core.models.responses import StandardResponse, ChatResponse, ErrorResponse
+from src.core.models.responses import StandardResponse, ChatResponse, ErrorResponse, chat_response
 from datetime import datetime
 
 class SimpleData(BaseModel):
@@ -36,3 +36,13 @@ def test_error_response_structure():
     assert response.error_code == "TEST_ERROR"
     assert response.message == "Something went wrong"
     assert response.details["info"] == "details"
+
+def test_chat_response_matches_validated_construction():
+    fast = chat_response("Hello")
+    validated = StandardResponse(data=ChatResponse(role="assistant", content="Hello"))
+
+    assert fast.data.content == "Hello"
+    assert fast.data.role == "assistant"
+    assert isinstance(fast.timestamp, datetime)
+    exclude = {"timestamp": True, "data": {"timestamp"}}
+    assert fast.model_dump(exclude=exclude) == validated.model_dump(exclude=exclude)
@@ -1,12 +1,15 @@
 import pytest
 import os
 import shutil
+import time
 import yaml
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
+from typing import Optional
 from unittest.mock import patch, MagicMock
 
 from src.core.prompts.models import PromptTemplate
-from src.core.prompts.registry import PromptManager, SecureSandbox
+from src.core.prompts.registry import PromptManager, SecureSandbox, _LazyPromptManager, _iter_prompt_files, _read_file
 from src.core.utils.exceptions import ConfigurationError, ResourceNotFoundError, ValidationError, MAIException
 
 
@@ -147,6 +150,24 @@ def test_prompt_template_model_defaults():
     assert template.input_variables == {}
     assert template.tags == []
 
+def test_prompt_template_model_derives_variable_specs():
+    template = PromptTemplate(
+        name="vars",
+        template="{{ a }} {{ b }} {{ c }}",
+        input_variables={
+            "a": {"type": "string"},
+            "b": {"required": False, "default": "B"},
+            "c": {"required": False},
+        },
+    )
+    assert template.required_variables == ("a",)
+    assert template.variable_defaults == {"b": "B"}
+    assert template.variable_names == frozenset({"a", "b", "c"})
+
+def test_render_template_drops_undeclared_variables(prompt_manager):
+    rendered = prompt_manager.render_template("system_prompt", "1.0.0", current_time="noon", secret="x")
+    assert rendered == "Hello, User. Current time: noon."
+
 def test_prompt_template_model_missing_required_fields():
     with pytest.raises(ValueError, match="Field required"):
         PromptTemplate(name="missing_template")
@@ -161,12 +182,60 @@ def test_prompt_manager_singleton(prompt_manager):
     assert manager1 is manager2
     assert manager1.prompt_dir == str(prompt_manager.prompt_dir) # Check it wasn't re-initialized with new path
 
+def test_prompt_manager_concurrent_construction_initializes_once(temp_prompt_dir):
+    PromptManager._instance = None
+    PromptManager._is_initialized = False
+    loads = []
+    original_load = PromptManager._load_prompts
+
+    def slow_load(self):
+        loads.append(self)
+        time.sleep(0.05) # Widen the window for a second initializer
+        original_load(self)
+
+    with patch.object(PromptManager, "_load_prompts", slow_load):
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            managers = list(executor.map(lambda _: PromptManager(prompt_dir=str(temp_prompt_dir)), range(4)))
+
+    assert len(loads) == 1
+    assert all(manager is managers[0] for manager in managers)
+
 def test_prompt_manager_initialization_loads_prompts(prompt_manager):
     assert len(prompt_manager.templates) == 8 # Now loads 8 templates
     assert ("system_prompt", "1.0.0") in prompt_manager.templates
     assert ("system_prompt", "2.0.0") in prompt_manager.templates
     assert ("agent_persona", "1.0.0") in prompt_manager.templates
 
+def test_lazy_prompt_manager_loads_on_first_use(prompt_manager):
+    lazy = _LazyPromptManager()
+    assert lazy._manager is None
+    # The singleton already exists, so first use picks it up
+    assert lazy.templates is prompt_manager.templates
+    assert lazy._ensure_loaded() is prompt_manager
+
+def test_lazy_prompt_manager_retries_after_failed_load():
+    lazy = _LazyPromptManager()
+    with patch("src.core.prompts.registry.PromptManager", side_effect=ConfigurationError("Prompt directory not found")):
+        with pytest.raises(ConfigurationError):
+            lazy.templates
+        assert lazy._manager is None
+        with pytest.raises(ConfigurationError):
+            lazy.templates
+
+async def test_aload_prompts_matches_sync_load(prompt_manager, create_mock_yaml):
+    expected = dict(prompt_manager.templates)
+    create_mock_yaml(name="async_prompt", template_content="Async.", sub_dir="agents")
+
+    await prompt_manager.aload_prompts()
+
+    assert set(prompt_manager.templates) == set(expected) | {("async_prompt", "1.0.0")}
+    assert prompt_manager.render_template("async_prompt") == "Async."
+
+async def test_lazy_prompt_manager_aload(prompt_manager):
+    lazy = _LazyPromptManager()
+    assert await lazy.aload() is prompt_manager
+    assert await lazy.aload() is prompt_manager
+
 def test_prompt_manager_init_non_existent_dir():
     PromptManager._instance = None
     PromptManager._is_initialized = False
@@ -189,19 +258,28 @@ def test_get_template_not_found(prompt_manager):
     with pytest.raises(ResourceNotFoundError, match="Prompt template 'non_existent' version '1.0.0' not found."):
         prompt_manager.get_template("non_existent")
 
-def test_get_template_reloads_on_not_found(temp_prompt_dir, prompt_manager, create_mock_yaml):
+def test_get_template_does_not_reload_on_not_found(temp_prompt_dir, prompt_manager, create_mock_yaml):
     # Manager is initialized, templates are loaded
     assert ("new_prompt", "1.0.0") not in prompt_manager.templates
 
     # Add a new prompt after manager is initialized
     create_mock_yaml(name="new_prompt", template_content="New content", sub_dir="base")
 
-    # The current implementation of get_template calls _load_prompts if template not found
-    reloaded_template = prompt_manager.get_template("new_prompt") # This call will trigger reload and succeed
+    # Lookups don't rescan the directory; new prompts need an explicit reload
+    with patch.object(prompt_manager, "_load_prompts") as load_prompts:
+        with pytest.raises(ResourceNotFoundError):
+            prompt_manager.get_template("new_prompt")
+    load_prompts.assert_not_called()
+
+    prompt_manager.reload_prompts()
+    reloaded_template = prompt_manager.get_template("new_prompt")
     assert reloaded_template.name == "new_prompt"
-    assert ("new_prompt", "1.0.0") in prompt_manager.templates
     assert prompt_manager.templates[("new_prompt", "1.0.0")][0] == reloaded_template # Access the PromptTemplate model from the stored tuple
 
+def test_render_template_not_found(prompt_manager):
+    with pytest.raises(ResourceNotFoundError):
+        prompt_manager.render_template("non_existent_prompt")
+
 def test_render_template_success(prompt_manager):
     rendered = prompt_manager.render_template(
         prompt_name="system_prompt", 
@@ -265,6 +343,19 @@ def test_render_template_sandboxing(prompt_manager):
     rendered = prompt_manager.render_template(prompt_name="safe_globals")
     assert rendered.strip() == "012"
 
+def test_render_plans_follow_loaded_templates(prompt_manager, create_mock_yaml):
+    assert prompt_manager._render_plans.keys() == prompt_manager.templates.keys()
+    plan = prompt_manager._render_plans[("system_prompt", "1.0.0")]
+    assert plan.required == ("current_time",)
+    assert plan.defaults == {"name": "User"}
+    assert plan.allowed == {"name", "current_time"}
+    assert plan.template is prompt_manager.templates[("system_prompt", "1.0.0")][1]
+
+    create_mock_yaml(name="planned", template_content="Planned.", sub_dir="base")
+    prompt_manager.reload_prompts()
+    assert prompt_manager._render_plans.keys() == prompt_manager.templates.keys()
+    assert prompt_manager.render_template("planned") == "Planned."
+
 def test_reload_prompts(prompt_manager, create_mock_yaml):
     initial_template_count = len(prompt_manager.templates)
     
@@ -276,9 +367,7 @@ def test_reload_prompts(prompt_manager, create_mock_yaml):
     
     assert len(prompt_manager.templates) == initial_template_count + 1
     assert ("new_prompt_after_load", "1.0.0") in prompt_manager.templates
-    
-    # Check if caches were cleared and then refilled
-    prompt_manager.get_template.cache_info().hits == 0
+    assert prompt_manager.get_template("new_prompt_after_load").template == "New one."
 
 def test_prompt_manager_name_from_filepath(temp_prompt_dir, create_mock_yaml):
     # Create a YAML without explicit name field
@@ -300,3 +389,160 @@ def test_prompt_manager_name_from_filepath(temp_prompt_dir, create_mock_yaml):
     assert "3.0.0" == template.version
     rendered = manager.render_template(prompt_name="agents/planner_v3", prompt_version="3.0.0", agent_type="planner")
     assert rendered.strip() == "I am a planner"
+
+def test_iter_prompt_files_finds_nested_yaml_only(temp_prompt_dir):
+    (temp_prompt_dir / "agents" / "nested").mkdir()
+    (temp_prompt_dir / "agents" / "nested" / "deep.yml").write_text("template: x")
+    (temp_prompt_dir / "base" / "a.yaml").write_text("template: x")
+    (temp_prompt_dir / "base" / "notes.txt").write_text("not a prompt")
+    (temp_prompt_dir / "base" / "dir.yaml").mkdir()
+
+    found = sorted(os.path.relpath(entry.path, temp_prompt_dir) for entry in _iter_prompt_files(str(temp_prompt_dir)))
+    assert found == [os.path.join("agents", "nested", "deep.yml"), os.path.join("base", "a.yaml")]
+
+def test_load_prompts_loads_many_files_and_skips_bad_ones(temp_prompt_dir, create_mock_yaml):
+    for i in range(20):
+        create_mock_yaml(name=f"bulk_{i}", template_content=f"Prompt {i}", sub_dir="agents")
+    (temp_prompt_dir / "base" / "broken.yaml").write_text("template: [unclosed")
+    (temp_prompt_dir / "base" / "list.yaml").write_text("- not\n- a dict\n")
+
+    PromptManager._instance = None
+    PromptManager._is_initialized = False
+    manager = PromptManager(prompt_dir=str(temp_prompt_dir))
+
+    assert len(manager.templates) == 20
+    assert manager.render_template("bulk_7") == "Prompt 7"
+
+def test_read_file(tmp_path):
+    empty = tmp_path / "empty.yaml"
+    empty.write_bytes(b"")
+    assert _read_file(str(empty)) == b""
+
+    content = "template: \"x\"\n".encode("utf-8") * 10000
+    large = tmp_path / "large.yaml"
+    large.write_bytes(content)
+    assert _read_file(str(large)) == content
+
+    # Still read to the end if the file grows after its size was taken
+    with patch("src.core.prompts.registry.os.fstat", return_value=os.stat_result((0,) * 6 + (4,) + (0,) * 3)):
+        assert _read_file(str(large)) == content
+
+def test_load_prompts_reads_utf8_content(temp_prompt_dir):
+    (temp_prompt_dir / "base" / "greeting.yaml").write_bytes("template: \"Grüße, {{ name }} ✓\"\ninput_variables:\n  name: {}\n".encode("utf-8"))
+
+    PromptManager._instance = None
+    PromptManager._is_initialized = False
+    manager = PromptManager(prompt_dir=str(temp_prompt_dir))
+
+    assert manager.render_template("base/greeting", name="Ana") == "Grüße, Ana ✓"
+
+def test_compiled_templates_are_reused_from_bytecode_cache(tmp_path, temp_prompt_dir, create_mock_yaml):
+    create_mock_yaml(name="cached", template_content="Hi {{ name }}", input_variables={"name": {}})
+    cache_dir = tmp_path / "bytecode"
+
+    PromptManager._instance = None
+    PromptManager._is_initialized = False
+    PromptManager(prompt_dir=str(temp_prompt_dir), bytecode_cache_dir=str(cache_dir))
+    assert len(list(cache_dir.iterdir())) == 1
+
+    PromptManager._instance = None
+    PromptManager._is_initialized = False
+    with patch.object(SecureSandbox, "compile", side_effect=AssertionError("recompiled")):
+        manager = PromptManager(prompt_dir=str(temp_prompt_dir), bytecode_cache_dir=str(cache_dir))
+
+    assert manager.render_template("cached", name="Ana") == "Hi Ana"
+
+
+def test_changed_template_is_recompiled_despite_bytecode_cache(tmp_path, temp_prompt_dir, create_mock_yaml):
+    cache_dir = tmp_path / "bytecode"
+    create_mock_yaml(name="cached", template_content="Old {{ name }}", input_variables={"name": {}})
+    PromptManager._instance = None
+    PromptManager._is_initialized = False
+    PromptManager(prompt_dir=str(temp_prompt_dir), bytecode_cache_dir=str(cache_dir))
+
+    create_mock_yaml(name="cached", template_content="New {{ name }}", input_variables={"name": {}})
+    PromptManager._instance = None
+    PromptManager._is_initialized = False
+    manager = PromptManager(prompt_dir=str(temp_prompt_dir), bytecode_cache_dir=str(cache_dir))
+
+    assert manager.render_template("cached", name="Ana") == "New Ana"
+
+def test_bytecode_cache_is_keyed_by_prompt_not_path(tmp_path, temp_prompt_dir, create_mock_yaml):
+    create_mock_yaml(name="cached", template_content="Hi {{ name }}", input_variables={"name": {}})
+    cache_dir = tmp_path / "bytecode"
+    PromptManager._instance = None
+    PromptManager._is_initialized = False
+    PromptManager(prompt_dir=str(temp_prompt_dir), bytecode_cache_dir=str(cache_dir))
+
+    # Same prompts in another checkout
+    moved_dir = tmp_path / "moved_prompts"
+    shutil.copytree(temp_prompt_dir, moved_dir)
+    PromptManager._instance = None
+    PromptManager._is_initialized = False
+    with patch.object(SecureSandbox, "compile", side_effect=AssertionError("recompiled")):
+        manager = PromptManager(prompt_dir=str(moved_dir), bytecode_cache_dir=str(cache_dir))
+
+    assert manager.templates[("cached", "1.0.0")][1].name == "cached@1.0.0"
+    assert manager.render_template("cached", name="Ana") == "Hi Ana"
+
+def test_secure_sandbox_safe_callables():
+    class UnhashableCallable:
+        __hash__ = None
+        def __call__(self):
+            return "x"
+
+    sandbox = SecureSandbox()
+    assert sandbox.is_safe_callable(range)
+    assert sandbox.is_safe_callable(str)
+    assert not sandbox.is_safe_callable(open)
+    assert not sandbox.is_safe_callable(UnhashableCallable())
+
+def test_versioned_filename_pattern():
+    from src.core.prompts.registry import _VERSIONED_FILENAME_RE
+
+    assert _VERSIONED_FILENAME_RE.match("agents/planner_v3.0.1").groups() == ("agents/planner", "3.0.1")
+    assert _VERSIONED_FILENAME_RE.match("agents/planner_v3") is None
+    assert _VERSIONED_FILENAME_RE.match("_v1.0.0") is None
+    assert _VERSIONED_FILENAME_RE.match("planner_v1.0.0\n") is None
+
+def test_render_template_reuses_rendered_prompt(prompt_manager):
+    first = prompt_manager.render_template("system_prompt", "1.0.0", name="Ana", current_time="noon")
+
+    _, compiled = prompt_manager.templates[("system_prompt", "1.0.0")]
+    with patch.object(compiled, "render", side_effect=AssertionError("re-rendered")):
+        assert prompt_manager.render_template("system_prompt", "1.0.0", current_time="noon", name="Ana") == first
+
+def test_render_template_with_unhashable_values_is_not_cached(prompt_manager):
+    rendered = prompt_manager.render_template("system_prompt", "1.0.0", name=["A"], current_time="noon")
+
+    assert rendered == "Hello, ['A']. Current time: noon."
+    assert prompt_manager._render_cache == {}
+
+def test_render_cache_is_bounded(prompt_manager, monkeypatch):
+    monkeypatch.setattr("src.core.prompts.registry._RENDER_CACHE_SIZE", 2)
+
+    for minute in range(3):
+        prompt_manager.render_template("system_prompt", "1.0.0", current_time=f"12:0{minute}")
+
+    assert [key[2][0][2] for key in prompt_manager._render_cache] == ["12:01", "12:02"]
+
+def test_render_cache_distinguishes_equal_values_of_different_types(prompt_manager):
+    assert prompt_manager.render_template("system_prompt", "1.0.0", current_time=1) == "Hello, User. Current time: 1."
+    assert prompt_manager.render_template("system_prompt", "1.0.0", current_time=True) == "Hello, User. Current time: True."
+
+def test_trusted_prompt_renders_outside_sandbox(temp_prompt_dir, create_mock_yaml):
+    template = "{{ config.__class__.__name__ }}"
+    create_mock_yaml(name="sandboxed", template_content=template, input_variables={"config": {}})
+    file_path = create_mock_yaml(name="trusted", template_content=template, input_variables={"config": {}})
+    data = yaml.safe_load(file_path.read_text())
+    data["trusted"] = True
+    file_path.write_text(yaml.dump(data))
+
+    PromptManager._instance = None
+    PromptManager._is_initialized = False
+    manager = PromptManager(prompt_dir=str(temp_prompt_dir))
+
+    assert manager.templates[("trusted", "1.0.0")][1].environment is manager.jinja_env_fast
+    assert manager.render_template("trusted", config={}) == "dict"
+    with pytest.raises(MAIException):
+        manager.render_template("sandboxed", config={})
@@ -0,0 +1,10 @@
+import pytest
+
+from src.core.tools.registry import tool_registry
+
+
+# Clear registry before each test (important for isolated tests)
+@pytest.fixture(autouse=True)
+def clear_tool_registry():
+    tool_registry.clear()
+    yield
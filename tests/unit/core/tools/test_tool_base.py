@@ -0,0 +1,162 @@
+from typing import Any, Optional
+
+import pytest
+from pydantic import BaseModel
+
+from src.core.tools.base import tool
+from src.core.tools.registry import tool_registry
+from src.core.utils.exceptions import ToolExecutionError
+
+
+def test_tool_input_validation():
+    @tool(name="validate_input", description="Validates input")
+    def validate_input_func(a: int, b: str):
+        return f"{a}-{b}"
+
+    func, _ = tool_registry.get_tool("validate_input")
+
+    # Valid input
+    result = func(a=1, b="hello")
+    assert result == "1-hello"
+
+    # Invalid input type
+    with pytest.raises(ToolExecutionError):
+        func(a="not_an_int", b="hello")
+
+    # Missing required input
+    with pytest.raises(ToolExecutionError):
+        func(b="hello")
+
+
+def test_tool_accepts_positional_and_keyword_args():
+    @tool(name="mixed_args", description="Mixed args")
+    def mixed_args_func(a: int, b: str = "x") -> str:
+        return f"{a}-{b}"
+
+    func, _ = tool_registry.get_tool("mixed_args")
+
+    assert func(1) == "1-x"
+    assert func(1, "y") == "1-y"
+    assert func(1, b="z") == "1-z"
+    assert func(a=2) == "2-x"
+
+
+def test_tool_passes_validated_values_without_dumping():
+    class Point(BaseModel):
+        x: int
+        y: int
+
+    @tool(name="model_arg", description="Takes a model")
+    def model_arg_func(point: Point, scale: int = 2) -> int:
+        assert isinstance(point, Point)
+        return (point.x + point.y) * scale
+
+    func, _ = tool_registry.get_tool("model_arg")
+
+    assert func(point={"x": "1", "y": 2}) == 6
+    assert func(point=Point(x=1, y=1), scale=3) == 6
+
+
+def test_tool_output_validation():
+    @tool(name="validate_output", description="Validates output")
+    def validate_output_func(a: int) -> str:
+        return str(a)
+
+    func, _ = tool_registry.get_tool("validate_output")
+    result = func(a=10)
+    assert result == "10"
+
+    @tool(name="invalid_output", description="Returns wrong type")
+    def invalid_output_func() -> int:
+        return "not_an_int" # Should fail validation
+
+    func_invalid, _ = tool_registry.get_tool("invalid_output")
+    with pytest.raises(ToolExecutionError):
+        func_invalid()
+
+
+def test_tools_with_same_signature_keep_their_own_parameter_models():
+    @tool(name="shared_a", description="First")
+    def shared_a(query: str, limit: int = 5) -> str:
+        return query * limit
+
+    @tool(name="shared_b", description="Second")
+    def shared_b(query: str, limit: int = 5) -> str:
+        return query[:limit]
+
+    func_a, meta_a = tool_registry.get_tool("shared_a")
+    func_b, meta_b = tool_registry.get_tool("shared_b")
+    assert meta_a.parameters["title"] == "Shared_aParameters"
+    assert meta_b.parameters["title"] == "Shared_bParameters"
+    assert meta_a.parameters["properties"] == meta_b.parameters["properties"]
+
+    # Validation errors name the tool's own parameters model
+    with pytest.raises(ToolExecutionError, match="Shared_bParameters") as exc_info:
+        func_b(query="q", limit="many")
+    assert "Shared_aParameters" not in str(exc_info.value)
+
+
+def test_redecorated_tool_reuses_parameter_model():
+    def search(query: str, limit: int = 5) -> str:
+        return query
+
+    first = tool(name="search_again", description="Search", register=False)(search)
+    second = tool(name="search_again", description="Search", register=False)(search)
+    schema_a = first.__tool_metadata__.parameters
+    schema_b = second.__tool_metadata__.parameters
+    assert schema_a == schema_b
+    assert schema_a is not schema_b
+
+    # Equal defaults of different types must not share a model
+    @tool(name="x_default", description="Bool default", register=False)
+    def flag_default(x: Any = True) -> Any:
+        return x
+
+    @tool(name="x_default", description="Int default", register=False)
+    def int_default(x: Any = 1) -> Any:
+        return x
+
+    assert flag_default.__tool_metadata__.parameters["properties"]["x"]["default"] is True
+    assert int_default.__tool_metadata__.parameters["properties"]["x"]["default"] is not True
+
+
+def test_tool_output_fast_paths_keep_validation_semantics():
+    @tool(name="any_output", description="Any output")
+    def any_output_func(value: Any) -> Any:
+        return value
+
+    @tool(name="int_output", description="Int output")
+    def int_output_func(value: Any) -> int:
+        return value
+
+    any_func, _ = tool_registry.get_tool("any_output")
+    int_func, _ = tool_registry.get_tool("int_output")
+    marker = object()
+
+    assert any_func(value=marker) is marker
+    assert int_func(value=7) == 7
+    # Non-exact types are still coerced or rejected
+    assert int_func(value="8") == 8
+    assert type(int_func(value=True)) is int
+    with pytest.raises(ToolExecutionError):
+        int_func(value="nope")
+
+
+def test_optional_parameters_default_to_none():
+    @tool(name="optional_params", description="Optional parameters without defaults")
+    def optional_params_func(a: Optional[int], b: int | None, c: str = "c") -> str:
+        return f"{a}-{b}-{c}"
+
+    @tool(name="no_params", description="No parameters")
+    def no_params_func() -> str:
+        return "ok"
+
+    func, metadata = tool_registry.get_tool("optional_params")
+    assert "required" not in metadata.parameters
+    assert func() == "None-None-c"
+    assert func(a="1", b=2) == "1-2-c"
+    with pytest.raises(ToolExecutionError):
+        func(b="nope")
+
+    no_params, _ = tool_registry.get_tool("no_params")
+    assert no_params(unexpected=1) == "ok"
@@ -1,89 +1,14 @@
 import asyncio
+import time
+
 import pytest
-from pydantic import BaseModel, ValidationError
-from typing import Optional
 
-from src.core.tools.base import tool, ToolMetadata
-from src.core.tools.registry import tool_registry, ToolRegistry
-from src.core.tools.decorators import with_retry, with_timeout, with_cache, with_rate_limit
+from src.core.tools.base import tool
+from src.core.tools.decorators import _arguments_digest, with_retry, with_timeout, with_cache, with_rate_limit
+from src.core.tools.registry import tool_registry
 from src.core.utils.exceptions import ToolExecutionError, RateLimitExceededError, ToolTimeoutError
-from src.infrastructure.cache.redis_client import RedisClient # for mocking
-from src.core.utils.logging import get_logger_with_context
-
-# Clear registry before each test (important for isolated tests)
-@pytest.fixture(autouse=True)
-def clear_tool_registry():
-    tool_registry.clear()
-    yield
-
-# --- Test tool decorator and registry ---
-def test_tool_registration():
-    @tool(name="test_func", description="A test function", category="testing")
-    def my_test_func(a: int, b: str) -> str:
-        return f"{b}_{a}"
-
-    assert tool_registry.get_tool("test_func") is not None
-    func, metadata = tool_registry.get_tool("test_func")
-    assert func == my_test_func
-    assert metadata.name == "test_func"
-    assert metadata.description == "A test function"
-    assert metadata.category == "testing"
-    assert "parameters" in metadata.model_dump()
-    assert "returns" in metadata.model_dump()
-
-    # Check parameter schema
-    param_schema = metadata.parameters
-    assert "properties" in param_schema
-    assert "a" in param_schema["properties"]
-    assert param_schema["properties"]["a"]["type"] == "integer"
-    assert "b" in param_schema["properties"]
-    assert param_schema["properties"]["b"]["type"] == "string"
-
-    # Check return schema
-    return_schema = metadata.returns
-    assert "type" in return_schema
-    assert return_schema["type"] == "string"
-
-
-def test_tool_input_validation():
-    @tool(name="validate_input", description="Validates input")
-    def validate_input_func(a: int, b: str):
-        return f"{a}-{b}"
-
-    func, _ = tool_registry.get_tool("validate_input")
-
-    # Valid input
-    result = func(a=1, b="hello")
-    assert result == "1-hello"
-
-    # Invalid input type
-    with pytest.raises(ToolExecutionError):
-        func(a="not_an_int", b="hello")
-
-    # Missing required input
-    with pytest.raises(ToolExecutionError):
-        func(b="hello")
-
-
-def test_tool_output_validation():
-    @tool(name="validate_output", description="Validates output")
-    def validate_output_func(a: int) -> str:
-        return str(a)
-
-    func, _ = tool_registry.get_tool("validate_output")
-    result = func(a=10)
-    assert result == "10"
-
-    @tool(name="invalid_output", description="Returns wrong type")
-    def invalid_output_func() -> int:
-        return "not_an_int" # Should fail validation
-
-    func_invalid, _ = tool_registry.get_tool("invalid_output")
-    with pytest.raises(ToolExecutionError):
-        func_invalid()
-
-
-# --- Test decorators ---
+
+
 async def test_with_retry_async():
     call_count = 0
 
@@ -123,6 +48,38 @@ def test_with_retry_sync():
     assert call_count == 3
 
 
+async def test_with_retry_backoff_and_uncaught_errors(monkeypatch):
+    delays = []
+
+    async def fake_sleep(delay):
+        delays.append(delay)
+
+    monkeypatch.setattr(asyncio, "sleep", fake_sleep)
+    call_count = 0
+
+    @with_retry(max_attempts=4, initial_delay=0.5, max_delay=1.5, catch_exceptions=(ValueError,))
+    async def always_fails():
+        nonlocal call_count
+        call_count += 1
+        raise ValueError("still failing")
+
+    with pytest.raises(ValueError, match="still failing"):
+        await always_fails()
+    assert call_count == 4
+    assert delays == [0.5, 1.0, 1.5]
+
+    @with_retry(max_attempts=3, catch_exceptions=(ValueError,))
+    async def wrong_error():
+        nonlocal call_count
+        call_count += 1
+        raise KeyError("not retried")
+
+    call_count = 0
+    with pytest.raises(KeyError):
+        await wrong_error()
+    assert call_count == 1
+
+
 async def test_with_timeout_async():
     @tool(name="timeout_tool", description="Tool with timeout")
     @with_timeout(timeout_seconds=0.1)
@@ -131,8 +88,10 @@ async def test_with_timeout_async():
         return "Too slow"
 
     wrapped_tool_func, _ = tool_registry.get_tool("timeout_tool")
-    with pytest.raises(ToolTimeoutError):
+    # @tool reports every failure as ToolExecutionError, chained to the original error
+    with pytest.raises(ToolExecutionError) as exc_info:
         await wrapped_tool_func()
+    assert isinstance(exc_info.value.__cause__, ToolTimeoutError)
 
     @tool(name="fast_tool", description="Fast tool")
     @with_timeout(timeout_seconds=0.5)
@@ -144,6 +103,27 @@ async def test_with_timeout_async():
     result = await wrapped_fast_tool_func()
     assert result == "Fast enough"
 
+
+async def test_with_timeout_raises_only_for_its_own_deadline():
+    @with_timeout(timeout_seconds=0.05)
+    async def slow():
+        await asyncio.sleep(1)
+
+    @with_timeout(timeout_seconds=1)
+    async def raises_timeout():
+        raise asyncio.TimeoutError("from the tool")
+
+    @with_timeout(timeout_seconds=1)
+    async def fast():
+        return "done"
+
+    with pytest.raises(ToolTimeoutError):
+        await slow()
+    with pytest.raises(asyncio.TimeoutError, match="from the tool"):
+        await raises_timeout()
+    assert await fast() == "done"
+
+
 def test_with_timeout_sync():
     @tool(name="timeout_tool_sync", description="Sync tool with timeout")
     @with_timeout(timeout_seconds=0.1)
@@ -187,21 +167,15 @@ class MockRedisClient:
         if ttl:
             self.ttl[key] = time.time() + ttl
     
-    async def lrange(self, key, start, end):
-        return [ts for ts in self.lists.get(key, []) if ts > (time.time() - self.ttl.get(f"list_ttl_{key}", 0))]
-    
-    async def rpush(self, key, value):
-        if key not in self.lists:
-            self.lists[key] = []
-        self.lists[key].append(value)
-    
-    async def ltrim(self, key, start, end):
-        if key in self.lists:
-            self.lists[key] = self.lists[key][start:end]
-            
-    async def expire(self, key, ttl):
-        # For simplicity in mock, just use the key directly for list expiration
-        self.ttl[f"list_ttl_{key}"] = time.time() + ttl
+    async def acquire_rate_limit(self, key, limit, period):
+        now = time.time()
+        calls = [ts for ts in self.lists.get(key, []) if ts > now - period]
+        if len(calls) >= limit:
+            self.lists[key] = calls
+            return False, len(calls)
+        calls.append(now)
+        self.lists[key] = calls
+        return True, len(calls)
 
 
 async def test_with_cache():
@@ -217,7 +191,10 @@ async def test_with_cache():
     # First call, should cache
     result1 = await wrapped_tool_func(value="data")
     assert "processed_data" in result1
-    assert await mock_redis.exists("tool_cache:cached_tool:data")
+    cache_keys = list(mock_redis.cache)
+    assert len(cache_keys) == 1
+    assert cache_keys[0].startswith("tool_cache:my_cached_tool:")
+    assert await mock_redis.exists(cache_keys[0])
 
     # Second call, should hit cache
     result2 = await wrapped_tool_func(value="data")
@@ -232,6 +209,49 @@ async def test_with_cache():
     assert "processed_data" in result3
 
 
+def test_cache_key_digest():
+    digest = _arguments_digest(("data",), {"a": 1, "b": [1, 2]})
+    assert len(digest) == 32
+    assert digest == _arguments_digest(("data",), {"b": [1, 2], "a": 1})
+    assert digest != _arguments_digest(("data",), {"a": "1", "b": [1, 2]})
+    assert digest != _arguments_digest(("other",), {"a": 1, "b": [1, 2]})
+    # Values JSON can't encode fall back to str()
+    assert len(_arguments_digest((object(),), {})) == 32
+
+
+async def test_with_cache_caches_none_results():
+    mock_redis = MockRedisClient()
+    call_count = 0
+
+    @with_cache(ttl=10, redis_client_getter=lambda: mock_redis)
+    async def returns_none(value: str):
+        nonlocal call_count
+        call_count += 1
+        return None
+
+    assert await returns_none(value="a") is None
+    assert await returns_none(value="a") is None
+    assert call_count == 1
+
+
+async def test_redis_client_getter_is_called_once():
+    mock_redis = MockRedisClient()
+    getter_calls = 0
+
+    def getter():
+        nonlocal getter_calls
+        getter_calls += 1
+        return mock_redis
+
+    @with_rate_limit(calls=10, period=1, redis_client_getter=getter)
+    async def limited():
+        return "ok"
+
+    assert await limited() == "ok"
+    assert await limited() == "ok"
+    assert getter_calls == 1
+
+
 async def test_with_rate_limit():
     mock_redis = MockRedisClient()
     mock_redis.lists = {} # Clear any previous lists from other tests
@@ -252,8 +272,9 @@ async def test_with_rate_limit():
     assert result2 == "Called"
 
     # Third call, should exceed rate limit
-    with pytest.raises(RateLimitExceededError):
+    with pytest.raises(ToolExecutionError) as exc_info:
         await wrapped_tool_func()
+    assert isinstance(exc_info.value.__cause__, RateLimitExceededError)
     
     # Wait for period to pass
     await asyncio.sleep(1.1)
@@ -261,4 +282,3 @@ async def test_with_rate_limit():
     # Call again, should succeed
     result3 = await wrapped_tool_func()
     assert result3 == "Called"
-
@@ -0,0 +1,11 @@
+from src.core.tools import examples
+
+
+def test_get_current_time_formats_each_second_once(monkeypatch):
+    monkeypatch.setattr(examples.time, "time", lambda: 1700000000.9)
+    assert examples.get_current_time() == "2023-11-14T22:13:20Z"
+    monkeypatch.setattr(examples.time, "strftime", None) # Same second: not formatted again
+    assert examples.get_current_time() == "2023-11-14T22:13:20Z"
+    monkeypatch.undo()
+    monkeypatch.setattr(examples.time, "time", lambda: 1700000001.0)
+    assert examples.get_current_time() == "2023-11-14T22:13:21Z"
@@ -0,0 +1,76 @@
+import pytest
+
+from src.core.tools.base import tool
+from src.core.tools.registry import tool_registry
+
+
+def test_tool_registration():
+    @tool(name="test_func", description="A test function", category="testing")
+    def my_test_func(a: int, b: str) -> str:
+        return f"{b}_{a}"
+
+    assert tool_registry.get_tool("test_func") is not None
+    func, metadata = tool_registry.get_tool("test_func")
+    assert func == my_test_func
+    assert metadata.name == "test_func"
+    assert metadata.description == "A test function"
+    assert metadata.category == "testing"
+    assert "parameters" in metadata.model_dump()
+    assert "returns" in metadata.model_dump()
+
+    # Check parameter schema
+    param_schema = metadata.parameters
+    assert "properties" in param_schema
+    assert "a" in param_schema["properties"]
+    assert param_schema["properties"]["a"]["type"] == "integer"
+    assert "b" in param_schema["properties"]
+    assert param_schema["properties"]["b"]["type"] == "string"
+
+    # Check return schema
+    return_schema = metadata.returns
+    assert "type" in return_schema
+    assert return_schema["type"] == "string"
+
+
+def test_list_tools_by_category_follows_registrations():
+    @tool(name="cat_a", description="A", category="cat")
+    def cat_a() -> str:
+        return "a"
+
+    assert [meta.name for _, meta in tool_registry.list_tools_by_category("cat")] == ["cat_a"]
+    # Callers get their own list
+    tool_registry.list_tools_by_category("cat").clear()
+
+    @tool(name="cat_b", description="B", category="cat")
+    def cat_b() -> str:
+        return "b"
+
+    assert [meta.name for _, meta in tool_registry.list_tools_by_category("cat")] == ["cat_a", "cat_b"]
+    tool_registry.unregister_tool("cat_a")
+    assert [meta.name for _, meta in tool_registry.list_tools_by_category("cat")] == ["cat_b"]
+    tool_registry.clear()
+    assert tool_registry.list_tools_by_category("cat") == []
+
+
+def test_register_many():
+    @tool(name="batch_a", description="A", category="batch", register=False)
+    def batch_a() -> str:
+        return "a"
+
+    @tool(name="batch_b", description="B", category="batch", register=False)
+    def batch_b() -> str:
+        return "b"
+
+    assert tool_registry.get_tool("batch_a") is None
+    tool_registry.register_many([batch_a, batch_b])
+    assert tool_registry.get_tool("batch_a")[0] is batch_a
+    assert [meta.name for _, meta in tool_registry.list_tools_by_category("batch")] == ["batch_a", "batch_b"]
+
+    @tool(name="batch_c", description="C", register=False)
+    def batch_c() -> str:
+        return "c"
+
+    # All or nothing
+    with pytest.raises(ValueError, match="batch_a"):
+        tool_registry.register_many([batch_c, batch_a])
+    assert tool_registry.get_tool("batch_c") is None
@@ -0,0 +1,17 @@
+from src.infrastructure.llm.lmstudio_client import LMStudioClient, _root_url
+
+
+def test_root_url_strips_only_a_trailing_v1_segment():
+    assert _root_url("http://localhost:1234/v1") == "http://localhost:1234"
+    assert _root_url("http://localhost:1234/v1/") == "http://localhost:1234"
+    # rstrip("/v1") would also eat the port's trailing 1s here
+    assert _root_url("http://host:11/v1") == "http://host:11"
+    assert _root_url("http://host:1234") == "http://host:1234"
+
+
+def test_endpoint_urls_are_built_from_root():
+    client = LMStudioClient(base_url="http://host:1234")
+
+    assert client._models_url == "http://host:1234/v1/models"
+    assert client._load_url == "http://host:1234/api/v0/models/load"
+    assert client._unload_url == "http://host:1234/api/v0/models/unload"
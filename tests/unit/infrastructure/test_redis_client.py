@@ -0,0 +1,82 @@
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+from redis.exceptions import ConnectionError, ResponseError
+
+from src.core.utils.config import RedisSettings
+from src.infrastructure.cache.redis_client import RedisClient, RedisClientError
+
+
+def _client() -> RedisClient:
+    client = RedisClient(RedisSettings(), retry_delay=0)
+    client._sliding_window = AsyncMock()
+    return client
+
+
+async def test_acquire_rate_limit_runs_one_script_call():
+    client = _client()
+    client._sliding_window.return_value = [1, 2]
+
+    assert await client.acquire_rate_limit("tool_ratelimit:search", 5, 1.5) == (True, 2)
+
+    client._sliding_window.assert_awaited_once()
+    call = client._sliding_window.await_args.kwargs
+    assert call["keys"] == ["MAI:tool_ratelimit:search"]
+    window_ms, limit, member = call["args"]
+    assert (window_ms, limit) == (1500, 5)
+    assert len(member) == 32
+
+
+async def test_acquire_rate_limit_reports_rejection():
+    client = _client()
+    client._sliding_window.return_value = [0, 5]
+
+    assert await client.acquire_rate_limit("key", 5, 1) == (False, 5)
+
+
+async def test_acquire_rate_limit_retries_with_the_same_member():
+    client = _client()
+    client._sliding_window.side_effect = [ConnectionError("reset"), [1, 1]]
+
+    assert await client.acquire_rate_limit("key", 5, 1) == (True, 1)
+
+    first, second = client._sliding_window.await_args_list
+    assert first.kwargs["args"] == second.kwargs["args"]
+
+
+def _pipeline_client(execute) -> tuple[RedisClient, MagicMock]:
+    client = _client()
+    pipe = MagicMock()
+    pipe.execute = execute
+    client.client = MagicMock()
+    client.client.pipeline.return_value.__aenter__.return_value = pipe
+    return client, pipe
+
+
+async def test_append_list_trims_and_pushes_in_one_transaction():
+    client, pipe = _pipeline_client(AsyncMock(return_value=[True, 3]))
+
+    assert await client.append_list("history", {"a": 1}, "b", trim_start=2) == 3
+
+    client.client.pipeline.assert_called_once_with(transaction=True)
+    pipe.ltrim.assert_called_once_with("MAI:history", 2, -1)
+    pipe.rpush.assert_called_once_with("MAI:history", '{"a": 1}', "b")
+
+
+async def test_append_list_is_not_retried():
+    client, pipe = _pipeline_client(AsyncMock(side_effect=ConnectionError("reset")))
+
+    with pytest.raises(RedisClientError):
+        await client.append_list("history", "a", trim_start=1)
+
+    pipe.execute.assert_awaited_once()
+
+
+async def test_server_errors_are_not_retried():
+    client = _client()
+    operation = AsyncMock(side_effect=ResponseError("WRONGTYPE Operation against a key"))
+
+    with pytest.raises(RedisClientError, match="WRONGTYPE"):
+        await client._retry_operation("lrange", operation)
+
+    operation.assert_awaited_once()